@@ -0,0 +1,168 @@
+# alignment.py
+"""
+Reference-melody scoring: the reference notes become a target pitch contour,
+which is aligned to the sung F0 contour with Sakoe-Chiba banded DTW.
+Time and memory are O(n * band), so multi-minute takes score in well under a second.
+"""
+import numpy as np
+from note_utils import lex_notes, midi_to_note
+from raga_index import intonation_points, melody_midi
+
+NOTE_SECONDS = 0.5 # Reference timing, same as the melody preview renders it
+BAND_SECONDS = 2.0 # Half-width of the Sakoe-Chiba band
+UNVOICED_COST = 1.0 # Semitones charged for matching a silent sung frame to a note
+MAX_COST = 6.0 # Per-frame cost cap, so one wild octave jump cannot dominate the path
+
+def hz_to_midi(f0):
+    """Fractional MIDI for an f0 array in Hz; unvoiced (NaN / <= 0) stays NaN."""
+    f0 = np.asarray(f0, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        midi = 69.0 + 12.0 * np.log2(f0 / 440.0)
+    midi[~(f0 > 0)] = np.nan
+    return midi
+
+def reference_contour(reference_notes, hop_seconds, note_seconds=NOTE_SECONDS, root_midi=None):
+    """
+    Reference melody (text or list) -> (target MIDI per frame, note index per frame, note names).
+    Every note lasts `note_seconds`, like the rendered preview. With `root_midi` (Sa),
+    swaras are read above it exactly as the composer's raga check reads them (melody_midi).
+    """
+    if isinstance(reference_notes, (list, tuple)):
+        reference_notes = " ".join(str(n) for n in reference_notes)
+    if root_midi is None:
+        seq = lex_notes(reference_notes or "")
+        midi, names = np.asarray(seq.midi, dtype=np.float64), list(seq.names)
+    else:
+        midi = melody_midi(reference_notes, root_midi).astype(np.float64)
+        names = [midi_to_note(m) for m in midi]
+    frames_per_note = max(1, int(round(note_seconds / hop_seconds)))
+    return np.repeat(midi, frames_per_note), np.repeat(np.arange(len(midi)), frames_per_note), names
+
+def banded_dtw(cost_fn, n, m, band):
+    """
+    DTW over an n x m grid restricted to a band of +-`band` cells around the diagonal.
+    `cost_fn(i, cols)` returns the local cost of row i against the given columns.
+    Each row is solved in one vectorized step: with B[k] the best entry from the row
+    above, D[j] = S[j] + min_{k<=j}(B[k] - S[k]) where S is the row's cost prefix sum.
+    Returns (total cost, path as an array of (i, j) pairs).
+    """
+    width = min(m, 2 * band + 1)
+    centre = np.rint(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(np.int64)
+    starts = np.clip(centre - band, 0, m - width)
+    offsets = np.arange(width)
+
+    D = np.full((n, width), np.inf)
+    prev = None
+    for i in range(n):
+        cols = starts[i] + offsets
+        c = cost_fn(i, cols)
+        if i == 0:
+            best = np.where(cols == 0, 0.0, np.inf)
+        else:
+            k = cols - starts[i - 1]
+            up = np.where((k >= 0) & (k < width), prev[np.clip(k, 0, width - 1)], np.inf)
+            diag = np.where((k >= 1) & (k <= width), prev[np.clip(k - 1, 0, width - 1)], np.inf)
+            best = np.minimum(up, diag)
+        s = np.cumsum(c)
+        with np.errstate(invalid="ignore"):
+            row = s + np.minimum.accumulate(best + c - s)
+        D[i] = row
+        prev = row
+
+    total = D[n - 1, m - 1 - starts[n - 1]]
+    if not np.isfinite(total):
+        return np.inf, np.empty((0, 2), dtype=np.int64)
+
+    # Backtrack from the corner, always stepping to the cheapest predecessor
+    path = [(n - 1, m - 1)]
+    i, j = n - 1, m - 1
+    get = lambda r, col: D[r, col - starts[r]] if 0 <= col - starts[r] < width else np.inf
+    while i > 0 or j > 0:
+        candidates = ((get(i - 1, j - 1), i - 1, j - 1), (get(i - 1, j), i - 1, j), (get(i, j - 1), i, j - 1))
+        _, i, j = min((v, a, b) for v, a, b in candidates if a >= 0 and b >= 0)
+        path.append((i, j))
+    return float(total), np.array(path[::-1], dtype=np.int64)
+
+def align_to_reference(f0, reference_notes, hop_seconds, note_seconds=NOTE_SECONDS,
+                       band_seconds=BAND_SECONDS, tolerance_cents=50.0, root_midi=None):
+    """
+    Aligns a sung F0 track (Hz, NaN = unvoiced) to the reference melody, read
+    relative to `root_midi` (Sa) when given (see reference_contour).
+    The reference is moved by whole octaves to the singer's register first.
+    Returns {"score", "pitch_score", "timing_score", "octave_shift", "notes": [...]}
+    where each note has cents (median deviation), timing_s (onset offset),
+    duration_s, voiced share and whether it was in tune.
+    """
+    sung = hz_to_midi(f0)
+    target, note_of_frame, names = reference_contour(reference_notes, hop_seconds, note_seconds, root_midi)
+    voiced = ~np.isnan(sung)
+    if not len(names) or not voiced.any():
+        return {"score": 0, "pitch_score": 0, "timing_score": 0, "octave_shift": 0, "notes": []}
+
+    # Trim leading / trailing silence so the band follows the sung part
+    first, last = np.flatnonzero(voiced)[[0, -1]]
+    sung = sung[first:last + 1]
+    shift = 12 * int(np.round(np.median(sung[~np.isnan(sung)] - np.median(target)) / 12.0))
+    target = target + shift
+
+    band = max(1, int(round(band_seconds / hop_seconds)))
+
+    def cost(i, cols):
+        x = sung[i]
+        if np.isnan(x):
+            return np.full(len(cols), UNVOICED_COST)
+        return np.minimum(np.abs(x - target[cols]), MAX_COST)
+
+    _, path = banded_dtw(cost, len(sung), len(target), band)
+
+    # Per-note statistics from the frames the path assigns to each note
+    rows, cols = path[:, 0], path[:, 1]
+    note_idx = note_of_frame[cols]
+    dev = (sung[rows] - target[cols]) * 100.0
+    notes = []
+    for k, name in enumerate(names):
+        sel = note_idx == k
+        frames = np.unique(rows[sel])
+        d = dev[sel]
+        d = d[~np.isnan(d)]
+        onset = (first + frames[0]) * hop_seconds
+        expected = first * hop_seconds + k * note_seconds
+        notes.append({
+            "note": name,
+            "cents": round(float(np.median(d)), 1) if len(d) else None,
+            "timing_s": round(float(onset - expected), 3),
+            "duration_s": round(len(frames) * hop_seconds, 3),
+            "voiced": round(float(np.mean(~np.isnan(sung[frames]))), 2),
+            "in_tune": bool(len(d) and abs(np.median(d)) <= tolerance_cents),
+        })
+
+    # Pitch: 0 cents -> 1, a semitone or more (or silence) -> 0. Timing: on time -> 1, a note late -> 0.
+    pitch = np.array([max(0.0, 1.0 - abs(n["cents"]) / 100.0) * n["voiced"] if n["cents"] is not None else 0.0
+                      for n in notes])
+    timing = np.array([max(0.0, 1.0 - abs(n["timing_s"]) / note_seconds) for n in notes])
+    pitch_score, timing_score = 100 * pitch.mean(), 100 * timing.mean()
+    return {
+        "score": int(round(0.7 * pitch_score + 0.3 * timing_score)),
+        "pitch_score": int(round(pitch_score)),
+        "timing_score": int(round(timing_score)),
+        "octave_shift": shift // 12,
+        "notes": notes,
+    }
+
+def intonation_score(f0, raga, root_midi):
+    """
+    Fallback score without a reference: 100 at 0 cents mean error to the nearest swara, 0 at 50.
+    Frames on the vadi / samvadi count more (raga.weights), as a guru listens hardest there.
+    """
+    cents_sum, weight_sum = raga.weighted_cents(hz_to_midi(f0), root_midi)
+    return intonation_points(cents_sum / weight_sum) if weight_sum else 0
+
+def note_feedback(alignment, limit=4):
+    """Short text of the worst notes for the coach prompt, e.g. 'G4 +35c late 0.20s'."""
+    notes = [n for n in alignment.get("notes", []) if n["cents"] is not None]
+    notes.sort(key=lambda n: abs(n["cents"]) + 100 * abs(n["timing_s"]), reverse=True)
+    parts = []
+    for n in notes[:limit]:
+        when = "late" if n["timing_s"] > 0 else "early"
+        parts.append(f"{n['note']} {n['cents']:+.0f}c {when} {abs(n['timing_s']):.2f}s")
+    return "; ".join(parts) if parts else "No reference alignment"
@@ -1,18 +1,20 @@
 import streamlit as st
 import os
-import time
 import json
-import plotly.graph_objects as go
 from dotenv import load_dotenv
 import streamlit.components.v1 as components
 
 # --- BACKEND IMPORTS ---
-from composer import BollywoodComposer
-from coach import SingingCoach
-from music_engine import MusicEngine
-from audio_analyzer import AudioAnalyzer
+# Composer / coach / DSP engines are used by the background jobs (app_jobs)
 from voice_cloning import VoiceCloningEngine
 from raga_knowledge import RAGA_DB
+from lazy_import import lazy_import
+from job_queue import get_job_queue
+from rerun_profile import get_rerun_profile
+import app_jobs
+
+# Plotly is only needed once the Diagnostics radar is drawn
+go = lazy_import("plotly.graph_objects")
 
 load_dotenv()
 
@@ -26,8 +28,8 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-def inject_machina_theme():
-    st.markdown("""
+# Built once at import; Streamlit still needs it emitted on every rerun
+THEME_CSS = """
     <style>
         @import url('https://fonts.googleapis.com/css2?family=Space+Mono:ital,wght@0,400;0,700;1,400&family=Chakra+Petch:wght@400;600;700&display=swap');
         
@@ -103,43 +105,114 @@ def inject_machina_theme():
             background-color: #00FF9D; color: #000; border-color: #00FF9D; font-weight: bold;
         }
     </style>
-    """, unsafe_allow_html=True)
+    """
+
+def inject_machina_theme():
+    st.markdown(THEME_CSS, unsafe_allow_html=True)
 
 # -----------------------------------------------------------------------------
 # 2. 3D RENDER ENGINE (PYTHON -> JS)
 # -----------------------------------------------------------------------------
+DATA_PLACEHOLDER = 'const DATA = null;'
+
+@st.cache_resource(max_entries=16)
+def html_template(file_path, mtime):
+    """
+    The HTML file split around the DATA placeholder, read from disk once per
+    file version (mtime is part of the key, so edits are picked up).
+    """
+    with open(file_path, 'r') as f:
+        head, found, tail = f.read().partition(DATA_PLACEHOLDER)
+    return head, (tail if found else None)
+
 def render_3d_panel(file_path, data_dict, height=350):
     """
-    Reads an HTML file, injects a JSON dictionary into the 'DATA' const,
+    Injects a JSON dictionary into the template's 'DATA' const
     and renders it in Streamlit.
     """
     try:
-        with open(file_path, 'r') as f:
-            html_content = f.read()
-        
-        # Inject Python data into JS
-        json_data = json.dumps(data_dict)
-        html_content = html_content.replace('const DATA = null;', f'const DATA = {json_data};')
-        
-        components.html(html_content, height=height, scrolling=False)
+        head, tail = html_template(file_path, os.path.getmtime(file_path))
     except FileNotFoundError:
         st.error(f"UI Component missing: {file_path}")
+        return
+
+    # Inject Python data into JS
+    html_content = head if tail is None else f"{head}const DATA = {json.dumps(data_dict)};{tail}"
+    components.html(html_content, height=height, scrolling=False)
 
 # -----------------------------------------------------------------------------
-# 3. VISUALIZATIONS
+# 3. BACKGROUND JOBS (LLM / DSP never run in the script thread)
+# -----------------------------------------------------------------------------
+def submit_job(slot, fn, *args):
+    """Queues fn on the shared job queue as this session's job for `slot` (one per panel)."""
+    st.session_state[f"{slot}_job"] = get_job_queue().submit(fn, *args)
+    st.session_state.pop(f"{slot}_error", None)
+
+def job_active(slot):
+    return f"{slot}_job" in st.session_state
+
+@st.fragment(run_every=1.0)
+def job_monitor(slot, on_done):
+    """
+    Polls the job for `slot` once a second inside a fragment, so only this
+    progress bar reruns. When the job ends, on_done(result) stores its output
+    in session_state and the whole page reruns to show it.
+    """
+    job = get_job_queue().status(st.session_state.get(f"{slot}_job"))
+    if job is not None and job["status"] in ("queued", "running"):
+        st.progress(job["progress"], text=job["message"] or "QUEUED...")
+        return
+    st.session_state.pop(f"{slot}_job", None)
+    if job is None:
+        st.session_state[f"{slot}_error"] = "Job expired before its result was collected."
+    elif job["status"] == "failed":
+        st.session_state[f"{slot}_error"] = job["error"]
+    else:
+        on_done(job["result"])
+    st.rerun()
+
+@st.cache_resource
+def get_voice_cloner():
+    """One VoiceCloningEngine per server process instead of one per click (consent checks are stateless)."""
+    return VoiceCloningEngine()
+
+def store_song(result):
+    if "error" in result:
+        st.session_state["compose_error"] = result["error"]
+    else:
+        st.session_state['song'] = result["song"]
+        st.session_state['audio'] = result["audio"]
+
+def store_feedback(result):
+    st.session_state['feedback'] = result["feedback"]
+
+def store_model(result):
+    st.session_state['model'] = result['model_id']
+    st.session_state['model_archived'] = True
+
+# -----------------------------------------------------------------------------
+# 4. VISUALIZATIONS
 # -----------------------------------------------------------------------------
 def plot_machine_radar(scores):
-    categories = ['PITCH', 'TIMING', 'VIBE', 'STABILITY', 'RANGE']
-    values = [
+    categories = ('PITCH', 'TIMING', 'VIBE', 'STABILITY', 'RANGE')
+    values = (
         int(scores.get('pitch_accuracy', "0").strip('%')),
         int(scores.get('rhythm_accuracy', "0").strip('%')),
         int(scores.get('emotion_match', "0").strip('%')),
         int(scores.get('swara_correctness', "0").strip('%')), 
         80
-    ]
+    )
+    return radar_figure(categories, values)
+
+@st.cache_data(max_entries=64)
+def radar_figure(categories, values):
+    """
+    Figure dict per distinct score set; reruns reuse it instead of rebuilding the Plotly
+    objects. cache_data hands every session its own copy, so nothing shares a mutable figure.
+    """
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
-        r=values, theta=categories, fill='toself',
+        r=list(values), theta=list(categories), fill='toself',
         fillcolor='rgba(0, 255, 157, 0.1)', line_color='#00FF9D',
         marker=dict(color='#000', size=6, line=dict(width=1, color='#00FF9D'))
     ))
@@ -153,13 +226,23 @@ def plot_machine_radar(scores):
         margin=dict(l=20, r=20, t=20, b=20),
         height=300, showlegend=False
     )
-    return fig
+    return fig.to_dict()
 
 # -----------------------------------------------------------------------------
-# 4. MAIN APP
+# 5. MAIN APP
 # -----------------------------------------------------------------------------
+def show_rerun_profile(last_total_ms):
+    """Table of per-section rerun cost (?profile=1 or APP_PROFILE=1)."""
+    profile = get_rerun_profile()
+    with st.expander(f"RERUN_PROFILE // last {last_total_ms:.1f} ms, budget {profile.budget_ms:.0f} ms, "
+                     f"{profile.over_budget}/{profile.runs} over", expanded=False):
+        st.dataframe([{"section": name, **row} for name, row in profile.summary().items()],
+                     use_container_width=True)
+
 def main():
-    inject_machina_theme()
+    run = get_rerun_profile().start()
+    with run.section("theme"):
+        inject_machina_theme()
     
     st.markdown("<h1 style='text-align:center;'>M A C H I N A . O S</h1>", unsafe_allow_html=True)
     st.markdown("<div style='text-align:center; color:#C4804E; letter-spacing:3px; margin-bottom:30px;'>// AUDIO_SYNTHESIS_UNIT_V4</div>", unsafe_allow_html=True)
@@ -169,7 +252,7 @@ def main():
     # =========================================================================
     # TAB 1: COMPOSER
     # =========================================================================
-    with tabs[0]:
+    with tabs[0], run.section("composer"):
         col_controls, col_monitor = st.columns([1, 1.6], gap="large")
         
         with col_controls:
@@ -185,30 +268,23 @@ def main():
                 voice = st.radio("EMITTER", ["Male", "Female"], horizontal=True)
                 
                 st.write("")
-                if st.button("INITIATE_SEQUENCE"):
-                    composer = BollywoodComposer()
-                    engine = MusicEngine()
-                    
-                    # Set a temporary flag to trigger animation if we were using callbacks
-                    # Here we just run the heavy process
-                    with st.spinner("PROCESSING WAVEFORMS..."):
-                        song_data = composer.generate_full_song(prompt, mood, raga, voice) #
-                        if "error" in song_data:
-                            st.error(song_data["error"])
-                        else:
-                            wav = engine.generate_preview_wav(song_data) #
-                            st.session_state['song'] = song_data
-                            st.session_state['audio'] = wav
+                if st.button("INITIATE_SEQUENCE", disabled=job_active("compose")):
+                    submit_job("compose", app_jobs.compose_job, prompt, mood, raga, voice)
+                if job_active("compose"):
+                    job_monitor("compose", store_song)
+                if st.session_state.get("compose_error"):
+                    st.error(st.session_state["compose_error"])
 
         with col_monitor:
             # 3D REACTOR PANEL
             # We determine state based on whether a song exists or user just clicked (simulated)
             reactor_state = "idle"
-            if 'song' in st.session_state:
+            if 'song' in st.session_state or job_active("compose"):
                 reactor_state = "generating" # Keep it high energy if song is loaded
             
             # RENDER THE 3D COMPONENT
-            render_3d_panel("ui/composer_3d.html", {"state": reactor_state})
+            with run.section("3d_panel"):
+                render_3d_panel("ui/composer_3d.html", {"state": reactor_state})
 
             # RESULTS DISPLAY
             if 'song' in st.session_state:
@@ -237,7 +313,7 @@ def main():
     # =========================================================================
     # TAB 2: DIAGNOSTICS
     # =========================================================================
-    with tabs[1]:
+    with tabs[1], run.section("diagnostics"):
         c1, c2 = st.columns(2, gap="large")
         with c1:
             with st.container(border=True):
@@ -245,45 +321,51 @@ def main():
                 st.markdown("---")
                 uploaded_file = st.file_uploader("UPLOAD_WAVEFORM", type=['wav', 'mp3'])
                 coach_raga = st.selectbox("PROTOCOL", list(RAGA_DB.keys()), key="anl_raga")
-                if st.button("RUN_DIAGNOSTICS", use_container_width=True):
+                coach_voice = st.radio("EMITTER", ["Male", "Female"], horizontal=True, key="anl_voice")
+                if st.button("RUN_DIAGNOSTICS", use_container_width=True, disabled=job_active("diagnostics")):
                     if uploaded_file:
-                        coach = SingingCoach()
-                        analyzer = AudioAnalyzer()
-                        with st.spinner("PARSING..."):
-                            d = uploaded_file.read()
-                            analysis = analyzer.analyze_singing(d, coach_raga) #
-                            feedback = coach.evaluate_performance(coach_raga, "Male", "Ref", analysis['detected_notes'], analysis['pitch_score']) #
-                            st.session_state['feedback'] = feedback
+                        reference = st.session_state.get('song', {}).get('melody_main')
+                        submit_job("diagnostics", app_jobs.diagnostics_job, uploaded_file.getvalue(), coach_raga,
+                                   reference, coach_voice)
+                if job_active("diagnostics"):
+                    job_monitor("diagnostics", store_feedback)
+                if st.session_state.get("diagnostics_error"):
+                    st.error(st.session_state["diagnostics_error"])
         with c2:
             if 'feedback' in st.session_state:
                 res = st.session_state['feedback']
                 with st.container(border=True):
                     if "error" not in res:
                         st.markdown("### BIOMETRICS")
-                        fig = plot_machine_radar(res.get('performance_score', {}))
-                        st.plotly_chart(fig, use_container_width=True)
+                        with run.section("radar"):
+                            fig = plot_machine_radar(res.get('performance_score', {}))
+                            st.plotly_chart(fig, use_container_width=True)
                         st.success(f"SYS_MSG: {res.get('guru_comment', 'COMPLETE')}")
 
     # =========================================================================
     # TAB 3: CLONING VAT
     # =========================================================================
-    with tabs[2]:
+    with tabs[2], run.section("cloning"):
         with st.container(border=True):
             col_a, col_b = st.columns([1, 1], gap="large")
             with col_a:
                 st.markdown("### REPLICATION_PROTOCOL")
                 consent = st.text_input("SECURITY_PHRASE", placeholder="i confirm that this is my own voice")
                 files = st.file_uploader("SAMPLES", accept_multiple_files=True)
-                if st.button("ENGAGE_NEURAL_ENGINE", use_container_width=True):
-                    cloner = VoiceCloningEngine()
+                if st.button("ENGAGE_NEURAL_ENGINE", use_container_width=True, disabled=job_active("clone")):
+                    cloner = get_voice_cloner()
                     valid, msg = cloner.verify_consent(consent, files) #
                     if valid:
-                        with st.spinner("TRAINING..."):
-                            time.sleep(2)
-                            res = cloner.train_user_model("SUBJECT_01", files) #
-                            st.session_state['model'] = res['model_id']
-                            st.success("ARCHIVED")
+                        samples = [(f.name, f.getvalue()) for f in files]
+                        submit_job("clone", app_jobs.clone_job, "SUBJECT_01", samples)
+                        st.session_state.pop('model_archived', None)
                     else: st.error(msg)
+                if job_active("clone"):
+                    job_monitor("clone", store_model)
+                if st.session_state.get("clone_error"):
+                    st.error(st.session_state["clone_error"])
+                elif st.session_state.get('model_archived'):
+                    st.success("ARCHIVED")
             with col_b:
                 st.markdown("### NODES")
                 if 'model' in st.session_state:
@@ -291,5 +373,9 @@ def main():
                 else:
                     st.markdown("<div style='border:1px dashed #333; padding:20px; text-align:center;'>NO_DATA</div>", unsafe_allow_html=True)
 
+    total_ms = run.finish()
+    if os.getenv("APP_PROFILE") or st.query_params.get("profile") == "1":
+        show_rerun_profile(total_ms)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,66 @@
+# app_jobs.py
+"""
+The Streamlit handlers' work as job_queue jobs. LLM calls run on the queue's
+I/O threads; synthesis and pitch analysis run in its worker processes (the
+*_task functions below are module level so they pickle).
+"""
+import threading
+from voice_cloning import VoiceCloningEngine
+
+_lock = threading.Lock()
+_shared = {}
+
+def _shared_instance(name, factory):
+    """One composer / coach per process, shared by the I/O threads (their LLM clients are pooled)."""
+    with _lock:
+        obj = _shared.get(name)
+        if obj is None:
+            obj = _shared[name] = factory()
+        return obj
+
+# 1. Worker-process tasks (DSP)
+_engine = None
+_analyzer = None
+
+def render_preview_task(song):
+    global _engine
+    if _engine is None:
+        from music_engine import MusicEngine
+        _engine = MusicEngine()
+    return _engine.generate_preview_wav(song)
+
+def analyze_take_task(audio_bytes, raga, voice_type="Male", reference_notes=None):
+    global _analyzer
+    if _analyzer is None:
+        from audio_analyzer import AudioAnalyzer
+        _analyzer = AudioAnalyzer()
+    return _analyzer.analyze_singing(audio_bytes, raga, voice_type, reference_notes)
+
+# 2. Jobs (run on I/O threads)
+def compose_job(job, prompt, mood, raga, voice):
+    """INITIATE_SEQUENCE: song from the LLM, then the preview render. Returns {"song", "audio"} or {"error"}."""
+    from composer import BollywoodComposer
+    job.progress(0.05, "COMPOSING...")
+    song = _shared_instance("composer", BollywoodComposer).generate_full_song(prompt, mood, raga, voice)
+    if "error" in song:
+        return {"error": song["error"]}
+    job.progress(0.7, "PROCESSING WAVEFORMS...")
+    return {"song": song, "audio": job.run_cpu(render_preview_task, song)}
+
+def diagnostics_job(job, audio_bytes, raga, reference_notes=None, voice_type="Male"):
+    """RUN_DIAGNOSTICS: pitch analysis in a worker process, then coach feedback. Returns {"analysis", "feedback"}."""
+    from coach import SingingCoach
+    job.progress(0.05, "PARSING...")
+    analysis = job.run_cpu(analyze_take_task, audio_bytes, raga, voice_type, reference_notes)
+    job.progress(0.6, "CONSULTING GURU...")
+    feedback = _shared_instance("coach", SingingCoach).evaluate_performance(
+        raga, voice_type, reference_notes, analysis.get("note_events") or analysis["detected_notes"],
+        analysis["pitch_score"], analysis.get("alignment"))
+    return {"analysis": analysis, "feedback": feedback}
+
+def clone_job(job, user_id, samples):
+    """ENGAGE_NEURAL_ENGINE: `samples` is a list of (name, bytes) read from the upload widget."""
+    def on_step(step, total, name):
+        job.progress(step / total, f"TRAINING: {name.upper()}...")
+
+    return VoiceCloningEngine().train_user_model(user_id, samples, progress=on_step)
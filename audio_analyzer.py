@@ -1,45 +1,199 @@
 # audio_analyzer.py
 import numpy as np
 import io
+import time
+from lazy_import import lazy_import, is_available
+from raga_index import get_raga_index, voice_root_midi
+from pitch_tracking import yin, StreamingYin
+from audio_stream import iter_audio_blocks, BlockResampler, PitchStats, ANALYSIS_SR
+from feature_cache import get_feature_cache, feature_key, audio_digest
+from alignment import align_to_reference, intonation_score, hz_to_midi
+from note_segmentation import segment_notes
+from pitch_monitor import PitchMonitor
 
-# Soft dependency check for librosa
-try:
-    import librosa
-    HAS_LIBROSA = True
-except ImportError:
-    HAS_LIBROSA = False
+# Soft dependency check for librosa (numba JIT makes the import itself slow,
+# so it is only loaded once an analysis actually runs). Installed is not the
+# same as importable: analyze_singing clears the flag if the first import fails.
+HAS_LIBROSA = is_available("librosa")
+librosa = lazy_import("librosa")
+
+SIMULATED_RESULT = {"detected_notes": "C4 D4 E4 (Simulated - Install Librosa for real)", "pitch_score": 85}
+
+PITCH_ENGINES = ("pyin", "yin")
+# analyze_stream keeps the F0 track for the feature cache only up to this length;
+# longer recordings are summarized block by block and not cached, so memory stays flat
+STREAM_CACHE_MAX_SECONDS = 600.0
 
 class AudioAnalyzer:
-    def analyze_singing(self, audio_bytes, expected_raga_scale):
+    def __init__(self, pitch_engine="pyin", hop_length=512, voicing_threshold=0.1,
+                 use_cache=True, output_dir="generated_music"):
+        """
+        pitch_engine      : "pyin" (librosa, most robust) or "yin" (vectorized FFT YIN,
+                            many times faster on CPU-only workers)
+        hop_length        : analysis hop in samples at 22.05 kHz
+        voicing_threshold : YIN aperiodicity threshold (lower = stricter voicing)
+        use_cache         : keep extracted F0 tracks in <output_dir>/feature_cache, keyed by
+                            the audio hash, so re-scoring the same take skips decoding and DSP
+        """
+        if pitch_engine not in PITCH_ENGINES:
+            raise ValueError(f"Unknown pitch engine '{pitch_engine}'. Choose from {PITCH_ENGINES}.")
+        self.pitch_engine = pitch_engine
+        self.hop_length = hop_length
+        self.voicing_threshold = voicing_threshold
+        self.cache = get_feature_cache(output_dir) if use_cache else None
+
+    def _feature_key(self, digest, loader, engine=None):
+        engine = engine or self.pitch_engine
+        params = {"engine": engine, "hop": self.hop_length, "sr": ANALYSIS_SR, "loader": loader}
+        if engine == "yin":
+            params["threshold"] = self.voicing_threshold
+        return feature_key(digest, **params)
+
+    def extract_features(self, audio_bytes):
+        """
+        Decodes the take and tracks its pitch, or loads both from the feature cache.
+        Returns {"f0", "voiced_flag", "voiced_prob", "sr", "hop_length"}.
+        """
+        key = self._feature_key(audio_digest(audio_bytes), "librosa") if self.cache else None
+        if key:
+            features = self.cache.get(key)
+            if features is not None:
+                return features
+
+        y, sr = librosa.load(io.BytesIO(audio_bytes), sr=ANALYSIS_SR)
+        f0, voiced_flag, voiced_probs = self.track_pitch(y, sr)
+        features = {"f0": f0, "voiced_flag": voiced_flag, "voiced_prob": voiced_probs,
+                    "sr": sr, "hop_length": self.hop_length}
+        if key:
+            self.cache.put(key, features)
+        return features
+
+    def track_pitch(self, y, sr):
+        """Returns (f0, voiced_flag, voiced_probs) from the selected engine."""
+        if self.pitch_engine == "yin":
+            return yin(y, sr, hop_length=self.hop_length, threshold=self.voicing_threshold)
+        return librosa.pyin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C6'),
+                            hop_length=self.hop_length)
+
+    def monitor(self, raga_name, voice_type="Male", sr=ANALYSIS_SR, hop_length=256):
+        """Live PitchMonitor using this analyzer's voicing threshold (see pitch_monitor.py)."""
+        return PitchMonitor(raga_name, voice_type, sr=sr, hop_length=hop_length,
+                            threshold=self.voicing_threshold)
+
+    def analyze_singing(self, audio_bytes, expected_raga_scale, voice_type="Male", reference_notes=None):
+        """
+        Scores one take. With `reference_notes` (the melody the singer was asked to sing)
+        pitch_score comes from a banded-DTW alignment and the per-note result is returned
+        under "alignment"; without it, pitch_score is intonation against the raga's swaras.
+        """
+        global HAS_LIBROSA
         if not HAS_LIBROSA:
-            return {
-                "detected_notes": "C4 D4 E4 (Simulated - Install Librosa for real)", 
-                "pitch_score": 85
-            }
+            return dict(SIMULATED_RESULT)
         
         try:
-            # Load Audio (22kHz mono)
-            y, sr = librosa.load(io.BytesIO(audio_bytes), sr=22050)
+            # Load Audio (22kHz mono) and extract Pitch (F0), cached per take
+            features = self.extract_features(audio_bytes)
+            f0 = features["f0"]
+            hop_seconds = int(features["hop_length"]) / float(features["sr"])
             
-            # Extract Pitch (F0)
-            f0, voiced_flag, voiced_probs = librosa.pyin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C6'))
+            # Segment the whole F0 track into timed notes (onset, duration, pitch, stability)
+            notes = segment_notes(f0, hop_seconds)
+            notes_summary = notes.summary()
             
-            # Convert F0 to Note Names
-            detected_notes = []
-            f0_clean = f0[~np.isnan(f0)]
-            if len(f0_clean) > 0:
-                # Sample every 10th frame
-                for freq in f0_clean[::10]: 
-                    note = librosa.hz_to_note(freq)
-                    detected_notes.append(note)
+            # Raga check over every voiced frame in one vectorized call
+            raga = get_raga_index(expected_raga_scale)
+            root_midi = voice_root_midi(voice_type)
+            raga_check = raga.conformance(hz_to_midi(f0), root_midi)
             
-            # Simple summary of unique notes detected
-            notes_summary = " ".join(list(dict.fromkeys(detected_notes))[:8])
-            
-            return {
+            result = {
                 "detected_notes": notes_summary if notes_summary else "No clear voice detected",
-                "pitch_score": np.random.randint(60, 95) 
+                "pitch_score": intonation_score(f0, raga, root_midi),
+                "raga_match": round(100 * raga_check["in_scale"]),
+                "note_events": notes.to_list()
             }
             
+            # Reference melody given: align it to the sung contour and score against it
+            if reference_notes:
+                alignment = align_to_reference(f0, reference_notes, hop_seconds, root_midi=root_midi)
+                if alignment["notes"]:
+                    result["pitch_score"] = alignment["score"]
+                    result["alignment"] = alignment
+            return result
+            
+        except ImportError: # librosa (or numba) is installed but broken
+            HAS_LIBROSA = False
+            return dict(SIMULATED_RESULT)
+        except Exception as e:
+            return {"detected_notes": "Error analyzing audio", "pitch_score": 0}
+
+    def analyze_stream(self, source, expected_raga_scale, voice_type="Male", block_seconds=10.0,
+                       timings=None, histogram=False):
+        """
+        Constant-memory variant of analyze_singing for long recordings (riyaz sessions).
+        `source` is a path, file-like object or bytes; audio is decoded, resampled and
+        pitch-tracked one block at a time with streaming YIN, and only running
+        statistics are kept. Returns the analyze_singing fields plus duration_s,
+        voiced_ratio, f0_median_hz, top_notes and mean_cents_error.
+        Pass a dict as `timings` to accumulate seconds spent per stage
+        (decode, resample, pitch, stats); histogram=True adds note_histogram.
+        """
+        timings = {} if timings is None else timings
+        for stage in ("decode", "resample", "pitch", "stats"):
+            timings.setdefault(stage, 0.0)
+        try:
+            stats = PitchStats(get_raga_index(expected_raga_scale), voice_root_midi(voice_type),
+                               hop_seconds=self.hop_length / ANALYSIS_SR)
+            key = self._feature_key(audio_digest(source), "stream", "yin") if self.cache else None
+            cached = self.cache.get(key) if key else None
+            if cached is not None:
+                t0 = time.perf_counter()
+                stats.update(cached["f0"])
+                timings["stats"] += time.perf_counter() - t0
+                return stats.summary(histogram)
+
+            # F0 track for the cache; dropped (None) once the take passes STREAM_CACHE_MAX_SECONDS
+            track = {"blocks": [] if key else None, "frames": 0}
+            max_frames = int(STREAM_CACHE_MAX_SECONDS * ANALYSIS_SR / self.hop_length)
+            tracker = StreamingYin(ANALYSIS_SR, hop_length=self.hop_length, threshold=self.voicing_threshold)
+            resampler = None
+
+            def feed(samples):
+                t0 = time.perf_counter()
+                f0 = tracker.process(samples)[0] if samples is not None else tracker.flush()[0]
+                t1 = time.perf_counter()
+                stats.update(f0)
+                if track["blocks"] is not None:
+                    track["frames"] += len(f0)
+                    if track["frames"] <= max_frames:
+                        track["blocks"].append(f0)
+                    else:
+                        track["blocks"] = None
+                timings["pitch"] += t1 - t0
+                timings["stats"] += time.perf_counter() - t1
+
+            blocks = iter_audio_blocks(source, block_seconds)
+            while True:
+                t0 = time.perf_counter()
+                block, sr = next(blocks, (None, None))
+                t1 = time.perf_counter()
+                timings["decode"] += t1 - t0
+                if block is None:
+                    break
+                if resampler is None:
+                    resampler = BlockResampler(sr, ANALYSIS_SR)
+                samples = resampler.process(block)
+                timings["resample"] += time.perf_counter() - t1
+                feed(samples)
+
+            if resampler is not None:
+                t0 = time.perf_counter()
+                samples = resampler.flush()
+                timings["resample"] += time.perf_counter() - t0
+                feed(samples)
+            feed(None)
+            if track["blocks"] is not None:
+                f0 = np.concatenate(track["blocks"]) if track["blocks"] else np.empty(0)
+                self.cache.put(key, {"f0": f0, "sr": ANALYSIS_SR, "hop_length": self.hop_length})
+            return stats.summary(histogram)
         except Exception as e:
-            return {"detected_notes": "Error analyzing audio", "pitch_score": 0}
\ No newline at end of file
+            return {"detected_notes": "Error analyzing audio", "pitch_score": 0, "error": str(e)}
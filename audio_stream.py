@@ -0,0 +1,179 @@
+# audio_stream.py
+"""
+Block-wise audio input for long recordings: soundfile block reads, a block
+resampler with carried context and an on-the-fly pitch statistics accumulator.
+Nothing here holds more than one block of audio, so memory stays flat no
+matter how long the recording is.
+"""
+import io
+import math
+import numpy as np
+from lazy_import import lazy_import
+from raga_index import intonation_points
+
+sf = lazy_import("soundfile")
+signal = lazy_import("scipy.signal")
+
+ANALYSIS_SR = 22050
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+CENTS_BIN = 10 # Resolution of the running f0 histogram (used for the median)
+
+def iter_audio_blocks(source, block_seconds=10.0):
+    """
+    Yields (mono float32 block, native sample rate) from a path, file-like object or bytes.
+    Uses soundfile block reads, so only one block is decoded at a time.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        source = io.BytesIO(source)
+    with sf.SoundFile(source) as f:
+        block = max(1, int(block_seconds * f.samplerate))
+        for data in f.blocks(blocksize=block, dtype="float32", always_2d=True):
+            yield data.mean(axis=1) if data.shape[1] > 1 else data[:, 0], f.samplerate
+
+class BlockResampler:
+    """
+    Polyphase resampling (scipy.signal.resample_poly) applied block by block.
+    Each step keeps `ctx` input samples of context on both sides of the emitted
+    span and carries them into the next call, so the joined output matches a
+    one-shot resample_poly of the whole signal up to float rounding.
+    """
+    def __init__(self, sr_in, sr_out=ANALYSIS_SR):
+        g = math.gcd(int(sr_in), int(sr_out))
+        self.up, self.down = int(sr_out) // g, int(sr_in) // g
+        # resample_poly's filter spans ~10 * max(up, down) upsampled samples per side
+        reach = 10 * max(self.up, self.down) // self.up + 1
+        self.ctx = self.down * math.ceil(max(reach, 64) / self.down)
+        self._buf = np.zeros(self.ctx, dtype=np.float32)
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def _step(self, final=False):
+        usable = len(self._buf) - 2 * self.ctx
+        m = (usable // self.down) * self.down
+        if m <= 0:
+            return np.empty(0, dtype=np.float32)
+        seg = self._buf[:m + 2 * self.ctx]
+        if self.up == self.down:
+            out = seg[self.ctx:self.ctx + m]
+        else:
+            lo = self.ctx * self.up // self.down
+            out = signal.resample_poly(seg, self.up, self.down)[lo:lo + m * self.up // self.down]
+        self._buf = self._buf[m:].copy()
+        if final:
+            total = math.ceil(self._samples_in * self.up / self.down)
+            out = out[:max(0, total - self._samples_out)]
+        self._samples_out += len(out)
+        return out.astype(np.float32, copy=False)
+
+    def process(self, block):
+        """Feeds one input block; returns the resampled samples that are final so far."""
+        block = np.asarray(block, dtype=np.float32)
+        self._samples_in += len(block)
+        self._buf = np.concatenate([self._buf, block])
+        return self._step()
+
+    def flush(self):
+        """Zero-pads the end of the stream and returns the remaining output."""
+        pad = 2 * self.ctx + (-len(self._buf)) % self.down
+        self._buf = np.concatenate([self._buf, np.zeros(pad, dtype=np.float32)])
+        return self._step(final=True)
+
+def iter_resampled(source, sr_out=ANALYSIS_SR, block_seconds=10.0):
+    """Yields mono float32 blocks at `sr_out` from any source iter_audio_blocks accepts."""
+    resampler = None
+    for block, sr in iter_audio_blocks(source, block_seconds):
+        if resampler is None:
+            resampler = BlockResampler(sr, sr_out)
+        out = resampler.process(block)
+        if len(out):
+            yield out
+    if resampler is not None:
+        tail = resampler.flush()
+        if len(tail):
+            yield tail
+
+class PitchStats:
+    """
+    Running summary of an f0 track, fed one block of frames at a time.
+    Keeps fixed-size counters only: a MIDI note histogram, a 10-cent f0 histogram
+    (for the median), intonation error against the raga and the first notes heard.
+    """
+    def __init__(self, raga=None, root_midi=None, hop_seconds=512 / ANALYSIS_SR,
+                 tolerance_cents=50.0, max_notes=8, sample_every=10):
+        self.raga = raga
+        self.root_midi = root_midi
+        self.hop_seconds = hop_seconds
+        self.tolerance_cents = tolerance_cents
+        self.max_notes = max_notes
+        self.sample_every = sample_every
+
+        self.frames = 0
+        self.voiced = 0
+        self.note_hist = np.zeros(128, dtype=np.int64)
+        self.cents_hist = np.zeros(128 * 100 // CENTS_BIN, dtype=np.int64)
+        self.in_scale = 0
+        self.abs_cents_sum = 0.0
+        self.weighted_cents_sum = 0.0 # Same vadi / samvadi weighting as alignment.intonation_score
+        self.weight_sum = 0.0
+        self.first_notes = {} # Insertion-ordered, capped at max_notes
+
+    def update(self, f0):
+        """Adds one block of f0 values (NaN = unvoiced)."""
+        f0 = np.asarray(f0, dtype=np.float64)
+        self.frames += len(f0)
+        hz = f0[f0 > 0]
+        if not len(hz):
+            return
+        midi = np.clip(69.0 + 12.0 * np.log2(hz / 440.0), 0.0, 127.99)
+
+        # Note names sampled every Nth voiced frame (a full timed note list would grow with the take)
+        if len(self.first_notes) < self.max_notes:
+            offset = (-self.voiced) % self.sample_every
+            for m in np.rint(midi[offset::self.sample_every]).astype(np.int64):
+                name = f"{NOTE_NAMES[m % 12]}{m // 12 - 1}"
+                self.first_notes.setdefault(name, None)
+                if len(self.first_notes) >= self.max_notes:
+                    break
+        self.voiced += len(hz)
+
+        np.add.at(self.note_hist, np.clip(np.rint(midi).astype(np.int64), 0, 127), 1)
+        np.add.at(self.cents_hist, (midi * (100 // CENTS_BIN)).astype(np.int64), 1)
+        if self.raga is not None:
+            _, cents = self.raga.quantize_midi(midi, self.root_midi)
+            self.in_scale += int(np.count_nonzero(np.abs(cents) <= self.tolerance_cents))
+            self.abs_cents_sum += float(np.abs(cents).sum())
+            cents_sum, weight_sum = self.raga.weighted_cents(midi, self.root_midi)
+            self.weighted_cents_sum += cents_sum
+            self.weight_sum += weight_sum
+
+    def median_hz(self):
+        if not self.voiced:
+            return None
+        k = int(np.searchsorted(np.cumsum(self.cents_hist), (self.voiced + 1) // 2))
+        midi = (k + 0.5) * CENTS_BIN / 100.0
+        return float(440.0 * 2.0 ** ((midi - 69.0) / 12.0))
+
+    def summary(self, histogram=False):
+        """
+        Result dict in the same shape as AudioAnalyzer.analyze_singing, plus stream stats.
+        histogram=True adds the 128-bin voiced-frame count per MIDI note.
+        """
+        notes = " ".join(self.first_notes)
+        result = {
+            "detected_notes": notes if notes else "No clear voice detected",
+            "duration_s": round(self.frames * self.hop_seconds, 2),
+            "voiced_ratio": round(self.voiced / self.frames, 3) if self.frames else 0.0,
+            "f0_median_hz": self.median_hz(),
+            "top_notes": [f"{NOTE_NAMES[m % 12]}{m // 12 - 1}"
+                          for m in np.argsort(self.note_hist)[::-1][:5] if self.note_hist[m]],
+        }
+        if histogram:
+            result["note_histogram"] = self.note_hist.tolist()
+        if self.raga is not None:
+            mean_cents = self.abs_cents_sum / self.voiced if self.voiced else 50.0
+            # Scored exactly like analyze_singing's intonation_score
+            result["pitch_score"] = intonation_points(self.weighted_cents_sum / self.weight_sum) \
+                if self.weight_sum else 0
+            result["raga_match"] = round(100 * self.in_scale / self.voiced) if self.voiced else 0
+            result["mean_cents_error"] = round(mean_cents, 1)
+        return result
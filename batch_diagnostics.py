@@ -0,0 +1,284 @@
+# batch_diagnostics.py
+"""
+Batch singing diagnostics: scores a whole folder (or manifest) of recordings
+with AudioAnalyzer.analyze_stream across a process pool and writes one row per
+file to a columnar dataset (Parquet or Arrow IPC part files).
+
+    python batch_diagnostics.py submissions/ -o results/            # raga from the parent folder name
+    python batch_diagnostics.py manifest.csv -o results/ --workers 8
+    python batch_diagnostics.py submissions/ -o results/ --raga Bhairav --voice Female
+
+A manifest is a .csv or .jsonl file with a `path` column and optional `raga`
+and `voice_type` columns. Runs are resumable: files already analyzed
+successfully in the output directory are skipped (failed ones are retried), so
+rerunning after a crash picks up where it stopped. Read the results back with
+load_results(out_dir).
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from lazy_import import lazy_import
+from raga_knowledge import RAGA_DB
+
+pa = lazy_import("pyarrow")
+pq = lazy_import("pyarrow.parquet")
+feather = lazy_import("pyarrow.feather")
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".ogg", ".oga", ".aiff", ".aif", ".mp3")
+STAGES = ("decode", "resample", "pitch", "stats")
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+
+def result_schema():
+    return pa.schema([
+        ("path", pa.string()),
+        ("raga", pa.string()),
+        ("voice_type", pa.string()),
+        ("bytes", pa.int64()),
+        ("duration_s", pa.float64()),
+        ("voiced_ratio", pa.float64()),
+        ("f0_median_hz", pa.float64()),
+        ("mean_cents_error", pa.float64()),
+        ("pitch_score", pa.int32()),
+        ("raga_match", pa.int32()),
+        ("detected_notes", pa.string()),
+        ("top_notes", pa.list_(pa.string())),
+        ("note_histogram", pa.list_(pa.int32())),
+        ("error", pa.string()),
+    ] + [(f"{stage}_s", pa.float64()) for stage in STAGES] + [("total_s", pa.float64())])
+
+# 1. Job discovery
+def collect_jobs(source, raga=None, voice_type="Male"):
+    """
+    Returns a list of {"path", "raga", "voice_type"} jobs from a directory or manifest.
+    Without an explicit raga, a file's parent folder name is used when it is a known raga.
+    """
+    if os.path.isdir(source):
+        jobs = []
+        for root, _, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(AUDIO_EXTENSIONS):
+                    jobs.append({"path": os.path.join(root, name)})
+        base = None
+    else:
+        with open(source, newline="", encoding="utf-8") as f:
+            if source.endswith(".jsonl"):
+                jobs = [json.loads(line) for line in f if line.strip()]
+            else:
+                jobs = list(csv.DictReader(f))
+        base = os.path.dirname(os.path.abspath(source))
+
+    for job in jobs:
+        path = job["path"]
+        if base and not os.path.isabs(path):
+            path = os.path.join(base, path) # Manifest paths are relative to the manifest
+        folder = os.path.basename(os.path.dirname(path))
+        job["path"] = os.path.normpath(path)
+        job["raga"] = raga or job.get("raga") or (folder if folder in RAGA_DB else "Yaman")
+        job["voice_type"] = job.get("voice_type") or voice_type
+    return jobs
+
+# 2. Worker side
+_analyzers = {} # (hop_length, voicing_threshold) -> AudioAnalyzer, per worker process
+
+def _init_worker(max_worker_mb=None):
+    """Caps each worker's address space (POSIX only) so one bad file cannot take the host down."""
+    if max_worker_mb:
+        try:
+            import resource
+            limit = int(max_worker_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            pass
+
+def analyze_file(job, hop_length=512, voicing_threshold=0.1, block_seconds=10.0):
+    """Runs the streaming analysis for one job and returns its result row."""
+    from audio_analyzer import AudioAnalyzer
+    analyzer = _analyzers.get((hop_length, voicing_threshold))
+    if analyzer is None:
+        analyzer = _analyzers[(hop_length, voicing_threshold)] = AudioAnalyzer(
+            "yin", hop_length=hop_length, voicing_threshold=voicing_threshold)
+
+    timings = {}
+    start = time.perf_counter()
+    try:
+        size = os.path.getsize(job["path"])
+        result = analyzer.analyze_stream(job["path"], job["raga"], job["voice_type"],
+                                         block_seconds=block_seconds, timings=timings, histogram=True)
+    except OSError as e:
+        size, result = None, {"error": str(e)}
+    return result_row(job, size, result, timings, time.perf_counter() - start)
+
+def result_row(job, size, result, timings, total):
+    """One dataset row from an analyze_stream result (or an {"error": ...} dict)."""
+    row = {"path": job["path"], "raga": job["raga"], "voice_type": job["voice_type"], "bytes": size,
+           "error": result.get("error")}
+    for field in ("duration_s", "voiced_ratio", "f0_median_hz", "mean_cents_error", "pitch_score",
+                  "raga_match", "top_notes", "note_histogram"):
+        row[field] = result.get(field)
+    row["detected_notes"] = None if row["error"] else result.get("detected_notes")
+    for stage in STAGES:
+        row[f"{stage}_s"] = timings.get(stage, 0.0)
+    row["total_s"] = total
+    return row
+
+# 3. Output side
+def _part_files(out_dir, fmt):
+    if not os.path.isdir(out_dir):
+        return []
+    ext = FORMATS[fmt]
+    return sorted(os.path.join(out_dir, n) for n in os.listdir(out_dir)
+                  if n.startswith("part-") and n.endswith(ext))
+
+def _read_part(path, columns=None):
+    if path.endswith(".parquet"):
+        return pq.read_table(path, columns=columns)
+    return feather.read_table(path, columns=columns)
+
+def load_results(out_dir, fmt="parquet"):
+    """All result rows in `out_dir` as one pyarrow Table; a retried file keeps only its latest row."""
+    parts = [_read_part(p) for p in _part_files(out_dir, fmt)]
+    if not parts:
+        return result_schema().empty_table()
+    table = pa.concat_tables(parts)
+    latest = {path: i for i, path in enumerate(table.column("path").to_pylist())}
+    return table.take(sorted(latest.values())) if len(latest) < table.num_rows else table
+
+def completed_paths(out_dir, fmt="parquet"):
+    """Paths analyzed successfully by earlier (possibly interrupted) runs; failed rows do not count."""
+    done = set()
+    for part in _part_files(out_dir, fmt):
+        table = _read_part(part, columns=["path", "error"])
+        for path, error in zip(table.column("path").to_pylist(), table.column("error").to_pylist()):
+            if error is None:
+                done.add(path)
+    return done
+
+def write_part(rows, out_dir, index, fmt="parquet"):
+    """Writes one part file atomically; a crash mid-write never leaves a readable half file."""
+    table = pa.Table.from_pylist(rows, schema=result_schema())
+    final = os.path.join(out_dir, f"part-{index:05d}{FORMATS[fmt]}")
+    tmp = os.path.join(out_dir, f".part-{index:05d}.tmp")
+    if fmt == "parquet":
+        pq.write_table(table, tmp, compression="zstd")
+    else:
+        feather.write_feather(table, tmp, compression="zstd")
+    os.replace(tmp, final)
+    return final
+
+# 4. Driver
+def run_batch(jobs, out_dir, workers=None, fmt="parquet", flush_every=64, max_tasks_per_child=32,
+              max_worker_mb=None, hop_length=512, voicing_threshold=0.1, block_seconds=10.0, log=print):
+    """
+    Fans jobs out over a process pool and streams result rows into part files.
+    Workers are recycled every `max_tasks_per_child` files and at most 2 jobs per
+    worker are in flight, so memory stays bounded for any batch size. A worker that
+    dies (crash, OOM kill) fails only the files in flight, as error rows, and the
+    pool is restarted; buffered rows are flushed even if the run is interrupted.
+    Returns a report dict with throughput and per-stage timings.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    done = completed_paths(out_dir, fmt)
+    pending = [job for job in jobs if job["path"] not in done]
+    next_part = len(_part_files(out_dir, fmt))
+    workers = workers or os.cpu_count() or 1
+    log(f"{len(jobs)} files, {len(jobs) - len(pending)} already done, {len(pending)} to analyze "
+        f"on {workers} workers")
+
+    stage_totals = dict.fromkeys(STAGES + ("total",), 0.0)
+    buffer, processed, failed = [], 0, 0
+    start = time.perf_counter()
+    queue = iter(pending)
+
+    def new_pool():
+        return ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child,
+                                   initializer=_init_worker, initargs=(max_worker_mb,))
+
+    pool = new_pool()
+    in_flight = {} # future -> job
+    try:
+        while True:
+            while len(in_flight) < 2 * workers:
+                job = next(queue, None)
+                if job is None:
+                    break
+                in_flight[pool.submit(analyze_file, job, hop_length, voicing_threshold, block_seconds)] = job
+            if not in_flight:
+                break
+
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            broken = False
+            for future in finished:
+                job = in_flight.pop(future)
+                try:
+                    row = future.result()
+                except BrokenProcessPool as e:
+                    row = result_row(job, None, {"error": f"Worker crashed: {e}"}, {}, 0.0)
+                    broken = True
+                buffer.append(row)
+                processed += 1
+                failed += row["error"] is not None
+                for stage in STAGES:
+                    stage_totals[stage] += row[f"{stage}_s"]
+                stage_totals["total"] += row["total_s"]
+
+            if broken: # The remaining in-flight futures fail the same way; new jobs go to a fresh pool
+                log("  worker process died, restarting the pool")
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = new_pool()
+
+            if len(buffer) >= flush_every:
+                write_part(buffer, out_dir, next_part, fmt)
+                next_part += 1
+                buffer = []
+                rate = processed / (time.perf_counter() - start)
+                log(f"  {processed}/{len(pending)} files  ({rate:.2f} files/s)")
+    finally:
+        if buffer:
+            write_part(buffer, out_dir, next_part, fmt)
+        pool.shutdown(cancel_futures=True)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "files": processed,
+        "failed": failed,
+        "skipped": len(jobs) - len(pending),
+        "elapsed_s": round(elapsed, 3),
+        "files_per_s": round(processed / elapsed, 3) if elapsed > 0 else 0.0,
+        "stage_s": {k: round(v, 3) for k, v in stage_totals.items()},
+        "stage_ms_per_file": {k: round(1000 * v / processed, 1) if processed else 0.0
+                              for k, v in stage_totals.items()},
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch singing diagnostics to Parquet / Arrow.")
+    parser.add_argument("source", help="Directory of recordings or a .csv / .jsonl manifest")
+    parser.add_argument("-o", "--out", default="diagnostics_results", help="Output directory")
+    parser.add_argument("--format", choices=sorted(FORMATS), default="parquet")
+    parser.add_argument("--raga", help="Raga for every file (default: manifest column or folder name)")
+    parser.add_argument("--voice", default="Male", help="Default voice type")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--flush-every", type=int, default=64, help="Rows per part file")
+    parser.add_argument("--max-tasks-per-child", type=int, default=32, help="Recycle workers after N files")
+    parser.add_argument("--max-worker-mb", type=int, help="Address-space cap per worker (POSIX)")
+    parser.add_argument("--block-seconds", type=float, default=10.0, help="Streaming block length")
+    args = parser.parse_args(argv)
+
+    jobs = collect_jobs(args.source, args.raga, args.voice)
+    report = run_batch(jobs, args.out, workers=args.workers, fmt=args.format, flush_every=args.flush_every,
+                       max_tasks_per_child=args.max_tasks_per_child, max_worker_mb=args.max_worker_mb,
+                       block_seconds=args.block_seconds)
+
+    print(f"\n{report['files']} files in {report['elapsed_s']:.1f} s "
+          f"({report['files_per_s']:.2f} files/s), {report['failed']} failed, {report['skipped']} skipped")
+    print(f"{'STAGE':<10} {'TOTAL_S':>9} {'MS/FILE':>9}")
+    for stage, total in report["stage_s"].items():
+        print(f"{stage:<10} {total:>9.2f} {report['stage_ms_per_file'][stage]:>9.1f}")
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+# benchmarks/json_repair.py
+"""
+Repair success rate and parse time: the old regex clean-up + json.loads
+(composer._robust_parse / coach._parse_json before json_repair) vs
+json_repair.parse_llm_json, over the malformed-reply corpus in
+benchmarks/json_corpus.jsonl. A case passes when the result is a dict
+with every "required" field present and non-empty.
+
+    python -m benchmarks.json_repair [--repeat 200] [--corpus PATH] [-v]
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from json_repair import parse_llm_json
+
+CORPUS = os.path.join(os.path.dirname(__file__), "json_corpus.jsonl")
+
+def legacy_song_parse(raw_text):
+    """The composer's regex-based parser this module replaced."""
+    try:
+        match = re.search(r'\{.*\}', raw_text, re.DOTALL)
+        if not match:
+            return {"error": "No JSON structure found in AI response."}
+        json_str = re.sub(r',\s*([\]}])', r'\1', match.group(0))
+        json_str = re.sub(r'//.*', '', json_str)
+        return json.loads(json_str)
+    except json.JSONDecodeError as e:
+        return {"error": str(e)}
+
+def legacy_coach_parse(raw_text):
+    """The coach's regex-based parser this module replaced."""
+    try:
+        match = re.search(r'\{.*\}', raw_text, re.DOTALL)
+        if match:
+            return json.loads(re.sub(r',\s*([\]}])', r'\1', match.group(0)))
+        return {"error": "Coach output format error"}
+    except Exception:
+        return {"error": "Parsing failed"}
+
+def load_corpus(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def passes(result, required):
+    return isinstance(result, dict) and "error" not in result and all(result.get(k) for k in required)
+
+def run(parse_for, cases, repeat):
+    """Returns (passed case names, per-case mean parse time in µs)."""
+    passed, times = set(), []
+    for case in cases:
+        parse = parse_for(case["kind"])
+        if passes(parse(case["text"]), case["required"]):
+            passed.add(case["name"])
+        start = time.perf_counter()
+        for _ in range(repeat):
+            parse(case["text"])
+        times.append((time.perf_counter() - start) / repeat * 1e6)
+    return passed, times
+
+def scaling(repeat):
+    """Parse time vs reply size for a truncated reply, to show the repair pass stays linear."""
+    print("\nrepair time vs reply size (truncated, fenced, trailing commas):")
+    for lines in (10, 100, 1000, 10000):
+        song = {"melody_main": ["C4 D4 E4 F#4 G4 A4"] * lines, "lyrics": ["Tera chehra dikhe"] * lines}
+        text = "```json\n" + json.dumps(song, indent=2).replace('"\n', '",\n')
+        text = text[:len(text) * 9 // 10]
+        n = max(1, repeat // lines)
+        start = time.perf_counter()
+        for _ in range(n):
+            parse_llm_json(text)
+        elapsed = (time.perf_counter() - start) / n
+        print(f"  {len(text):>9} chars: {elapsed * 1e3:8.3f} ms ({len(text) / elapsed / 1e6:.1f} M chars/s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=CORPUS, help="JSONL of {name, kind, required, text}")
+    parser.add_argument("--repeat", type=int, default=200, help="Timing repetitions per case")
+    parser.add_argument("-v", "--verbose", action="store_true", help="List each case's result")
+    args = parser.parse_args(argv)
+
+    cases = load_corpus(args.corpus)
+    legacy = lambda kind: legacy_song_parse if kind == "song" else legacy_coach_parse
+    repaired = lambda kind: parse_llm_json
+    old_ok, old_times = run(legacy, cases, args.repeat)
+    new_ok, new_times = run(repaired, cases, args.repeat)
+
+    if args.verbose:
+        for case, t_old, t_new in zip(cases, old_times, new_times):
+            print(f"  {case['name']:<32} legacy {'ok  ' if case['name'] in old_ok else 'FAIL'} {t_old:7.1f} µs"
+                  f"   repair {'ok  ' if case['name'] in new_ok else 'FAIL'} {t_new:7.1f} µs")
+
+    n = len(cases)
+    for label, ok, times in (("legacy regex", old_ok, old_times), ("json_repair", new_ok, new_times)):
+        ordered = sorted(times)
+        print(f"{label:<13}: {len(ok)}/{n} repaired ({100 * len(ok) / n:.0f}%), "
+              f"mean {sum(times) / n:.1f} µs, max {ordered[-1]:.1f} µs per reply")
+    regressions = sorted(old_ok - new_ok)
+    if regressions:
+        print(f"regressions vs legacy: {', '.join(regressions)}")
+    scaling(args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/live_monitor.py
+"""
+Simulated live stream for the incremental pitch monitor: replays WAV files
+(or a synthetic glide through Yaman) in small chunks at real-time speed over
+an asyncio queue, and reports per-hop compute latency and end-to-end latency
+(chunk arrival -> reading emitted) percentiles.
+
+    python -m benchmarks.live_monitor                       # synthetic take
+    python -m benchmarks.live_monitor take.wav --raga Bhairav
+    python -m benchmarks.live_monitor take.wav --speed 0     # as fast as possible
+"""
+import argparse
+import asyncio
+import time
+import numpy as np
+
+from audio_stream import iter_resampled, ANALYSIS_SR
+from pitch_monitor import PitchMonitor
+from benchmarks.pitch_engines import synth_take
+
+def synthetic_take(seconds, sr=ANALYSIS_SR):
+    """Male-range phrase Sa Re Ga Ma# Pa with vibrato, 10 cents sharp, and a rest in the middle."""
+    steps = np.array([0, 2, 4, 6, 7, 7, 4, 0], dtype=np.float64)
+    t = np.arange(int(seconds * sr)) / sr
+    note = np.minimum((t / seconds * len(steps)).astype(int), len(steps) - 1)
+    midi = 48.0 + steps[note] + 0.1 + 0.25 * np.sin(2 * np.pi * 5.5 * t)
+    f0 = 440.0 * 2 ** ((midi - 69.0) / 12.0)
+    f0[(t > 0.45 * seconds) & (t < 0.5 * seconds)] = np.nan
+    return synth_take(f0, sr=sr)
+
+async def replay(y, sr, chunk, speed, queue):
+    """Producer: puts (chunk, arrival time) on the queue on a real-time schedule."""
+    start = time.perf_counter()
+    for i in range(0, len(y), chunk):
+        if speed > 0:
+            due = start + (i + chunk) / sr / speed
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+        await queue.put((y[i:i + chunk], time.perf_counter()))
+    await queue.put(None)
+
+async def consume(monitor, queue):
+    """Consumer: feeds the monitor, collecting compute and end-to-end latency per hop."""
+    compute, end_to_end, readings = [], [], []
+    while True:
+        item = await queue.get()
+        if item is None:
+            break
+        samples, arrived = item
+        for reading in monitor.push(samples):
+            compute.append(reading.latency_ms)
+            end_to_end.append(1000 * (time.perf_counter() - arrived))
+            readings.append(reading)
+    return np.array(compute), np.array(end_to_end), readings
+
+def percentiles(values):
+    return {p: float(np.percentile(values, p)) for p in (50, 90, 99)} | {"max": float(values.max())}
+
+async def run(y, sr, args):
+    monitor = PitchMonitor(args.raga, args.voice, sr=sr, hop_length=args.hop)
+    queue = asyncio.Queue()
+    _, (compute, end_to_end, readings) = await asyncio.gather(
+        replay(y, sr, args.chunk, args.speed, queue), consume(monitor, queue))
+    return monitor, compute, end_to_end, readings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", help="WAV/FLAC files to replay (default: synthetic take)")
+    parser.add_argument("--raga", default="Yaman")
+    parser.add_argument("--voice", default="Male")
+    parser.add_argument("--seconds", type=float, default=8.0, help="Length of the synthetic take")
+    parser.add_argument("--hop", type=int, default=256, help="Hop in samples at 22.05 kHz")
+    parser.add_argument("--chunk", type=int, default=256, help="Samples per simulated audio callback")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = real time, 0 = no pacing")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="Per-hop compute budget (p99)")
+    args = parser.parse_args(argv)
+
+    takes = [(path, np.concatenate(list(iter_resampled(path)))) for path in args.files]
+    if not takes:
+        takes = [("synthetic Yaman phrase", synthetic_take(args.seconds))]
+
+    worst_p99 = 0.0
+    for name, y in takes:
+        monitor, compute, end_to_end, readings = asyncio.run(run(y, ANALYSIS_SR, args))
+        voiced = [r for r in readings if r.f0 is not None]
+        c, e = percentiles(compute), percentiles(end_to_end)
+        worst_p99 = max(worst_p99, c[99])
+        print(f"{name}: {len(y) / ANALYSIS_SR:.1f} s, {len(readings)} hops "
+              f"({1000 * args.hop / ANALYSIS_SR:.1f} ms), frame {monitor.frame_length}, "
+              f"{len(voiced)} voiced")
+        print(f"  {'':<12} {'P50':>7} {'P90':>7} {'P99':>7} {'MAX':>7}  (ms)")
+        print(f"  {'compute':<12} {c[50]:>7.3f} {c[90]:>7.3f} {c[99]:>7.3f} {c['max']:>7.3f}")
+        print(f"  {'end-to-end':<12} {e[50]:>7.3f} {e[90]:>7.3f} {e[99]:>7.3f} {e['max']:>7.3f}")
+        if voiced:
+            cents = np.abs([r.cents for r in voiced])
+            swaras = " ".join(dict.fromkeys(r.swara for r in voiced))
+            print(f"  swaras heard: {swaras}   median |cent error| {np.median(cents):.1f}")
+
+    verdict = "PASS" if worst_p99 <= args.budget_ms else "FAIL"
+    print(f"\nworst p99 compute {worst_p99:.3f} ms (budget {args.budget_ms} ms) {verdict}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# benchmarks/load_test.py
+"""
+Offline end-to-end load test. Both pipelines run against the fake LLM backend
+(llm_clients LLM_BACKEND=fake), so no API quota is spent:
+
+    compose: BollywoodComposer.generate_full_song -> MusicEngine.generate_preview_wav
+    coach  : AudioAnalyzer.analyze_singing       -> SingingCoach.evaluate_performance
+
+Requests run on `--concurrency` threads. Reports throughput, latency
+percentiles and errors per stage, plus peak traced memory per stage call
+(measured in a separate single-request pass so stages do not overlap).
+
+    python -m benchmarks.load_test                                   # both pipelines
+    python -m benchmarks.load_test --pipeline compose --requests 200 --concurrency 16
+    python -m benchmarks.load_test --latency lognormal:0.4:0.6 --malformed 0.2 --broken 0.05 --slow 0.05
+"""
+import argparse
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from llm_clients import configure_llm_clients, get_llm
+from fake_llm import FAKE_BACKEND_SETTINGS, SAMPLE_SONG
+from raga_knowledge import RAGA_DB
+
+STAGES = {"compose": ("compose", "render"), "coach": ("analyze", "coach")}
+MOODS = ("Mechanical", "Dark", "Ethereal", "Aggressive")
+
+class Recorder:
+    """Per-stage latencies and error counts; with trace=True also peak traced memory per call."""
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.latency = {}
+        self.errors = {}
+        self.peak_mb = {}
+        self._lock = threading.Lock()
+
+    def run(self, stage, fn, *args, ok=lambda result: True):
+        if self.trace:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        try:
+            result = fn(*args)
+            failed = not ok(result)
+        except Exception as e:
+            result, failed = {"error": str(e)}, True
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latency.setdefault(stage, []).append(elapsed)
+            self.errors[stage] = self.errors.get(stage, 0) + failed
+            if self.trace:
+                self.peak_mb[stage] = max(self.peak_mb.get(stage, 0.0), tracemalloc.get_traced_memory()[1] / 2**20)
+        return None if failed else result
+
+class Pipelines:
+    def __init__(self, args):
+        from composer import BollywoodComposer
+        from coach import SingingCoach
+        from music_engine import MusicEngine
+        from audio_analyzer import AudioAnalyzer
+        self.composer = BollywoodComposer(use_cache=False)
+        self.coach = SingingCoach(use_cache=False)
+        self.engine = MusicEngine(use_cache=args.cache)
+        self.analyzer = AudioAnalyzer(args.engine, use_cache=args.cache)
+        self.ragas = list(RAGA_DB)
+        if args.take:
+            with open(args.take, "rb") as f:
+                self.take = f.read()
+            self.reference = None
+        else: # The sample song's own preview, so the alignment path has a reference to score against
+            self.take = MusicEngine(use_cache=False).generate_preview_wav(SAMPLE_SONG)
+            self.reference = SAMPLE_SONG["melody_main"]
+
+    def compose(self, i, rec):
+        raga, mood = self.ragas[i % len(self.ragas)], MOODS[i % len(MOODS)]
+        song = rec.run("compose", self.composer.generate_full_song, f"Load test song {i}", mood, raga, "Male",
+                       ok=lambda s: "error" not in s)
+        if song is not None:
+            rec.run("render", self.engine.generate_preview_wav, song, ok=bool)
+        return song is not None
+
+    def coach_take(self, i, rec):
+        analysis = rec.run("analyze", self.analyzer.analyze_singing, self.take, "Yaman", "Male", self.reference,
+                           ok=lambda a: a.get("pitch_score", 0) > 0)
+        if analysis is None:
+            return False
+        feedback = rec.run("coach", self.coach.evaluate_performance, "Yaman", "Male", self.reference,
+                           analysis.get("note_events") or analysis["detected_notes"], analysis["pitch_score"],
+                           analysis.get("alignment"), ok=lambda f: "error" not in f)
+        return feedback is not None
+
+def run_load(pipelines, kinds, requests, concurrency, rec):
+    """Runs `requests` pipeline runs (alternating kinds) on a thread pool; returns (wall s, end-to-end per kind)."""
+    end_to_end = {kind: [] for kind in kinds}
+    lock = threading.Lock()
+
+    def one(i):
+        kind = kinds[i % len(kinds)]
+        start = time.perf_counter()
+        ok = pipelines.compose(i, rec) if kind == "compose" else pipelines.coach_take(i, rec)
+        with lock:
+            end_to_end[kind].append((time.perf_counter() - start, ok))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests)))
+    return time.perf_counter() - start, end_to_end
+
+def percentiles(values):
+    values = np.asarray(values) * 1000
+    return [float(np.percentile(values, p)) for p in (50, 90, 99)] + [float(values.max())]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pipeline", choices=["compose", "coach", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=40, help="Pipeline runs in total")
+    parser.add_argument("--concurrency", type=int, default=8, help="Pipeline runs in flight")
+    parser.add_argument("--latency", default="lognormal:0.3:0.5",
+                        help="Fake time to first token: seconds or fixed:S / uniform:LO:HI / "
+                             "lognormal:MEDIAN:SIGMA / pareto:MIN:ALPHA")
+    parser.add_argument("--tps", type=float, default=200.0, help="Fake tokens per second (0 = instant)")
+    parser.add_argument("--malformed", type=float, default=0.1, help="Share of repairable malformed replies")
+    parser.add_argument("--broken", type=float, default=0.0, help="Share of unrecoverable replies")
+    parser.add_argument("--slow", type=float, default=0.0, help="Share of slow replies")
+    parser.add_argument("--slow-factor", type=float, default=5.0, help="How much slower a slow reply is")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--engine", default="yin", help="Pitch engine for analyze_singing")
+    parser.add_argument("--take", help="WAV to analyze (default: the sample song's preview)")
+    parser.add_argument("--cache", action="store_true", help="Keep render / feature caches on")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the traced-memory pass")
+    args = parser.parse_args(argv)
+
+    FAKE_BACKEND_SETTINGS.update(tokens_per_second=args.tps, first_token_latency=args.latency,
+                                 malformed_rate=args.malformed, broken_rate=args.broken,
+                                 slow_rate=args.slow, slow_factor=args.slow_factor, seed=args.seed)
+    configure_llm_clients(backend="fake")
+    kinds = ["compose", "coach"] if args.pipeline == "both" else [args.pipeline]
+    pipelines = Pipelines(args)
+
+    # 1. Memory: one sequential run per pipeline under tracemalloc, after a warm-up
+    # run so first-use imports and caches are not charged to a stage
+    memory = None
+    if not args.no_memory:
+        run_load(pipelines, kinds, len(kinds), 1, Recorder())
+        memory = Recorder(trace=True)
+        tracemalloc.start()
+        run_load(pipelines, kinds, len(kinds), 1, memory)
+        tracemalloc.stop()
+
+    # 2. Load run
+    rec = Recorder()
+    wall, end_to_end = run_load(pipelines, kinds, args.requests, args.concurrency, rec)
+
+    print(f"{args.requests} runs ({'/'.join(kinds)}) at concurrency {args.concurrency} in {wall:.2f} s "
+          f"-> {args.requests / wall:.2f} runs/s")
+    print(f"{'STAGE':<16} {'N':>5} {'ERR':>4} {'P50_MS':>8} {'P90_MS':>8} {'P99_MS':>8} {'MAX_MS':>8} "
+          f"{'RUNS/S':>7} {'PEAK_MB':>8}")
+    rows = [(stage, rec.latency.get(stage, []), rec.errors.get(stage, 0)) for kind in kinds for stage in STAGES[kind]]
+    rows += [(f"{kind} (e2e)", [t for t, _ in end_to_end[kind]], sum(not ok for _, ok in end_to_end[kind]))
+             for kind in kinds]
+    for stage, values, errors in rows:
+        if not values:
+            print(f"{stage:<16} {0:>5}")
+            continue
+        p50, p90, p99, worst = percentiles(values)
+        peak = memory.peak_mb.get(stage) if memory else None
+        print(f"{stage:<16} {len(values):>5} {errors:>4} {p50:>8.1f} {p90:>8.1f} {p99:>8.1f} {worst:>8.1f} "
+              f"{len(values) / wall:>7.2f} {'' if peak is None else f'{peak:.1f}':>8}")
+
+    counts = {}
+    for temperature in (0.5, 0.3): # Composer / coach clients
+        for kind, n in get_llm(temperature).counts.items():
+            counts[kind] = counts.get(kind, 0) + n
+    print(f"fake replies: {counts}")
+    print(f"max RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    return 1 if any(errors for _, _, errors in rows) and not args.broken else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
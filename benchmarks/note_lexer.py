@@ -0,0 +1,101 @@
+# benchmarks/note_lexer.py
+"""
+Micro-benchmark: compiled single-pass note lexer vs the original per-token
+sanitizer + music21 validation.
+
+    python -m benchmarks.note_lexer [--lines 400] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import timeit
+
+from note_utils import lex_notes, sanitize_notes, validate_stream_compatibility
+
+# --- Original implementation, kept here as the baseline ---------------------
+def _legacy_sargam_to_western(token):
+    map_rules = {'sa': 'C', 're': 'D', 'ga': 'E', 'ma': 'F', 'pa': 'G', 'dha': 'A', 'ni': 'B', 'sa.': 'C'}
+    token_lower = token.lower()
+    for sargam, western in map_rules.items():
+        if token_lower.startswith(sargam):
+            octave = re.findall(r'\d+', token)
+            return f"{western}{octave[0] if octave else '4'}"
+    return token
+
+def _legacy_sanitize_notes(raw_llm_output):
+    if not raw_llm_output:
+        return []
+    tokens = raw_llm_output.replace(',', ' ').replace('\n', ' ').split()
+    western_pattern = re.compile(r"^[A-G][#\-]?[0-9]?$")
+    valid_notes = []
+    for token in tokens:
+        translated = _legacy_sargam_to_western(token.strip(".,;:\"'").replace("’", ""))
+        if western_pattern.match(translated):
+            valid_notes.append(translated)
+    return valid_notes
+
+def _legacy_validate(note_list):
+    import music21
+    playable = []
+    for n in note_list:
+        try:
+            music21.note.Note(n)
+            playable.append(n)
+        except Exception:
+            continue
+    return playable
+# ---------------------------------------------------------------------------
+
+def make_corpus(lines, seed=7):
+    """LLM-style melody lines: Western notes, Sargam syllables, punctuation and noise."""
+    rng = random.Random(seed)
+    vocab = ["C4", "D4", "E4", "F#4", "G4", "A4", "B4", "C5", "E-4", "D#3", "D", "G", "E",
+             "Sa", "Re4", "Ga", "Ma", "Pa", "Dha", "Ni3", "Sa5", "(hold)", "~", "Line"]
+    out = []
+    for _ in range(lines):
+        tokens = [rng.choice(vocab) for _ in range(rng.randint(6, 14))]
+        out.append(", ".join(tokens) + rng.choice(["", ".", ";", " ..."]))
+    return "\n".join(out)
+
+# Sargam-shaped strings the legacy sanitizer could not read: single letters are swaras here
+SARGAM_CASES = [
+    ("N_ R G M# D N S", ["B3", "D4", "E4", "F#4", "A4", "B4", "C4"]),
+    ("S^ N D P M# G R S", ["C5", "B4", "A4", "G4", "F#4", "E4", "D4", "C4"]),
+    ("S, r, G, m, P, d, N, S^", ["C4", "D-4", "E4", "F4", "G4", "A-4", "B4", "C5"]),
+    ("G M P D", ["E4", "F4", "G4", "A4"]),
+    ("D_ N_ S R", ["A3", "B3", "C4", "D4"]),
+    ("D G", ["D", "G"]),  # No swara-only token: stays Western
+]
+
+def bench(fn, text, repeat):
+    return min(timeit.repeat(lambda: fn(text), number=1, repeat=repeat))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    text = make_corpus(args.lines)
+    legacy = _legacy_sanitize_notes(text)
+    assert sanitize_notes(text) == legacy, "lexer output diverged from the legacy sanitizer"
+    for sargam, expected in SARGAM_CASES:
+        assert sanitize_notes(sargam) == expected, f"{sargam!r} -> {sanitize_notes(sargam)}"
+    print(f"corpus: {args.lines} lines, {len(legacy)} notes; {len(SARGAM_CASES)} sargam cases ok")
+
+    t_old = bench(_legacy_sanitize_notes, text, args.repeat)
+    t_new = bench(lex_notes, text, args.repeat)
+    print(f"parse     legacy {t_old * 1e3:8.2f} ms   lexer {t_new * 1e3:8.2f} ms   x{t_old / t_new:5.1f}")
+    swaras = "\n".join(text for text, _ in SARGAM_CASES[:-1]) * (args.lines // 5)
+    t_sargam = bench(lex_notes, swaras, args.repeat)
+    print(f"sargam    lexer  {t_sargam * 1e3:8.2f} ms   ({len(lex_notes(swaras))} notes)")
+
+    t_val = bench(validate_stream_compatibility, legacy, args.repeat)
+    try:
+        t_m21 = bench(_legacy_validate, legacy, args.repeat)
+        print(f"validate  music21 {t_m21 * 1e3:7.2f} ms   table {t_val * 1e3:8.2f} ms   x{t_m21 / t_val:5.1f}")
+    except ImportError:
+        print(f"validate  table {t_val * 1e3:8.2f} ms   (music21 not installed, no baseline)")
+
+if __name__ == "__main__":
+    main()
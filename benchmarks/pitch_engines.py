@@ -0,0 +1,93 @@
+# benchmarks/pitch_engines.py
+"""
+Accuracy / throughput check of the vectorized YIN engine against librosa.pyin
+on a synthetic test set (harmonic tones with vibrato, glides, noise and silence).
+
+    python -m benchmarks.pitch_engines [--seconds 4] [--tolerance-cents 25]
+"""
+import argparse
+import time
+import numpy as np
+
+from pitch_tracking import yin
+
+SR = 22050
+
+def synth_take(f0_track, sr=SR, harmonics=6, noise=0.01, seed=0):
+    """Voice-like test tone following a per-sample f0 track (NaN = silence)."""
+    rng = np.random.default_rng(seed)
+    voiced = ~np.isnan(f0_track)
+    phase = 2 * np.pi * np.cumsum(np.where(voiced, f0_track, 0.0)) / sr
+    y = sum(np.sin(k * phase) / k for k in range(1, harmonics + 1))
+    y = 0.3 * y * voiced
+    return (y + noise * rng.standard_normal(len(y))).astype(np.float32)
+
+def test_set(seconds, sr=SR):
+    """(name, f0 per sample) cases covering the C2-C6 singing range."""
+    t = np.arange(int(seconds * sr)) / sr
+    cases = []
+    for hz in (98.0, 196.0, 293.7, 440.0, 659.3):
+        cases.append((f"steady {hz:.0f} Hz + vibrato", hz * 2 ** (0.3 * np.sin(2 * np.pi * 5.5 * t) / 12)))
+    cases.append(("glide 130 -> 520 Hz", 130.0 * 2 ** (2 * t / seconds)))
+    gated = 220.0 * np.ones_like(t)
+    gated[(t % 1.0) > 0.6] = np.nan
+    cases.append(("220 Hz with rests", gated))
+    return cases
+
+def frame_truth(f0_track, n_frames, hop):
+    idx = np.minimum(np.arange(n_frames) * hop, len(f0_track) - 1)
+    return f0_track[idx]
+
+def cents(a, b):
+    return 1200 * np.abs(np.log2(a / b))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=4.0)
+    parser.add_argument("--hop", type=int, default=512)
+    parser.add_argument("--threshold", type=float, default=0.1)
+    parser.add_argument("--tolerance-cents", type=float, default=25.0)
+    args = parser.parse_args(argv)
+
+    try:
+        import librosa
+    except ImportError:
+        librosa = None
+        print("librosa not installed: comparing YIN against ground truth only\n")
+
+    total_audio = t_yin = t_pyin = 0.0
+    print(f"{'CASE':<28} {'YIN_ERR':>8} {'PYIN_ERR':>9} {'YIN~PYIN':>9}  (median cents on voiced frames)")
+    worst = 0.0
+    for i, (name, track) in enumerate(test_set(args.seconds)):
+        y = synth_take(track, seed=i)
+        total_audio += len(y) / SR
+
+        start = time.perf_counter()
+        f0_y, _, _ = yin(y, SR, hop_length=args.hop, threshold=args.threshold)
+        t_yin += time.perf_counter() - start
+        truth = frame_truth(track, len(f0_y), args.hop)
+        ok = ~np.isnan(truth) & ~np.isnan(f0_y)
+        yin_err = np.median(cents(f0_y[ok], truth[ok])) if ok.any() else np.nan
+
+        pyin_err = agree = np.nan
+        if librosa is not None:
+            start = time.perf_counter()
+            f0_p, _, _ = librosa.pyin(y, fmin=librosa.note_to_hz('C2'), fmax=librosa.note_to_hz('C6'),
+                                      sr=SR, hop_length=args.hop)
+            t_pyin += time.perf_counter() - start
+            okp = ~np.isnan(truth) & ~np.isnan(f0_p)
+            pyin_err = np.median(cents(f0_p[okp], truth[okp])) if okp.any() else np.nan
+            both = ~np.isnan(f0_p) & ~np.isnan(f0_y)
+            agree = np.median(cents(f0_y[both], f0_p[both])) if both.any() else np.nan
+            worst = max(worst, agree)
+        print(f"{name:<28} {yin_err:>8.2f} {pyin_err:>9.2f} {agree:>9.2f}")
+
+    print(f"\naudio: {total_audio:.1f} s")
+    print(f"yin : {t_yin:.3f} s  ({total_audio / t_yin:,.0f}x real time)")
+    if librosa is not None:
+        print(f"pyin: {t_pyin:.3f} s  ({total_audio / t_pyin:,.0f}x real time)  -> yin speedup x{t_pyin / t_yin:.1f}")
+        verdict = "PASS" if worst <= args.tolerance_cents else "FAIL"
+        print(f"yin vs pyin worst median deviation {worst:.2f} cents (tolerance {args.tolerance_cents}) {verdict}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/streaming_composer.py
+"""
+Time-to-first-audio: blocking generate_full_song + generate_preview_wav vs the
+streaming composer, which renders each melody line as soon as it is complete.
+Runs against the local fake model, so it needs no network or API key.
+
+    python -m benchmarks.streaming_composer [--tps 50] [--first-token 0.3]
+"""
+import argparse
+import time
+
+from composer import BollywoodComposer
+from fake_llm import FakeChatModel
+from music_engine import MusicEngine
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tps", type=float, default=50.0, help="Fake model tokens per second")
+    parser.add_argument("--first-token", type=float, default=0.3, help="Fake time to first token (s)")
+    args = parser.parse_args(argv)
+
+    fake = dict(tokens_per_second=args.tps, first_token_latency=args.first_token)
+    engine = MusicEngine(use_cache=False)
+    args_song = ("Moonlit longing", "Romantic", "Yaman", "Male")
+
+    # 1. Blocking: full completion, then parse, then render
+    composer = BollywoodComposer(use_cache=False, llm=FakeChatModel(**fake))
+    start = time.perf_counter()
+    song = composer.generate_full_song(*args_song)
+    wav = engine.generate_preview_wav(song)
+    blocking = time.perf_counter() - start
+    print(f"blocking : first audio after {blocking:.3f} s ({len(wav or b'')} bytes)")
+
+    # 2. Streaming: audio for line one as soon as it is complete
+    composer = BollywoodComposer(use_cache=False, llm=FakeChatModel(**fake))
+    start = time.perf_counter()
+    first_audio = None
+    lines = 0
+    for event in composer.stream_full_song(*args_song, engine=engine):
+        if event["type"] == "melody" and event["audio"] and first_audio is None:
+            first_audio = time.perf_counter() - start
+        lines += event["type"] in ("melody", "lyrics")
+    done = time.perf_counter() - start
+    ok = "error" not in event["song"]
+    print(f"streaming: first audio after {first_audio:.3f} s, complete after {done:.3f} s "
+          f"({lines} lines streamed, parse {'ok' if ok else 'FAILED'})")
+    print(f"time-to-first-audio speedup x{blocking / first_audio:.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,57 @@
 # coach.py
-import json
-import os
-import re
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from prompt import COACH_SYSTEM_PROMPT
+from lazy_import import lazy_import
+from llm_clients import get_llm
+from llm_cache import get_llm_cache, llm_cache_enabled, cached_invoke
+from alignment import note_feedback
+from note_segmentation import format_events
+from json_repair import parse_llm_json
+
+prompts = lazy_import("langchain_core.prompts")
 
 class SingingCoach:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY missing")
-            
-        self.llm = ChatGroq(
-            temperature=0.3, # Lower temperature for stricter grading
-            model_name="llama-3.1-8b-instant",
-            api_key=api_key
-        )
+    def __init__(self, use_cache=None, llm=None):
+        """
+        use_cache: reuse stored feedback for identical analysis inputs (default: LLM_CACHE=1 env)
+        llm      : chat model to use instead of the shared client (e.g. fake_llm for load tests)
+        """
+        # Shared pooled client; raises ValueError if GROQ_API_KEY is missing
+        self.llm = llm or get_llm(temperature=0.3) # Lower temperature for stricter grading
+        self.cache = get_llm_cache() if (llm_cache_enabled() if use_cache is None else use_cache) else None
 
-    def evaluate_performance(self, raga_name, voice_type, reference_notes, detected_notes, pitch_score):
-        prompt = ChatPromptTemplate.from_template(COACH_SYSTEM_PROMPT)
-        chain = prompt | self.llm
+    def evaluate_performance(self, raga_name, voice_type, reference_notes, detected_notes, pitch_score,
+                             alignment=None, fresh=False):
+        """
+        reference_notes : melody the singer was asked to sing (text or list), or None
+        detected_notes  : note summary text, or analyze_singing's timed "note_events" list
+        alignment       : analyze_singing's "alignment" result, summarized for the LLM
+        fresh           : bypass the response cache and ask for a new sample
+        """
+        prompt = prompts.ChatPromptTemplate.from_template(COACH_SYSTEM_PROMPT)
         
         # Convert numeric pitch score to text context
         accuracy_context = f"{pitch_score}% (Based on Signal Analysis)"
+        if isinstance(detected_notes, list):
+            detected_notes = format_events(detected_notes) or "No clear voice detected"
+        if isinstance(reference_notes, (list, tuple)):
+            reference_notes = " ".join(str(n) for n in reference_notes)
+        if alignment:
+            accuracy_context = (f"{pitch_score}% (DTW alignment to reference: pitch {alignment['pitch_score']}%, "
+                                f"timing {alignment['timing_score']}%)")
         
         try:
-            response = chain.invoke({
+            feedback, _, _ = cached_invoke(prompt, self.llm, {
                 "input_type": "Singing Performance Analysis",
                 "raga_name": raga_name,
                 "voice_type": voice_type,
                 "detected_notes": detected_notes,
-                "pitch_accuracy": accuracy_context
-            })
-            return self._parse_json(response.content)
+                "pitch_accuracy": accuracy_context,
+                "reference_notes": reference_notes or "Not provided",
+                "note_feedback": note_feedback(alignment) if alignment else "No reference alignment"
+            }, self._parse_json, self.cache, fresh)
+            return feedback
         except Exception as e:
             return {"error": str(e)}
 
     def _parse_json(self, raw_text):
-        try:
-            match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-            if match:
-                clean_json = match.group(0)
-                clean_json = re.sub(r',\s*([\]}])', r'\1', clean_json)
-                return json.loads(clean_json)
-            return {"error": "Coach output format error"}
-        except:
-            return {"error": "Parsing failed"}
\ No newline at end of file
+        return parse_llm_json(raw_text, error="Coach output format error")
\ No newline at end of file
@@ -1,59 +1,103 @@
-import json
-import os
-import re
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from prompt import get_composer_prompt
+from note_utils import note_to_midi
+from raga_index import get_raga_index, melody_midi, voice_root_midi
+from lazy_import import lazy_import
+from llm_clients import get_llm
+from llm_cache import get_llm_cache, llm_cache_enabled, cached_invoke, response_key
+from json_stream import IncrementalJSONParser
+from json_repair import parse_llm_json
+
+prompts = lazy_import("langchain_core.prompts")
 
 class BollywoodComposer:
-    def __init__(self):
-        api_key = os.getenv("GROQ_API_KEY")
-        if not api_key:
-            raise ValueError("GROQ_API_KEY is missing. Please check your .env file.")
-            
-        self.llm = ChatGroq(
-            temperature=0.5, # Lowered temperature for more stable JSON
-            model_name="llama-3.1-8b-instant",
-            api_key=api_key
-        )
+    def __init__(self, use_cache=None, llm=None):
+        """
+        use_cache: reuse stored replies for identical prompts (default: LLM_CACHE=1 env)
+        llm      : chat model to use instead of the shared Groq client (e.g. fake_llm for tests)
+        """
+        # Shared pooled client; raises ValueError if GROQ_API_KEY is missing
+        self.llm = llm or get_llm(temperature=0.5) # Lowered temperature for more stable JSON
+        self.cache = get_llm_cache() if (llm_cache_enabled() if use_cache is None else use_cache) else None
 
-    def generate_full_song(self, user_input, mood, raga, voice):
+    def generate_full_song(self, user_input, mood, raga, voice, fresh=False):
+        """fresh=True asks the model for a new sample even if this request is cached."""
         prompt_text = get_composer_prompt(user_input, mood, raga, voice)
-        prompt = ChatPromptTemplate.from_template(prompt_text)
-        chain = prompt | self.llm
+        prompt = prompts.ChatPromptTemplate.from_template(prompt_text)
         
         try:
-            response = chain.invoke({})
-            return self._robust_parse(response.content)
+            song, _, _ = cached_invoke(prompt, self.llm, {}, self._robust_parse, self.cache, fresh)
+            if "error" not in song:
+                song["raga_check"] = self._raga_check(song, raga, voice)
+            return song
             
         except Exception as e:
             return {"error": f"Critical Failure: {str(e)}"}
 
-    def _robust_parse(self, raw_text):
+    def stream_full_song(self, user_input, mood, raga, voice, engine=None, fresh=False):
         """
-        Attempts to clean and repair the JSON output from the AI.
+        Streaming variant of generate_full_song. Yields events as the reply arrives:
+            {"type": "lyrics", "index": i, "text": line}
+            {"type": "melody", "index": i, "notes": line, "audio": wav bytes or None}
+            {"type": "song", "song": song_json}   (last; same dict generate_full_song returns)
+        With a MusicEngine, each melody line is rendered the moment it completes, so
+        playback of line one can start while later lines are still being generated.
         """
+        prompt_text = get_composer_prompt(user_input, mood, raga, voice)
+        prompt = prompts.ChatPromptTemplate.from_template(prompt_text)
+
+        def line_event(field, index, value):
+            if field == "lyrics":
+                return {"type": "lyrics", "index": index, "text": value}
+            audio = engine.render_line_wav(value) if engine is not None else None
+            return {"type": "melody", "index": index, "notes": value, "audio": audio}
+
         try:
-            # 1. Extract JSON block (between first { and last })
-            match = re.search(r'\{.*\}', raw_text, re.DOTALL)
-            if not match:
-                return {"error": "No JSON structure found in AI response."}
-            
-            json_str = match.group(0)
+            # A cached reply is replayed line by line without touching the network
+            key = None
+            if self.cache is not None:
+                model = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", "")
+                temperature = getattr(self.llm, "temperature", 0.0) or 0.0
+                key = response_key(prompt.format(), model, temperature)
+                hit = None if fresh else self.cache.get(key)
+                if hit is not None and hit[1] is not None:
+                    song = hit[1]
+                    for field in ("lyrics", "melody_main"):
+                        for i, value in enumerate(song.get(field, [])):
+                            yield line_event(field, i, value)
+                    song["raga_check"] = self._raga_check(song, raga, voice)
+                    yield {"type": "song", "song": song}
+                    return
 
-            # 2. REPAIR: Remove trailing commas (common AI error)
-            # Regex finds a comma followed immediately by } or ]
-            json_str = re.sub(r',\s*([\]}])', r'\1', json_str)
-            
-            # 3. REPAIR: Remove comments (// or #)
-            json_str = re.sub(r'//.*', '', json_str)
-            
-            # 4. Attempt Parse
-            return json.loads(json_str)
-
-        except json.JSONDecodeError as e:
-            # Fallback: Return the raw string for debugging
-            print(f"FAILED JSON: {raw_text}") 
-            return {
-                "error": f"JSON Parsing Failed. Try again. (Details: {str(e)})"
-            }
\ No newline at end of file
+            parser = IncrementalJSONParser(watch=("lyrics", "melody_main"))
+            for chunk in self.llm.stream(prompt.format_messages()):
+                for field, index, value in parser.feed(chunk.content or ""):
+                    yield line_event(field, index, value)
+
+            raw = parser.buffer()
+            song = self._robust_parse(raw)
+            if "error" not in song:
+                if key is not None:
+                    self.cache.put(key, raw, song, model=model, temperature=temperature)
+                song["raga_check"] = self._raga_check(song, raga, voice)
+            yield {"type": "song", "song": song}
+
+        except Exception as e:
+            yield {"type": "song", "song": {"error": f"Critical Failure: {str(e)}"}}
+
+    def _raga_check(self, song, raga, voice):
+        """Scores melody_main against the raga's allowed swaras and aroha/avaroha moves."""
+        raw_melody = song.get("melody_main", [])
+        if isinstance(raw_melody, list): raw_melody = " ".join(map(str, raw_melody))
+        # Sa is the song's root_note (the voice root the prompt asked for); swaras are read above it
+        root_midi = note_to_midi(str(song.get("root_note", ""))) or voice_root_midi(voice)
+        return get_raga_index(raga).conformance(melody_midi(raw_melody, root_midi), root_midi)
+
+    def _robust_parse(self, raw_text):
+        """
+        Repairs and parses the JSON output from the AI (see json_repair).
+        """
+        song = parse_llm_json(raw_text, error="JSON Parsing Failed. Try again.")
+        if "error" in song:
+            # Fallback: Print the raw string for debugging
+            print(f"FAILED JSON: {raw_text}")
+        return song
\ No newline at end of file
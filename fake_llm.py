@@ -0,0 +1,194 @@
+# fake_llm.py
+"""
+Local stand-in for the Groq chat model: deterministic canned replies streamed
+at a fixed token rate. Lets the composer / coach (and their streaming paths)
+run in tests and benchmarks without network access or an API key.
+
+    composer = BollywoodComposer(llm=FakeChatModel([SAMPLE_SONG_REPLY]))
+    LLM_BACKEND=fake streamlit run app.py      # every get_llm() client is a fake
+
+Without explicit responses the reply is chosen from the prompt (coach prompts
+get SAMPLE_FEEDBACK, everything else SAMPLE_SONG). malformed_rate / broken_rate
+/ slow_rate turn a share of the calls into repairable, unrecoverable or slow
+replies, and latencies can be drawn from a distribution (see latency()).
+Call n of a given model / temperature always behaves the same for a given
+seed, however calls interleave.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+SAMPLE_SONG = {
+    "raga": "Yaman",
+    "root_note": "C3",
+    "alaap": ["N_ R G M# D N S^", "S^ N D P M# G R S"],
+    "melody_main": ["C4 D4 E4 F#4 G4 A4", "B4 C5 B4 A4 G4 F#4", "E4 F#4 G4 A4 B4 A4", "G4 F#4 E4 D4 C4 C4"],
+    "lyrics": ["Chaand ki roshni mein", "Tera chehra dikhe", "Dil ki har dhadkan", "Tujhko hi pukaare"],
+    "meta_emotion": "Romantic",
+}
+SAMPLE_SONG_REPLY = json.dumps(SAMPLE_SONG, indent=2)
+
+SAMPLE_FEEDBACK = {
+    "performance_score": {"pitch_accuracy": "72%", "rhythm_accuracy": "80%",
+                          "swara_correctness": "65%", "emotion_match": "70%"},
+    "mistakes": ["Ga was flat in the second phrase", "Rushed the Pa"],
+    "corrections": ["Hold Ga against the tanpura", "Count four beats on Pa"],
+    "practice_exercise": {"drill": "Sa Re Ga Re Sa slowly", "repetitions": "5 times"},
+    "guru_comment": "Bahut accha beta, bas Ga pe dhyan do!",
+}
+SAMPLE_FEEDBACK_REPLY = json.dumps(SAMPLE_FEEDBACK, indent=2)
+
+def malformed(reply, rng):
+    """A copy of `reply` with mistakes json_repair is expected to fix."""
+    damage = rng.choice(("fence", "prose", "trailing_comma", "single_quotes", "truncated"))
+    if damage == "fence":
+        return "```json\n" + reply + "\n```"
+    if damage == "prose":
+        return "Sure! Here you go:\n" + reply + "\nHope this helps."
+    if damage == "trailing_comma":
+        return reply.replace('"\n', '",\n')
+    if damage == "single_quotes":
+        return reply.replace('"', "'")
+    return reply[:int(len(reply) * 0.9)] # Cut off mid-reply, as when max_tokens is hit
+
+BROKEN_REPLY = "I'm sorry, I can't produce JSON for that request right now."
+
+# Latency distributions: callables rng -> seconds
+def latency(spec):
+    """
+    Parses a latency spec: a number (fixed seconds) or "fixed:S", "uniform:LO:HI",
+    "lognormal:MEDIAN:SIGMA", "pareto:MIN:ALPHA" (heavy tail). Callables pass through.
+    """
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        return lambda rng: float(spec)
+    kind, *params = str(spec).split(":")
+    if not params: # Plain seconds, e.g. "0.2" from the command line
+        return latency(float(kind))
+    params = [float(p) for p in params]
+    if kind == "fixed":
+        return lambda rng: params[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1])
+    if kind == "lognormal":
+        median, sigma = params
+        return lambda rng: median * rng.lognormvariate(0.0, sigma)
+    if kind == "pareto":
+        low, alpha = params
+        return lambda rng: low * rng.paretovariate(alpha)
+    raise ValueError(f"Unknown latency distribution '{kind}'")
+
+def prompt_text(messages):
+    """Plain text of whatever a LangChain pipe hands the model (PromptValue, messages or str)."""
+    if hasattr(messages, "to_string"):
+        return messages.to_string()
+    if isinstance(messages, (list, tuple)):
+        return "\n".join(str(getattr(m, "content", m)) for m in messages)
+    return str(messages or "")
+
+def default_reply(text):
+    return SAMPLE_FEEDBACK_REPLY if "performance_score" in text else SAMPLE_SONG_REPLY
+
+class FakeMessage:
+    """Minimal AIMessage / AIMessageChunk stand-in: only .content is used by the app."""
+    __slots__ = ("content",)
+
+    def __init__(self, content):
+        self.content = content
+
+class FakeChatModel:
+    """
+    Cycles through `responses` (or picks one from the prompt when None), streaming
+    each in `chunk_chars`-sized tokens.
+    first_token_latency (seconds or a latency() spec) and tokens_per_second set the
+    simulated timing (0 = instant); slow calls take `slow_factor` times longer.
+    Callable, so `prompt | FakeChatModel(...)` works as a LangChain runnable too.
+    """
+    def __init__(self, responses=None, tokens_per_second=50.0, chunk_chars=4,
+                 first_token_latency=0.2, model_name="fake-llm", temperature=0.0,
+                 malformed_rate=0.0, broken_rate=0.0, slow_rate=0.0, slow_factor=10.0, seed=0):
+        self.responses = list(responses) if responses else None
+        self.tokens_per_second = tokens_per_second
+        self.chunk_chars = chunk_chars
+        self.first_token_latency = latency(first_token_latency)
+        self.model_name = model_name
+        self.temperature = temperature
+        self.malformed_rate = malformed_rate
+        self.broken_rate = broken_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.seed = seed
+        self.calls = 0
+        self.counts = {"valid": 0, "malformed": 0, "broken": 0, "slow": 0}
+        self._lock = threading.Lock()
+
+    def _plan(self, messages):
+        """(reply text, first-token delay, per-token delay) for the next call."""
+        with self._lock:
+            n = self.calls
+            self.calls += 1
+        rng = random.Random(f"{self.seed}:{self.model_name}:{self.temperature}:{n}")
+        if self.responses:
+            text = self.responses[n % len(self.responses)]
+        else:
+            text = default_reply(prompt_text(messages))
+
+        roll = rng.random()
+        if roll < self.broken_rate:
+            text, kind = BROKEN_REPLY, "broken"
+        elif roll < self.broken_rate + self.malformed_rate:
+            text, kind = malformed(text, rng), "malformed"
+        else:
+            kind = "valid"
+        scale = self.slow_factor if rng.random() < self.slow_rate else 1.0
+        with self._lock:
+            self.counts[kind] += 1
+            self.counts["slow"] += scale != 1.0
+        token_delay = scale / self.tokens_per_second if self.tokens_per_second else 0.0
+        return text, scale * self.first_token_latency(rng), token_delay
+
+    def _chunks(self, text):
+        return [text[i:i + self.chunk_chars] for i in range(0, len(text), self.chunk_chars)]
+
+    def stream(self, messages=None, **kwargs):
+        text, first, token_delay = self._plan(messages)
+        time.sleep(first)
+        for chunk in self._chunks(text):
+            yield FakeMessage(chunk)
+            time.sleep(token_delay)
+
+    def invoke(self, messages=None, **kwargs):
+        return FakeMessage("".join(chunk.content for chunk in self.stream(messages)))
+
+    __call__ = invoke
+
+    async def astream(self, messages=None, **kwargs):
+        text, first, token_delay = self._plan(messages)
+        await asyncio.sleep(first)
+        for chunk in self._chunks(text):
+            yield FakeMessage(chunk)
+            await asyncio.sleep(token_delay)
+
+    async def ainvoke(self, messages=None, **kwargs):
+        return FakeMessage("".join([chunk.content async for chunk in self.astream(messages)]))
+
+# Settings for the "fake" backend in llm_clients (LLM_BACKEND=fake); load tests tune these
+FAKE_BACKEND_SETTINGS = {
+    "tokens_per_second": 200.0,
+    "first_token_latency": 0.2,
+    "malformed_rate": 0.0,
+    "broken_rate": 0.0,
+    "slow_rate": 0.0,
+    "slow_factor": 10.0,
+    "seed": 0,
+}
+
+def fake_backend(model, temperature, api_key=None):
+    """
+    llm_clients backend factory: a prompt-routed FakeChatModel per (model, temperature).
+    Named "fake:<model>", so with LLM_CACHE=1 its replies never land under the real model's keys.
+    """
+    return FakeChatModel(model_name=f"fake:{model}", temperature=temperature, **FAKE_BACKEND_SETTINGS)
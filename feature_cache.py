@@ -0,0 +1,91 @@
+# feature_cache.py
+import hashlib
+import io
+import json
+import os
+import threading
+import numpy as np
+from render_cache import RenderCache
+
+FEATURE_CACHE_VERSION = 1 # Bump when pitch tracking output changes so stale features are ignored
+
+def audio_digest(source, chunk_size=1 << 20):
+    """sha256 of the raw audio: bytes, a path or a seekable file-like object (read in chunks)."""
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                h.update(chunk)
+    else:
+        pos = source.tell()
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            h.update(chunk)
+        source.seek(pos)
+    return h.hexdigest()
+
+def feature_key(digest, **params):
+    """
+    Content address for extracted features: audio hash plus the analysis parameters
+    that change the F0 track (engine, hop, threshold...). Scoring inputs such as the
+    raga or the coach prompt are deliberately not part of the key.
+    """
+    payload = json.dumps({"v": FEATURE_CACHE_VERSION, "audio": digest, "params": params},
+                         sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def pack_features(features):
+    """dict of arrays / scalars -> compressed npz bytes (f0 and confidence stored as float32)."""
+    arrays = {}
+    for name, value in features.items():
+        value = np.asarray(value)
+        if value.dtype == np.float64:
+            value = value.astype(np.float32)
+        arrays[name] = value
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
+
+def unpack_features(data):
+    with np.load(io.BytesIO(data), allow_pickle=False) as npz:
+        return {name: (npz[name].item() if npz[name].ndim == 0 else npz[name]) for name in npz.files}
+
+class FeatureCache:
+    """
+    On-disk cache of pitch-tracking output (f0, voiced flag, voiced prob, ...)
+    stored as npz blobs in a RenderCache, so it gets the same memory LRU,
+    atomic writes and total-size eviction (least recently used first).
+    """
+    def __init__(self, cache_dir, max_memory_bytes=16 * 2**20, max_disk_bytes=256 * 2**20):
+        self.store = RenderCache(cache_dir, max_memory_bytes=max_memory_bytes, max_disk_bytes=max_disk_bytes)
+
+    def get(self, key):
+        data = self.store.get(key)
+        if data is None:
+            return None
+        try:
+            return unpack_features(data)
+        except (OSError, ValueError, KeyError):
+            return None # Corrupt or foreign blob, recompute
+
+    def put(self, key, features):
+        self.store.put(key, pack_features(features))
+
+    def stats(self):
+        return self.store.stats()
+
+    def clear(self):
+        self.store.clear()
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_feature_cache(output_dir="generated_music"):
+    """Process-wide feature cache per output directory, shared by every AudioAnalyzer."""
+    cache_dir = os.path.join(output_dir, "feature_cache")
+    with _CACHES_LOCK:
+        cache = _CACHES.get(cache_dir)
+        if cache is None:
+            cache = _CACHES[cache_dir] = FeatureCache(cache_dir)
+        return cache
@@ -0,0 +1,164 @@
+# job_queue.py
+"""
+Background jobs for the Streamlit app. A handler submits a job and gets a job
+id back immediately; the page polls status(job_id) and picks the result up
+when it is done, so no script run waits on an LLM call or DSP work.
+
+Jobs run on a fixed pool of I/O threads shared by every session. A job that
+needs CPU-heavy work (pitch tracking, synthesis) hands it to the process pool
+with job.run_cpu(fn, ...), so it neither holds the GIL nor a script thread:
+
+    def compose(job, prompt):
+        job.progress(0.1, "COMPOSING")
+        song = composer.generate_full_song(...)          # I/O thread
+        job.progress(0.6, "RENDERING")
+        return {"song": song, "audio": job.run_cpu(render_preview, song)}
+
+    job_id = get_job_queue().submit(compose, prompt)
+    get_job_queue().status(job_id)  # {"status": "running", "progress": 0.6, ...}
+"""
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+QUEUE_SETTINGS = {
+    "io_workers": int(os.getenv("JOB_IO_WORKERS", "8")),
+    "cpu_workers": int(os.getenv("JOB_CPU_WORKERS", "0")) or max(1, (os.cpu_count() or 2) - 1),
+    "ttl": 3600.0, # Finished jobs are forgotten after this many seconds
+    "max_jobs": 1000, # ... or once more than this many are tracked (oldest finished first)
+}
+
+class Job:
+    """State of one job; the running function gets it as its first argument."""
+    __slots__ = ("id", "name", "status", "progress_value", "message", "result", "error",
+                 "submitted", "started", "finished", "_queue", "_done")
+
+    def __init__(self, queue, name):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.status = "queued"
+        self.progress_value = 0.0
+        self.message = ""
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = self.finished = None
+        self._queue = queue
+        self._done = threading.Event()
+
+    def progress(self, fraction, message=None):
+        """Reports progress in [0, 1] with an optional status line."""
+        self.progress_value = min(1.0, max(0.0, float(fraction)))
+        if message is not None:
+            self.message = message
+
+    def run_cpu(self, fn, *args, **kwargs):
+        """Runs a picklable module-level function on the process pool and waits for it."""
+        return self._queue._cpu().submit(fn, *args, **kwargs).result()
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "status": self.status,
+            "progress": self.progress_value,
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "queued_s": round((self.started or time.time()) - self.submitted, 3),
+            "run_s": round((self.finished or time.time()) - self.started, 3) if self.started else 0.0,
+        }
+
+class JobQueue:
+    """Fixed-size I/O thread pool plus a lazily started process pool for DSP."""
+    def __init__(self, io_workers=None, cpu_workers=None, ttl=None, max_jobs=None):
+        self.io_workers = io_workers or QUEUE_SETTINGS["io_workers"]
+        self.cpu_workers = cpu_workers or QUEUE_SETTINGS["cpu_workers"]
+        self.ttl = ttl or QUEUE_SETTINGS["ttl"]
+        self.max_jobs = max_jobs or QUEUE_SETTINGS["max_jobs"]
+        self._io = ThreadPoolExecutor(max_workers=self.io_workers, thread_name_prefix="job-io")
+        self._cpu_pool = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def _cpu(self):
+        if self._cpu_pool is None:
+            with self._lock:
+                if self._cpu_pool is None:
+                    # spawn, not fork: forking the threaded Streamlit server can copy held locks
+                    self._cpu_pool = ProcessPoolExecutor(max_workers=self.cpu_workers,
+                                                         mp_context=multiprocessing.get_context("spawn"))
+        return self._cpu_pool
+
+    def submit(self, fn, *args, name=None, **kwargs):
+        """Queues fn(job, *args, **kwargs) on an I/O thread; returns the job id."""
+        job = Job(self, name or getattr(fn, "__name__", "job"))
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._io.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job, fn, args, kwargs):
+        job.started = time.time()
+        job.status = "running"
+        try:
+            job.result = fn(job, *args, **kwargs)
+            job.progress_value = 1.0
+            job.status = "done"
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            job.status = "failed"
+            traceback.print_exc()
+        finally:
+            job.finished = time.time()
+            job._done.set()
+
+    def _prune(self):
+        """Drops expired finished jobs, then the oldest finished ones beyond max_jobs."""
+        now = time.time()
+        finished = sorted((job for job in self._jobs.values() if job.finished), key=lambda job: job.finished)
+        for job in finished:
+            if now - job.finished > self.ttl or len(self._jobs) >= self.max_jobs:
+                del self._jobs[job.id]
+
+    def status(self, job_id):
+        """Snapshot dict of the job (result included once done), or None if unknown / expired."""
+        job = self._jobs.get(job_id)
+        return job.snapshot() if job is not None else None
+
+    def result(self, job_id, timeout=None):
+        """Blocks until the job finishes (scripts / tests; the UI polls status instead)."""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        if not job._done.wait(timeout):
+            raise TimeoutError(f"Job {job_id} still {job.status}")
+        return job.snapshot()
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {"io_workers": self.io_workers, "cpu_workers": self.cpu_workers, "jobs": counts}
+
+    def shutdown(self, wait=True):
+        self._io.shutdown(wait=wait)
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=wait)
+
+_QUEUE = {}
+_QUEUE_LOCK = threading.Lock()
+
+def get_job_queue():
+    """Process-wide queue, shared by every Streamlit session (fixed worker count for all users)."""
+    with _QUEUE_LOCK:
+        queue = _QUEUE.get("default")
+        if queue is None:
+            queue = _QUEUE["default"] = JobQueue()
+        return queue
@@ -0,0 +1,237 @@
+# json_repair.py
+"""
+Tolerant JSON reader for LLM replies, shared by the composer and the coach.
+
+Valid JSON goes straight to the stdlib decoder. Anything else gets a single
+left-to-right pass that accepts the usual model mistakes:
+prose / markdown fences around the object, single-quoted or unquoted keys,
+trailing or missing commas, // # /* */ comments (outside strings only, so
+URLs survive), Python literals (True / None), unterminated strings and
+truncated replies, whose open arrays / objects are closed at the end.
+"""
+import json
+import re
+
+_FENCE = re.compile(r"```[a-zA-Z]*")
+_WORDS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+_NUMBER = re.compile(r"-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+_BARE = re.compile(r"[A-Za-z_$][\w$\-]*")
+_ESCAPES = {'"': '"', "'": "'", "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+class _Reader:
+    """Recursive-descent reader; every character is looked at a bounded number of times."""
+    def __init__(self, text):
+        self.s = text
+        self.i = 0
+        self.n = len(text)
+        self.repairs = 0
+
+    def skip(self):
+        """Whitespace, commas in odd places are handled by callers; comments are skipped here."""
+        s, n = self.s, self.n
+        while self.i < n:
+            ch = s[self.i]
+            if ch in " \t\r\n":
+                self.i += 1
+            elif ch == "/" and s.startswith("//", self.i) or ch == "#":
+                end = s.find("\n", self.i)
+                self.i = n if end < 0 else end + 1
+                self.repairs += 1
+            elif ch == "/" and s.startswith("/*", self.i):
+                end = s.find("*/", self.i + 2)
+                self.i = n if end < 0 else end + 2
+                self.repairs += 1
+            elif ch == "`":
+                m = _FENCE.match(s, self.i)
+                self.i = m.end() if m else self.i + 1
+                self.repairs += 1
+            else:
+                break
+
+    def value(self):
+        self.skip()
+        if self.i >= self.n:
+            raise ValueError("unexpected end of input")
+        ch = self.s[self.i]
+        if ch == "{":
+            return self.obj()
+        if ch == "[":
+            return self.arr()
+        if ch in "\"'":
+            return self.string()
+        m = _NUMBER.match(self.s, self.i)
+        if m:
+            self.i = m.end()
+            text = m.group()
+            if text.endswith("."):
+                text += "0"
+                self.repairs += 1
+            return float(text) if any(c in text for c in ".eE") else int(text)
+        m = _BARE.match(self.s, self.i)
+        if m:
+            self.i = m.end()
+            word = m.group()
+            if word not in ("true", "false", "null"):
+                self.repairs += 1
+            return _WORDS.get(word, word)
+        raise ValueError(f"unexpected {ch!r} at {self.i}")
+
+    def string(self):
+        s, n = self.s, self.n
+        quote = s[self.i]
+        if quote == "'":
+            self.repairs += 1
+        self.i += 1
+        parts = []
+        start = self.i
+        while self.i < n:
+            ch = s[self.i]
+            if ch == quote:
+                parts.append(s[start:self.i])
+                self.i += 1
+                return "".join(parts)
+            if ch == "\\" and self.i + 1 < n:
+                parts.append(s[start:self.i])
+                esc = s[self.i + 1]
+                if esc == "u" and self.i + 6 <= n:
+                    try:
+                        parts.append(chr(int(s[self.i + 2:self.i + 6], 16)))
+                        self.i += 6
+                    except ValueError:
+                        parts.append(esc)
+                        self.i += 2
+                else:
+                    parts.append(_ESCAPES.get(esc, esc))
+                    self.i += 2
+                start = self.i
+                continue
+            if ch == "\n" and quote == "'":
+                break # A single-quoted string never spans lines; treat it as closed
+            self.i += 1
+        parts.append(s[start:self.i]) # Unterminated (truncated reply): keep what arrived
+        self.repairs += 1
+        return "".join(parts)
+
+    def key(self):
+        self.skip()
+        if self.i >= self.n:
+            raise ValueError("unexpected end of input")
+        ch = self.s[self.i]
+        if ch in "\"'":
+            return self.string()
+        m = _BARE.match(self.s, self.i) or _NUMBER.match(self.s, self.i)
+        if not m:
+            raise ValueError(f"bad key at {self.i}")
+        self.i = m.end()
+        self.repairs += 1
+        return m.group()
+
+    def obj(self):
+        self.i += 1
+        out = {}
+        while True:
+            self.skip()
+            if self.i >= self.n:
+                self.repairs += 1 # Truncated: close the object
+                return out
+            ch = self.s[self.i]
+            if ch == "}":
+                self.i += 1
+                return out
+            if ch in ",]":
+                self.repairs += ch == "]" # Stray array closer ("[...]],"): drop it
+                self.i += 1
+                continue
+            try:
+                k = self.key()
+                self.skip()
+                if self.i < self.n and self.s[self.i] in ":=":
+                    self.i += 1
+                else:
+                    self.repairs += 1
+                out[k] = self.value()
+            except ValueError:
+                self.repairs += 1
+                if self.i >= self.n:
+                    return out # Truncated inside a key / value: drop the partial member
+                if self.s[self.i] != "}":
+                    self.i += 1 # Stray character: skip it and carry on
+
+    def arr(self):
+        self.i += 1
+        out = []
+        while True:
+            self.skip()
+            if self.i >= self.n:
+                self.repairs += 1 # Truncated: close the array
+                return out
+            ch = self.s[self.i]
+            if ch in "]}":
+                self.repairs += ch == "}"
+                self.i += 1
+                return out
+            if ch == ",":
+                self.i += 1
+                continue
+            try:
+                out.append(self.value())
+            except ValueError:
+                self.repairs += 1
+                if self.i >= self.n:
+                    return out
+                self.i += 1
+
+_OBJECT_START = re.compile(r"\{\s*[\"']")
+
+def _json_starts(text):
+    """
+    Candidate start indices: the first { or [, plus the first object opening
+    with a quoted key when that comes later (so "{as your guru}" in leading
+    prose does not hide the real reply).
+    """
+    brace, bracket = text.find("{"), text.find("[")
+    first = bracket if brace < 0 or 0 <= bracket < brace else brace
+    if first < 0:
+        return []
+    m = _OBJECT_START.search(text, first)
+    return [first] if not m or m.start() == first else [first, m.start()]
+
+def _parse_from(text, start):
+    """(value, repairs, characters consumed) for a parse starting at `start`."""
+    try:
+        # Fast path: the reply (minus surrounding prose) is already valid JSON
+        value, end = json.JSONDecoder().raw_decode(text, start)
+        return value, 0, end - start
+    except ValueError:
+        pass
+    reader = _Reader(text)
+    reader.i = start
+    value = reader.value()
+    return value, max(reader.repairs, 1), reader.i - start
+
+def repair_json(text):
+    """
+    Parses `text` as leniently as described above.
+    Returns (value, repairs) where repairs counts the fixes applied (0 = valid JSON).
+    When there are two candidate starts the longer parse wins; each is one linear pass.
+    Raises ValueError when no JSON structure can be recovered.
+    """
+    text = text or ""
+    starts = _json_starts(text)
+    if not starts:
+        raise ValueError("No JSON structure found")
+    best = max((_parse_from(text, start) for start in starts), key=lambda parsed: parsed[2])
+    return best[0], best[1]
+
+def parse_llm_json(text, expect=dict, error="JSON Parsing Failed"):
+    """
+    LLM reply -> parsed JSON of type `expect`, or {"error": ...} if nothing usable was found.
+    Non-dict payloads are wrapped as {"error": ...} too when a dict is expected.
+    """
+    try:
+        value, _ = repair_json(text)
+    except (ValueError, RecursionError) as e:
+        return {"error": f"{error} (Details: {e})"}
+    if expect is not None and not isinstance(value, expect):
+        return {"error": f"{error} (Details: expected {expect.__name__}, got {type(value).__name__})"}
+    return value
@@ -0,0 +1,93 @@
+# json_stream.py
+import json
+
+class IncrementalJSONParser:
+    """
+    Incremental scanner for a streamed JSON object (LLM token stream).
+    feed(text) returns (field, index, value) for every element of a watched
+    top-level array as soon as that element is complete, e.g.
+    ("lyrics", 0, "Verse Line 1"). Each character is scanned once, so the
+    total cost is linear in the reply length. Text before the first "{"
+    (prose, markdown fences) is ignored.
+    """
+    def __init__(self, watch=("melody_main", "lyrics")):
+        self.watch = set(watch)
+        self.text = [] # Everything from the first "{" on, for the final parse
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string = [] # Current string literal at depth 1 (candidate key)
+        self._last_string = None
+        self._key = None # Top-level key whose value is being read
+        self._element = None # Characters of the current watched array element
+        self._index = 0
+
+    def feed(self, chunk):
+        events = []
+        for ch in chunk:
+            if not self._started:
+                if ch != "{":
+                    continue
+                self._started = True
+            self.text.append(ch)
+            collecting = self._element is not None
+
+            if self._in_string:
+                if collecting:
+                    self._element.append(ch)
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = "".join(self._string)
+                elif self._depth == 1:
+                    self._string.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string = []
+                if collecting:
+                    self._element.append(ch)
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth == 2 and ch == "[" and self._key in self.watch:
+                    self._element, self._index = [], 0
+                elif collecting:
+                    self._element.append(ch)
+            elif ch in "}]":
+                if self._depth == 2 and collecting:
+                    self._emit(events)
+                    self._element = None
+                elif collecting:
+                    self._element.append(ch)
+                self._depth -= 1
+            elif ch == ":" and self._depth == 1:
+                self._key = self._last_string
+            elif ch == "," and self._depth == 2 and collecting:
+                self._emit(events)
+            elif ch == "," and self._depth == 1:
+                self._key = None
+            elif collecting:
+                self._element.append(ch)
+        return events
+
+    def _emit(self, events):
+        raw = "".join(self._element).strip()
+        self._element = []
+        if not raw:
+            return
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw.strip("'\"")
+        events.append((self._key, self._index, value))
+        self._index += 1
+
+    def buffer(self):
+        """The streamed reply from the first "{" on."""
+        return "".join(self.text)
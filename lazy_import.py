@@ -0,0 +1,54 @@
+# lazy_import.py
+"""
+Deferred imports for heavy optional stacks. Modules bind them at import time
+(`prompts = lazy_import("langchain_core.prompts")`) but the real import, e.g.
+the whole LangChain / Groq client stack, only happens on first attribute
+access, so starting the app or a CLI does not pay for code paths it never
+uses (see startup_profile.py for the per-module budgets).
+"""
+import importlib
+import importlib.util
+import threading
+import types
+
+_lock = threading.RLock()
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a heavy module that is only imported on first attribute access,
+    e.g. `music21 = lazy_import("music21")` then `music21.note.Note(...)`.
+    """
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self):
+        module = self.__dict__["_lazy_target"]
+        if module is None:
+            with _lock:
+                module = self.__dict__["_lazy_target"]
+                if module is None:
+                    module = importlib.import_module(self.__name__)
+                    self.__dict__["_lazy_target"] = module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "loaded" if self.__dict__["_lazy_target"] is not None else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+def lazy_import(name):
+    """Returns a LazyModule for `name`; the real import happens on first use."""
+    return LazyModule(name)
+
+def is_available(name):
+    """True if `name` can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
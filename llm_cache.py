@@ -0,0 +1,132 @@
+# llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+LLM_CACHE_VERSION = 2 # Bump when parsing changes so stale parsed JSON is ignored (2: json_repair parser)
+DEFAULT_TTL = 7 * 24 * 3600
+
+def llm_cache_enabled():
+    """Opt-in switch for callers that do not pass use_cache explicitly (LLM_CACHE=1)."""
+    return os.getenv("LLM_CACHE", "").lower() in ("1", "true", "yes")
+
+def response_key(rendered_prompt, model, temperature):
+    payload = json.dumps({"v": LLM_CACHE_VERSION, "prompt": rendered_prompt, "model": model,
+                          "temperature": float(temperature)}, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMCache:
+    """
+    SQLite cache of LLM responses keyed by (rendered prompt, model, temperature).
+    Stores the raw text and the parsed JSON, expires entries after `ttl` seconds
+    and evicts least recently used rows once the stored text exceeds `max_bytes`.
+    """
+    def __init__(self, path, ttl=DEFAULT_TTL, max_bytes=64 * 2**20):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, temperature REAL, raw TEXT, parsed TEXT,"
+            " size INTEGER, created REAL, accessed REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    def get(self, key):
+        """(raw, parsed) for a live entry, or None."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT raw, parsed, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.counters["misses"] += 1
+                return None
+            raw, parsed, created = row
+            if now - created > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.counters["expired"] += 1
+                self.counters["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.counters["hits"] += 1
+        return raw, (json.loads(parsed) if parsed is not None else None)
+
+    def put(self, key, raw, parsed=None, model="", temperature=0.0):
+        now = time.time()
+        parsed_text = json.dumps(parsed, ensure_ascii=False) if parsed is not None else None
+        size = len(raw.encode("utf-8")) + len((parsed_text or "").encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, float(temperature), raw, parsed_text, size, now, now)
+            )
+            self._evict()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        self._db.execute("DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,))
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        total = sum(size for _, size in rows)
+        victims = []
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            victims.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.counters["evictions"] += len(victims)
+
+    def stats(self):
+        with self._lock:
+            entries, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            return dict(self.counters, entries=entries, bytes=size)
+
+    def clear(self):
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_llm_cache(output_dir="generated_music"):
+    """Process-wide response cache per output directory."""
+    path = os.path.join(output_dir, "llm_cache.sqlite")
+    with _CACHES_LOCK:
+        cache = _CACHES.get(path)
+        if cache is None:
+            cache = _CACHES[path] = LLMCache(path)
+        return cache
+
+def cached_invoke(prompt, llm, variables, parse, cache=None, fresh=False):
+    """
+    Runs prompt | llm, going through `cache` when one is given.
+    `parse(raw_text)` turns the reply into a dict; replies that parse to an
+    {"error": ...} dict are returned but never stored. fresh=True skips the
+    lookup (a new sample) and stores the new reply in place of the old one.
+    Returns (parsed, raw_text, from_cache).
+    """
+    key = None
+    if cache is not None:
+        model = getattr(llm, "model_name", None) or getattr(llm, "model", "")
+        temperature = getattr(llm, "temperature", 0.0) or 0.0
+        key = response_key(prompt.format(**variables), model, temperature)
+        if not fresh:
+            hit = cache.get(key)
+            if hit is not None:
+                raw, parsed = hit
+                return (parsed if parsed is not None else parse(raw)), raw, True
+
+    raw = (prompt | llm).invoke(variables).content
+    parsed = parse(raw)
+    if key is not None and not (isinstance(parsed, dict) and "error" in parsed):
+        cache.put(key, raw, parsed, model=model, temperature=temperature)
+    return parsed, raw, False
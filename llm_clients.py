@@ -0,0 +1,175 @@
+# llm_clients.py
+"""
+Process-wide registry of chat model clients.
+Every generator asks get_llm(temperature) instead of building its own ChatGroq,
+so all of them share one keep-alive HTTP connection pool (sync; async per event loop),
+one set of timeouts and one cap on concurrent requests.
+
+Point the whole app at a local stand-in server (tests, load runs) with
+GROQ_BASE_URL=http://127.0.0.1:8000 or configure_llm_clients(base_url=...),
+or swap the backend entirely: LLM_BACKEND=fake (fake_llm, no network) or any
+factory added with register_llm_backend().
+"""
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+from lazy_import import lazy_import
+
+langchain_groq = lazy_import("langchain_groq")
+httpx = lazy_import("httpx")
+
+DEFAULT_MODEL = "llama-3.1-8b-instant"
+
+# Pool / timeout settings shared by every client; override with configure_llm_clients()
+LLM_SETTINGS = {
+    "backend": os.getenv("LLM_BACKEND", "groq"), # Key into _backends
+    "base_url": os.getenv("GROQ_BASE_URL"), # None = Groq cloud
+    "max_connections": 16, # Also the cap on concurrent in-flight requests
+    "max_keepalive": 8,
+    "keepalive_expiry": 60.0,
+    "connect_timeout": 5.0,
+    "read_timeout": 60.0,
+    "pool_timeout": 30.0, # Wait this long for a free connection before failing
+    "max_retries": 2,
+}
+
+_lock = threading.Lock()
+_clients = {}
+_http = {"sync": None, "async": None}
+
+def _limits_and_timeout():
+    s = LLM_SETTINGS
+    limits = httpx.Limits(max_connections=s["max_connections"], max_keepalive_connections=s["max_keepalive"],
+                          keepalive_expiry=s["keepalive_expiry"])
+    timeout = httpx.Timeout(s["read_timeout"], connect=s["connect_timeout"], pool=s["pool_timeout"])
+    return limits, timeout
+
+def _per_loop_async_client(limits, timeout):
+    """
+    httpx.AsyncClient whose requests go through a separate pool per running
+    event loop. An async connection belongs to the loop that opened it, so one
+    pool shared across asyncio.run() calls fails with "Event loop is closed";
+    each loop's pool is dropped together with the loop.
+    """
+    class PerLoopAsyncClient(httpx.AsyncClient):
+        def __init__(self):
+            super().__init__(limits=limits, timeout=timeout)
+            self._loop_clients = weakref.WeakKeyDictionary()
+            self._loop_lock = threading.Lock()
+
+        def _for_loop(self):
+            loop = asyncio.get_running_loop()
+            with self._loop_lock:
+                for closed in [old for old in self._loop_clients if old.is_closed()]:
+                    del self._loop_clients[closed] # Its connections may reference it, so drop them here
+                client = self._loop_clients.get(loop)
+                if client is None:
+                    client = self._loop_clients[loop] = httpx.AsyncClient(limits=limits, timeout=timeout)
+                return client
+
+        async def send(self, request, **kwargs):
+            return await self._for_loop().send(request, **kwargs)
+
+        async def aclose(self):
+            loop = asyncio.get_running_loop()
+            with self._loop_lock:
+                client = self._loop_clients.pop(loop, None)
+            if client is not None:
+                await client.aclose()
+            await super().aclose()
+
+    return PerLoopAsyncClient()
+
+def _http_clients():
+    """The shared httpx clients, created on first use."""
+    if _http["sync"] is None:
+        limits, timeout = _limits_and_timeout()
+        _http["sync"] = httpx.Client(limits=limits, timeout=timeout)
+        _http["async"] = _per_loop_async_client(limits, timeout)
+    return _http["sync"], _http["async"]
+
+def _groq_client(model, temperature, api_key=None):
+    base_url = LLM_SETTINGS["base_url"]
+    api_key = api_key or os.getenv("GROQ_API_KEY") or ("local" if base_url else None)
+    if not api_key:
+        raise ValueError("GROQ_API_KEY is missing. Please check your .env file.")
+    sync_client, async_client = _http_clients()
+    kwargs = dict(
+        temperature=temperature,
+        model_name=model,
+        api_key=api_key,
+        http_client=sync_client,
+        http_async_client=async_client,
+        max_retries=LLM_SETTINGS["max_retries"],
+        timeout=LLM_SETTINGS["read_timeout"],
+    )
+    if base_url:
+        kwargs["base_url"] = base_url
+    return langchain_groq.ChatGroq(**kwargs)
+
+def _fake_client(model, temperature, api_key=None):
+    from fake_llm import fake_backend
+    return fake_backend(model, temperature, api_key)
+
+# Backend name -> factory(model, temperature, api_key) returning a LangChain chat model
+_backends = {"groq": _groq_client, "fake": _fake_client}
+
+def register_llm_backend(name, factory):
+    """Adds (or replaces) a backend; select it with configure_llm_clients(backend=name)."""
+    with _lock:
+        _backends[name] = factory
+        _clients.clear()
+
+def get_llm(temperature=0.7, model=DEFAULT_MODEL, api_key=None):
+    """
+    Shared chat model for (model, temperature), built once per process by the
+    configured backend (ChatGroq by default).
+    Raises ValueError for an unknown backend, or (groq) when no API key is
+    available and no local base_url is set.
+    """
+    backend, base_url = LLM_SETTINGS["backend"], LLM_SETTINGS["base_url"]
+    key = (model, float(temperature), backend, base_url)
+    client = _clients.get(key)
+    if client is not None:
+        return client
+
+    with _lock:
+        client = _clients.get(key)
+        if client is None:
+            factory = _backends.get(backend)
+            if factory is None:
+                raise ValueError(f"Unknown LLM backend '{backend}'. Choose from {sorted(_backends)}.")
+            client = _clients[key] = factory(model, temperature, api_key)
+        return client
+
+def configure_llm_clients(**settings):
+    """
+    Updates LLM_SETTINGS (e.g. base_url, max_connections, read_timeout) and drops
+    existing clients so the next get_llm() call picks the new settings up.
+    Clients handed out earlier (a composer's self.llm) keep working on their old
+    HTTP pool, which is released once nothing references it.
+    """
+    unknown = set(settings) - set(LLM_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown LLM settings: {sorted(unknown)}")
+    with _lock:
+        LLM_SETTINGS.update(settings)
+        _http["sync"] = _http["async"] = None
+        _clients.clear()
+
+def registry_stats():
+    """Models / temperatures currently cached, for the profilers."""
+    return {"clients": sorted((m, t) for m, t, _, _ in _clients), "backend": LLM_SETTINGS["backend"],
+            "base_url": LLM_SETTINGS["base_url"]}
+
+def _close_http():
+    # Exit hook only: closing earlier would break clients still held by composers / coaches.
+    # Async pools belong to their event loops and go away with them, so the async client is only dropped
+    sync_client = _http["sync"]
+    _http["sync"] = _http["async"] = None
+    if sync_client is not None:
+        sync_client.close()
+
+atexit.register(_close_http)
@@ -1,19 +1,16 @@
 # lyrics_generator.py
-import os
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from prompt import get_composer_prompt
+from lazy_import import lazy_import
+from llm_clients import get_llm
+
+prompts = lazy_import("langchain_core.prompts")
 
 class LyricsGenerator:
     def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0.8, # Higher creativity for poetry
-            model_name="llama-3.1-8b-instant",
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+        self.llm = get_llm(temperature=0.8) # Higher creativity for poetry
 
     def generate_lyrics(self, mood):
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = prompts.ChatPromptTemplate.from_messages([
             ("system", get_composer_prompt),
             ("human", "Generate a {mood} romantic song about longing and love.")
         ])
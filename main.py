@@ -1,54 +1,125 @@
-import os
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_groq import ChatGroq
+import asyncio
+import time
+from lazy_import import lazy_import
+from llm_clients import get_llm
+
+prompts = lazy_import("langchain_core.prompts")
+
+MELODY_TEMPLATE = (
+    "Generate a melody based on this input: {input}. "
+    "Return ONLY space-separated notes (e.g., C4 D4 E4). "
+    "Do not include any conversational text."
+)
+HARMONY_TEMPLATE = (
+    "Create harmony chords for this melody: {melody}. "
+    "Format: C4-E4-G4 F4-A4-C5. "
+    "Return ONLY the chords string."
+)
+RHYTHM_TEMPLATE = (
+    "Suggest rhythm durations (in beats) for this melody: {melody}. "
+    "Format: 1.0 0.5 0.5 2.0. "
+    "Return ONLY the numbers."
+)
+STYLE_TEMPLATE = (
+    "Adapt the following music to {style} style:\n"
+    "Melody: {melody}\n"
+    "Harmony: {harmony}\n"
+    "Rhythm: {rhythm}\n"
+    "Output a single string summary describing the changes."
+)
+
+# Song pipeline as a dependency graph: stage -> (template, stages it needs)
+SONG_STAGES = {
+    "melody": (MELODY_TEMPLATE, ()),
+    "harmony": (HARMONY_TEMPLATE, ("melody",)),
+    "rhythm": (RHYTHM_TEMPLATE, ("melody",)),
+    "style": (STYLE_TEMPLATE, ("melody", "harmony", "rhythm")),
+}
 
 class MusicLLM:
     def __init__(self, temperature=0.7):
-        self.llm = ChatGroq(
-            temperature=temperature,
-            groq_api_key=os.getenv("GROQ_API_KEY"),
-            model_name="llama-3.1-8b-instant"
-        )
+        self.llm = get_llm(temperature=temperature)
+
+    def _chain(self, template):
+        return prompts.ChatPromptTemplate.from_template(template) | self.llm
 
     def generate_melody(self, user_input):
-        prompt = ChatPromptTemplate.from_template(
-            "Generate a melody based on this input: {input}. "
-            "Return ONLY space-separated notes (e.g., C4 D4 E4). "
-            "Do not include any conversational text."
-        )
-        chain = prompt | self.llm
-        return chain.invoke({"input": user_input}).content.strip()
+        return self._chain(MELODY_TEMPLATE).invoke({"input": user_input}).content.strip()
 
     def generate_harmony(self, melody):
-        prompt = ChatPromptTemplate.from_template(
-            "Create harmony chords for this melody: {melody}. "
-            "Format: C4-E4-G4 F4-A4-C5. "
-            "Return ONLY the chords string."
-        )
-        chain = prompt | self.llm
-        return chain.invoke({"melody": melody}).content.strip()
+        return self._chain(HARMONY_TEMPLATE).invoke({"melody": melody}).content.strip()
 
     def generate_rhythm(self, melody):
-        prompt = ChatPromptTemplate.from_template(
-            "Suggest rhythm durations (in beats) for this melody: {melody}. "
-            "Format: 1.0 0.5 0.5 2.0. "
-            "Return ONLY the numbers."
-        )
-        chain = prompt | self.llm
-        return chain.invoke({"melody": melody}).content.strip()
+        return self._chain(RHYTHM_TEMPLATE).invoke({"melody": melody}).content.strip()
 
     def adapt_style(self, style, melody, harmony, rhythm):
-        prompt = ChatPromptTemplate.from_template(
-            "Adapt the following music to {style} style:\n"
-            "Melody: {melody}\n"
-            "Harmony: {harmony}\n"
-            "Rhythm: {rhythm}\n"
-            "Output a single string summary describing the changes."
-        )
-        chain = prompt | self.llm
-        return chain.invoke({
+        return self._chain(STYLE_TEMPLATE).invoke({
             "style": style,
             "melody": melody,
             "harmony": harmony,
             "rhythm": rhythm
         }).content.strip()
+
+    # --- Async orchestration ------------------------------------------------
+    async def _arun_stage(self, template, variables):
+        response = await self._chain(template).ainvoke(variables)
+        return response.content.strip()
+
+    async def acompose(self, user_input, style, stages=None):
+        """
+        Runs the song pipeline as a dependency graph with ainvoke: every stage starts
+        as soon as the stages it needs are done, so harmony and rhythm run concurrently
+        and the wall time is the critical path (melody -> slowest of harmony/rhythm -> style).
+        Returns the stage outputs plus "timings": per-stage seconds, "total" wall time and
+        "sum_of_stages" (what the same calls cost when run one after another).
+        """
+        stages = stages or SONG_STAGES
+        inputs = {"input": user_input, "style": style}
+        tasks, timings, finished = {}, {}, {}
+        start = time.perf_counter()
+
+        async def run(name):
+            template, needs = stages[name]
+            results = await asyncio.gather(*(tasks[dep] for dep in needs))
+            t0 = time.perf_counter()
+            output = await self._arun_stage(template, dict(inputs, **dict(zip(needs, results))))
+            finished[name] = time.perf_counter() - start
+            timings[name] = round(finished[name] - (t0 - start), 3)
+            return output
+
+        for name in stages: # Dicts keep insertion order, so dependencies are declared first
+            tasks[name] = asyncio.ensure_future(run(name))
+        try:
+            outputs = dict(zip(stages, await asyncio.gather(*tasks.values())))
+        except BaseException:
+            # A failed (or cancelled) stage must not leave its siblings running in the background
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+
+        timings["total"] = round(time.perf_counter() - start, 3)
+        timings["sum_of_stages"] = round(sum(timings[name] for name in stages), 3)
+        outputs["timings"] = timings
+        return outputs
+
+    async def acompose_many(self, requests, max_concurrency=4):
+        """
+        Composes many songs with at most `max_concurrency` in flight.
+        `requests` is a list of (user_input, style); results keep the same order,
+        and a failed song yields {"error": ...} instead of cancelling the batch.
+        """
+        gate = asyncio.Semaphore(max_concurrency)
+
+        async def one(user_input, style):
+            async with gate:
+                try:
+                    return await self.acompose(user_input, style)
+                except Exception as e:
+                    return {"error": str(e)}
+
+        return await asyncio.gather(*(one(user_input, style) for user_input, style in requests))
+
+    def compose(self, user_input, style):
+        """Blocking wrapper around acompose for scripts and the CLI."""
+        return asyncio.run(self.acompose(user_input, style))
@@ -1,20 +1,17 @@
 # melody_generator.py
-import os
-from langchain_groq import ChatGroq
-from langchain_core.prompts import ChatPromptTemplate
 from prompt import get_composer_prompt
+from lazy_import import lazy_import
+from llm_clients import get_llm
+
+prompts = lazy_import("langchain_core.prompts")
 
 class MelodyGenerator:
     def __init__(self):
-        self.llm = ChatGroq(
-            temperature=0.6, # Lower temp for consistent music syntax
-            model_name="llama-3.1-8b-instant",
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+        self.llm = get_llm(temperature=0.6) # Lower temp for consistent music syntax
 
     def generate_melody_notes(self, lyrics_snippet):
         """Generates notes for the Mukhda (first few lines)"""
-        prompt = ChatPromptTemplate.from_messages([
+        prompt = prompts.ChatPromptTemplate.from_messages([
             ("system", get_composer_prompt),
             ("human", "Here are the lyrics:\n{lyrics}\n\nCompose a melody (approx 30-50 notes).")
         ])
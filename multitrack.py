@@ -0,0 +1,124 @@
+# multitrack.py
+import atexit
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from note_utils import lex_notes, note_to_midi
+from synth import SAMPLE_RATE, render_melody, note_layout
+from wavetable import get_bank
+
+# Default arrangement: which song_json field feeds each part, and how it sounds.
+# pan runs from -1 (left) to +1 (right); program is the 0-based General MIDI patch.
+PART_LAYOUT = [
+    {"name": "alaap", "source": "alaap", "timbre": "vocal", "gain": 0.8, "pan": -0.25,
+     "note_seconds": 1.0, "program": 53},
+    {"name": "melody", "source": "melody_main", "timbre": "saw", "gain": 1.0, "pan": 0.0,
+     "note_seconds": 0.5, "program": 53},
+    {"name": "drone", "source": "root_note", "timbre": "square", "gain": 0.35, "pan": 0.35,
+     "note_seconds": 1.0, "program": 104},
+]
+
+# Tanpura cycle relative to the root (Pa, Sa, Sa, low Sa)
+DRONE_PATTERN = (-5, 0, 0, -12)
+
+_pool = None
+
+def _get_pool(max_workers=None):
+    """Worker processes are started once and reused across renders."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=max_workers)
+        atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+    return _pool
+
+def _notes_to_midi(raw):
+    if isinstance(raw, list): raw = " ".join(raw)
+    return np.array(lex_notes(raw or "").playable_midi(), dtype=np.int64)
+
+def arrange(song_json, layout=None):
+    """
+    Lays the song out as parts on a shared timeline.
+    The alaap opens the song, the melody follows it and the drone spans both.
+    Returns a list of part dicts (layout fields + midi, durations, offset in seconds).
+    """
+    layout = layout or PART_LAYOUT
+    parts = []
+    cursor = 0.0
+    drone_spec = None
+    for spec in layout:
+        if spec["source"] == "root_note":
+            drone_spec = spec
+            continue
+        midi = _notes_to_midi(song_json.get(spec["source"], []))
+        if spec["source"] == "melody_main" and not len(midi):
+            # Same fallback as the single-line preview
+            midi = np.array([60, 62, 64, 65, 67], dtype=np.int64)
+        if not len(midi):
+            continue
+        durations = np.full(len(midi), spec["note_seconds"])
+        parts.append(dict(spec, midi=midi, durations=durations, offset=cursor))
+        cursor += float(durations.sum())
+
+    if drone_spec and cursor > 0:
+        root = note_to_midi(str(song_json.get("root_note", "C3"))) or 48
+        beats = int(np.ceil(cursor / drone_spec["note_seconds"]))
+        pattern = np.array(DRONE_PATTERN, dtype=np.int64) + root
+        midi = np.clip(np.resize(pattern, beats), 0, 127)
+        durations = np.full(beats, drone_spec["note_seconds"])
+        parts.append(dict(drone_spec, midi=midi, durations=durations, offset=0.0))
+    return parts
+
+def _render_part(shm_name, shape, row, start, midi, durations, timbre, sample_rate):
+    """Worker: renders one part straight into its row of the shared buffer."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        tracks = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        _, lengths = note_layout(durations, sample_rate)
+        stop = start + int(lengths.sum())
+        oscillator = get_bank(sample_rate).oscillator(timbre)
+        render_melody(midi, durations, sample_rate, oscillator=oscillator, out=tracks[row, start:stop])
+    finally:
+        del tracks
+        shm.close()
+
+def render_parts(parts, sample_rate=SAMPLE_RATE, parallel=True, max_workers=None):
+    """
+    Renders every part and returns the stereo mix, one part per worker process.
+    Workers write into a shared (parts x samples) float32 buffer, so no audio is
+    pickled back; the mix is taken straight from that buffer.
+    """
+    starts = [int(round(p["offset"] * sample_rate)) for p in parts]
+    ends = [s + int(note_layout(p["durations"], sample_rate)[1].sum()) for s, p in zip(starts, parts)]
+    shape = (len(parts), max(ends, default=0))
+    if shape[1] == 0:
+        return np.zeros((0, 2), dtype=np.float32)
+
+    nbytes = int(np.prod(shape)) * 4
+    shm = shared_memory.SharedMemory(create=True, size=nbytes)
+    try:
+        tracks = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        jobs = [(shm.name, shape, row, start, p["midi"], p["durations"], p["timbre"], sample_rate)
+                for row, (start, p) in enumerate(zip(starts, parts))]
+        if parallel and len(parts) > 1:
+            pool = _get_pool(max_workers)
+            for future in [pool.submit(_render_part, *job) for job in jobs]:
+                future.result()
+        else:
+            for job in jobs:
+                _render_part(*job)
+        mix = mix_stereo(tracks, parts)
+        del tracks
+        return mix
+    finally:
+        shm.close()
+        shm.unlink()
+
+def pan_matrix(parts):
+    """(parts x 2) left/right gains: per-part gain with constant-power pan."""
+    angles = (np.clip([p["pan"] for p in parts], -1, 1) + 1) * np.pi / 4
+    gains = np.array([p["gain"] for p in parts])
+    return (gains[:, None] * np.stack([np.cos(angles), np.sin(angles)], axis=1)).astype(np.float32)
+
+def mix_stereo(tracks, parts):
+    """Mixes (parts x samples) tracks down to a (samples x 2) float32 stereo buffer."""
+    return tracks.T @ pan_matrix(parts)
@@ -1,20 +1,84 @@
-import music21
+import hashlib
 import os
 import json
+import threading
 import numpy as np
-from scipy.io.wavfile import write as write_wav
 import io
-from note_utils import sanitize_notes
-from gtts import gTTS
+from note_utils import sanitize_notes, lex_notes
+from synth import render_melody, to_pcm16, note_layout, wav_header, iter_melody_chunks, limit_chunks
+from wavetable import get_bank
+from multitrack import arrange, render_parts
+from render_cache import get_render_cache, render_key
+from smf import MidiTrack, write_smf
+from lazy_import import lazy_import
+
+# Heavy dependencies load on first use, not when the app starts
+wavfile = lazy_import("scipy.io.wavfile")
+gtts = lazy_import("gtts")
+
+MIDI_FILES_KEPT = 32 # Per export kind; older files in output_dir are deleted
 
 class MusicEngine:
-    def __init__(self):
+    def __init__(self, timbre="saw", use_cache=True):
         self.output_dir = "generated_music"
+        self.timbre = timbre # Wavetable timbre: "saw", "square" or "vocal"
         os.makedirs(self.output_dir, exist_ok=True)
+        # Identical melodies (regenerated / shared songs) skip synthesis entirely
+        self.cache = get_render_cache(self.output_dir) if use_cache else None
+
+    def create_extended_midi(self, song_json, backend="smf"):
+        """
+        Exports melody_main as a MIDI file (quarter notes, 60 BPM, program 53).
+        The file name carries a hash of its content, so concurrent sessions never
+        overwrite each other's file. backend="music21" builds it through a music21 Score.
+        """
+        if backend == "music21":
+            data = self._music21_midi_bytes(song_json)
+        else:
+            data = self.midi_bytes(song_json)
+        return self._write_midi(data, "bollywood_vocal"), None
+
+    def midi_bytes(self, song_json):
+        """melody_main encoded straight to Standard MIDI File bytes (no music21 graph)."""
+        notes = self._midi_notes(song_json)
+        key = None
+        if self.cache is not None:
+            key = render_key("midi", notes, tempo=60, program=53)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        track = MidiTrack("Bollywood Vocal", program=53)
+        track.add_notes(notes, [1.0] * len(notes))
+        data = write_smf([track], bpm=60)
+        if key is not None:
+            self.cache.put(key, data)
+        return data
+
+    def create_arrangement_midi(self, song_json):
+        """
+        Multi-track MIDI file with the same part layout as generate_arrangement_wav
+        (alaap, melody, drone), one track and channel per part with its own program.
+        Tempo is 60 BPM, so one quarter note equals one second of the audio render.
+        """
+        tracks = []
+        for channel, spec in enumerate(arrange(song_json)):
+            if channel >= 9: channel += 1 # Channel 10 is reserved for drums
+            track = MidiTrack(spec["name"].title(), program=spec["program"], channel=channel)
+            track.add_notes(spec["midi"], spec["durations"], start_beat=spec["offset"])
+            tracks.append(track)
+        return self._write_midi(write_smf(tracks, bpm=60), "bollywood_arrangement"), None
+
+    def _midi_notes(self, song_json):
+        raw_melody = song_json.get("melody_main", [])
+        if isinstance(raw_melody, list): raw_melody = " ".join(raw_melody)
+        return list(lex_notes(raw_melody).playable_midi())
+
+    def _music21_midi_bytes(self, song_json):
+        """Legacy music21 export, kept as an optional backend for notation features."""
+        import music21
+        from music21.midi.translate import streamToMidiFile
 
-    def create_extended_midi(self, song_json):
-        # ... (Keep your existing MIDI logic unchanged) ...
-        # Ensure this function exists as before
         s = music21.stream.Score()
         part = music21.stream.Part()
         inst = music21.instrument.Instrument()
@@ -35,9 +99,57 @@ class MusicEngine:
             except: continue
 
         s.insert(0, part)
-        midi_path = os.path.join(self.output_dir, "bollywood_vocal.mid")
-        s.write('midi', fp=midi_path)
-        return midi_path, None
+        return streamToMidiFile(s).writestr()
+
+    def _write_midi(self, data, stem):
+        """
+        Writes MIDI bytes to a per-content path, atomically. Only the MIDI_FILES_KEPT
+        most recently written / requested files per stem stay on disk (oldest removed first).
+        """
+        midi_path = os.path.join(self.output_dir, f"{stem}_{hashlib.sha1(data).hexdigest()[:12]}.mid")
+        if os.path.exists(midi_path):
+            os.utime(midi_path) # Refresh recency for eviction
+            return midi_path
+
+        tmp = f"{midi_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, midi_path)
+        self._evict_midi(stem, keep=midi_path)
+        return midi_path
+
+    def _evict_midi(self, stem, keep):
+        entries = []
+        for name in os.listdir(self.output_dir):
+            path = os.path.join(self.output_dir, name)
+            if name.startswith(stem + "_") and name.endswith(".mid") and path != keep:
+                try:
+                    entries.append((os.stat(path).st_mtime, path))
+                except FileNotFoundError:
+                    continue
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - (MIDI_FILES_KEPT - 1))]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass # Another session evicted it first
+
+    def generate_arrangement_wav(self, song_json, parallel=True):
+        """
+        Stereo render of the full arrangement: alaap, melody and a tanpura-style drone.
+        Each part is rendered on its own worker process into shared memory, then
+        mixed with per-part gain and pan, so render time follows the longest part.
+        """
+        sample_rate = 24000
+        parts = arrange(song_json)
+        if not parts:
+            return None
+
+        final_audio = to_pcm16(render_parts(parts, sample_rate, parallel=parallel))
+
+        buffer = io.BytesIO()
+        wavfile.write(buffer, sample_rate, final_audio)
+        return buffer.getvalue()
 
     def generate_preview_wav(self, song_json):
         """
@@ -46,6 +158,18 @@ class MusicEngine:
         2. Synth Melody (Sawtooth) - To provide the 'Song'
         """
         sample_rate = 24000 # Standard for TTS compatibility
+        midi, durations = self._melody_arrays(song_json)
+        if not len(midi):
+            return None
+
+        # 0. Repeat renders come straight from the render cache
+        key = None
+        if self.cache is not None:
+            key = render_key("wav", midi, durations=durations.tolist(), timbre=self.timbre,
+                             sample_rate=sample_rate)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         
         # 1. Generate Voice Intro (Spoken Lyrics) using gTTS
         try:
@@ -54,7 +178,7 @@ class MusicEngine:
                 lyrics_text = " ".join(song_json["lyrics"])[:50] # Speak first few lines
             
             if lyrics_text:
-                tts = gTTS(text=lyrics_text, lang='hi', slow=False)
+                tts = gtts.gTTS(text=lyrics_text, lang='hi', slow=False)
                 tts_fp = io.BytesIO()
                 tts.write_to_fp(tts_fp)
                 tts_fp.seek(0)
@@ -66,52 +190,77 @@ class MusicEngine:
         except:
             print("TTS Generation failed, falling back to Synth only")
 
-        # 2. Generate Synth Melody (Sawtooth Wave - Sounds more vocal)
+        # 2. Generate Synth Melody (Band-limited wavetable - Sawtooth sounds more vocal)
+        wav_bytes = self._synth_wav(midi, durations, sample_rate)
+        if key is not None:
+            self.cache.put(key, wav_bytes)
+        return wav_bytes
+
+    def _synth_wav(self, midi, durations, sample_rate):
+        oscillator = get_bank(sample_rate).oscillator(self.timbre)
+        final_audio = render_melody(midi, durations, sample_rate, oscillator=oscillator)
+        
+        # Normalize
+        final_audio = to_pcm16(final_audio)
+        
+        buffer = io.BytesIO()
+        wavfile.write(buffer, sample_rate, final_audio)
+        return buffer.getvalue()
+
+    def render_line_wav(self, notes, sample_rate=24000):
+        """
+        WAV bytes for a single melody line (text or list of notes), synth only.
+        Used by the streaming composer to start playback while later lines are still generating.
+        Returns None if the line has no playable notes.
+        """
+        if isinstance(notes, list): notes = " ".join(map(str, notes))
+        midi = np.array(lex_notes(notes or "").playable_midi(), dtype=np.int64)
+        if not len(midi):
+            return None
+        durations = np.full(len(midi), 0.5)
+        key = None
+        if self.cache is not None:
+            key = render_key("wav", midi, durations=durations.tolist(), timbre=self.timbre,
+                             sample_rate=sample_rate)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        wav_bytes = self._synth_wav(midi, durations, sample_rate)
+        if key is not None:
+            self.cache.put(key, wav_bytes)
+        return wav_bytes
+
+    def stream_preview_wav(self, song_json, chunk_size=8192, lookahead=1):
+        """
+        Streaming version of the synth preview for long compositions.
+        Yields the WAV header first, then 16-bit PCM chunks of `chunk_size` samples.
+        Memory stays constant and playback can start before the render finishes;
+        a running-peak limiter replaces the global normalization.
+        """
+        sample_rate = 24000
+        midi, durations = self._melody_arrays(song_json)
+        if not len(midi):
+            return
+
+        _, lengths = note_layout(durations, sample_rate)
+        yield wav_header(int(lengths.sum()), sample_rate)
+
+        oscillator = get_bank(sample_rate).oscillator(self.timbre)
+        chunks = iter_melody_chunks(midi, durations, chunk_size, sample_rate, oscillator=oscillator)
+        for chunk in limit_chunks(chunks, lookahead=lookahead):
+            chunk *= 32767
+            yield chunk.astype('<i2').tobytes()
+
+    def _melody_arrays(self, song_json):
+        """Sanitized `melody_main` as MIDI pitch and duration (seconds) arrays."""
         raw_melody = song_json.get("melody_main", [])
         if isinstance(raw_melody, list): raw_melody = " ".join(raw_melody)
-        clean_notes = sanitize_notes(raw_melody)
+        notes = lex_notes(raw_melody)
         
         # Fallback if no notes found
-        if not clean_notes:
+        if not len(notes):
             # Generate a C Scale as fallback so user hears SOMETHING
-            clean_notes = ["C4", "D4", "E4", "F4", "G4"]
+            notes = lex_notes("C4 D4 E4 F4 G4")
             
-        audio_data = []
-        
-        for n_str in clean_notes:
-            try:
-                freq = music21.note.Note(n_str).pitch.frequency
-                duration = 0.5 
-                
-                t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-                
-                # Sawtooth Wave (Rich, buzzy sound)
-                # Formula: 2 * (t * f - floor(t * f + 0.5))
-                wave = 0.5 * (2 * (t * freq - np.floor(t * freq + 0.5)))
-                
-                # Smoother Envelope (Attack/Decay)
-                envelope = np.concatenate([
-                    np.linspace(0, 1, int(len(wave)*0.1)), # Attack
-                    np.linspace(1, 0.8, int(len(wave)*0.1)), # Decay
-                    np.linspace(0.8, 0.8, int(len(wave)*0.6)), # Sustain
-                    np.linspace(0.8, 0, int(len(wave)*0.2)) # Release
-                ])
-                wave = wave * envelope
-                
-                audio_data.append(wave)
-            except:
-                continue
-                
-        if not audio_data:
-            return None
-
-        final_audio = np.concatenate(audio_data)
-        
-        # Normalize
-        final_audio = final_audio / np.max(np.abs(final_audio))
-        final_audio = final_audio * 32767
-        final_audio = final_audio.astype(np.int16)
-        
-        buffer = io.BytesIO()
-        write_wav(buffer, sample_rate, final_audio)
-        return buffer.getvalue()
\ No newline at end of file
+        midi = np.array(notes.playable_midi(), dtype=np.int64)
+        return midi, np.full(len(midi), 0.5)
@@ -0,0 +1,139 @@
+# note_segmentation.py
+"""
+F0 track -> timed note events, entirely with array operations:
+fractional MIDI, median smoothing, semitone quantization and run-length encoding.
+"""
+import numpy as np
+from alignment import hz_to_midi
+from audio_stream import NOTE_NAMES
+
+SMOOTH_FRAMES = 5 # Median filter length (~115 ms at hop 512 / 22.05 kHz)
+MIN_NOTE_SECONDS = 0.08 # Shorter pitch runs are treated as glides and merged into their neighbour
+MIN_REST_SECONDS = 0.12 # Shorter unvoiced gaps (consonants, breaths) do not split a note
+
+def midi_name(midi):
+    """Note names for an array of integer MIDI numbers, e.g. 61 -> 'C#4'."""
+    midi = np.asarray(midi, dtype=np.int64)
+    return [f"{NOTE_NAMES[m % 12]}{m // 12 - 1}" for m in midi]
+
+def smooth_midi(midi, frames=SMOOTH_FRAMES):
+    """Centred running median that ignores unvoiced (NaN) frames; unvoiced frames stay NaN."""
+    if frames <= 1 or len(midi) < frames:
+        return midi.copy()
+    half = frames // 2
+    padded = np.pad(midi, half, constant_values=np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(padded, frames)
+    voiced = ~np.isnan(midi)
+    out = np.full_like(midi, np.nan)
+    out[voiced] = np.nanmedian(windows[voiced], axis=1)
+    return out
+
+def _runs(values):
+    """Run-length encoding: (starts, lengths, run values)."""
+    change = np.flatnonzero(values[1:] != values[:-1]) + 1
+    starts = np.concatenate([[0], change])
+    lengths = np.diff(np.concatenate([starts, [len(values)]]))
+    return starts, lengths, values[starts]
+
+def _absorb_short_runs(labels, min_note, min_rest):
+    """Relabels runs that are too short with the label of the run before them (forward fill)."""
+    starts, lengths, vals = _runs(labels)
+    short = np.where(vals >= 0, lengths < min_note, lengths < min_rest)
+    short[0] = False # Nothing before the first run to merge into
+    keep_idx = np.maximum.accumulate(np.where(short, 0, np.arange(len(starts))))
+    return np.repeat(vals[keep_idx], lengths)
+
+class NoteTrack:
+    """
+    Timed note events from segment_notes, stored as parallel arrays.
+    onset / duration in seconds, midi = median fractional MIDI of the note,
+    stability in 0..1 (1 = perfectly steady, 0 = 50+ cents of wobble).
+    """
+    __slots__ = ("onset", "duration", "midi", "cents_std", "stability")
+
+    def __init__(self, onset, duration, midi, cents_std):
+        self.onset = onset
+        self.duration = duration
+        self.midi = midi
+        self.cents_std = cents_std
+        self.stability = np.clip(1.0 - cents_std / 50.0, 0.0, 1.0)
+
+    def __len__(self):
+        return len(self.onset)
+
+    def names(self):
+        return midi_name(np.rint(self.midi))
+
+    def summary(self, limit=8):
+        """First `limit` distinct note names in order of appearance (the old detected_notes text)."""
+        names = self.names()
+        _, first = np.unique(names, return_index=True)
+        return " ".join(names[i] for i in np.sort(first)[:limit])
+
+    def to_list(self):
+        return [
+            {"note": name, "onset": round(float(o), 3), "duration": round(float(d), 3),
+             "midi": round(float(m), 2), "stability": round(float(s), 2)}
+            for name, o, d, m, s in zip(self.names(), self.onset, self.duration, self.midi, self.stability)
+        ]
+
+def segment_notes(f0, hop_seconds, smooth_frames=SMOOTH_FRAMES, min_note_seconds=MIN_NOTE_SECONDS,
+                  min_rest_seconds=MIN_REST_SECONDS):
+    """
+    Segments a whole F0 track (Hz, NaN = unvoiced) into a NoteTrack.
+    1. Hz -> fractional MIDI and median smoothing
+    2. Nearest-semitone labels (-1 = unvoiced), short glides / gaps absorbed
+    3. Run-length encoding into events; median pitch and spread per event via bincount
+    """
+    raw = hz_to_midi(f0)
+    if not len(raw) or np.isnan(raw).all():
+        empty = np.empty(0)
+        return NoteTrack(empty, empty, empty, empty)
+
+    # 1. Smoothed contour
+    midi = smooth_midi(raw, smooth_frames)
+
+    # 2. Semitone labels, with glides and short gaps merged into the previous note
+    labels = np.where(np.isnan(midi), -1, np.rint(np.nan_to_num(midi, nan=-1.0))).astype(np.int64)
+    min_note = max(1, int(round(min_note_seconds / hop_seconds)))
+    min_rest = max(1, int(round(min_rest_seconds / hop_seconds)))
+    labels = _absorb_short_runs(labels, min_note, min_rest)
+
+    # 3. Events = voiced runs; every frame gets the index of the event it belongs to
+    starts, lengths, vals = _runs(labels)
+    voiced_runs = vals >= 0
+    event_of_run = np.cumsum(voiced_runs) - 1
+    run_of_frame = np.repeat(np.arange(len(starts)), lengths)
+    starts, lengths = starts[voiced_runs], lengths[voiced_runs]
+    in_event = labels >= 0
+    values = midi[in_event]
+    run_id = event_of_run[run_of_frame[in_event]]
+    ok = ~np.isnan(values) # Absorbed gaps carry no pitch
+    run_id, values = run_id[ok], values[ok]
+
+    # Median per run: sort by (run, value) and pick the middle element(s) of each run
+    order = np.lexsort((values, run_id))
+    counts = np.bincount(run_id, minlength=len(starts))
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    sorted_vals = values[order]
+    has = counts > 0
+    lo = offsets[has] + (counts[has] - 1) // 2
+    hi = offsets[has] + counts[has] // 2
+    median = np.full(len(starts), np.nan)
+    median[has] = 0.5 * (sorted_vals[lo] + sorted_vals[hi])
+
+    # Spread in cents per run from sums of x and x^2
+    sums = np.bincount(run_id, weights=values, minlength=len(starts))
+    squares = np.bincount(run_id, weights=values * values, minlength=len(starts))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / counts
+        cents_std = 100.0 * np.sqrt(np.maximum(squares / counts - mean * mean, 0.0))
+
+    return NoteTrack(starts[has] * hop_seconds, lengths[has] * hop_seconds, median[has], cents_std[has])
+
+def format_events(events, limit=32):
+    """Compact text of timed notes for LLM prompts, e.g. 'C3@0.0s/0.5s D3@0.8s/0.5s ...'."""
+    parts = [f"{e['note']}@{e['onset']:.1f}s/{e['duration']:.1f}s" for e in events[:limit]]
+    if len(events) > limit:
+        parts.append(f"... (+{len(events) - limit} more)")
+    return " ".join(parts)
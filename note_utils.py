@@ -1,6 +1,6 @@
 # note_utils.py
 import re
-import music21
+from array import array
 
 def sargam_to_western(token):
     """
@@ -33,47 +33,170 @@ def sargam_to_western(token):
             
     return token # Return original if no sargam match
 
-def sanitize_notes(raw_llm_output):
+_PITCH_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+_ACCIDENTALS = {'#': 1, '-': -1, '': 0}
+_SYLLABLES = {'sa': 'C', 're': 'D', 'ga': 'E', 'ma': 'F', 'pa': 'G', 'dha': 'A', 'ni': 'B'}
+
+# Single-letter swaras as written in RAGA_DB: lowercase = komal, M# / m# = tivra Ma
+SWARA_OFFSETS = {
+    'S': 0, 'r': 1, 'R': 2, 'g': 3, 'G': 4, 'm': 5, 'M': 5, 'm#': 6, 'M#': 6,
+    'P': 7, 'd': 8, 'D': 9, 'n': 10, 'N': 11,
+}
+# Spelling used for each semitone above Sa (komal swaras spelled as flats)
+_SEMITONE_NAMES = ('C', 'D-', 'D', 'E-', 'E', 'F', 'F#', 'G', 'A-', 'A', 'B-', 'B')
+
+# Every name the lexer can emit -> MIDI number; validation is a dict lookup
+NOTE_TABLE = {}
+for _step, _pc in _PITCH_CLASSES.items():
+    for _acc, _shift in _ACCIDENTALS.items():
+        for _octave in [''] + [str(o) for o in range(10)]:
+            NOTE_TABLE[f"{_step}{_acc}{_octave}"] = (int(_octave or 4) + 1) * 12 + _pc + _shift
+
+_TOKEN_EDGE = r"""[.;:"']*"""
+_WESTERN = r"(?P<step>[A-G])(?P<acc>[#\-]?)(?P<oct>[0-9]?)"
+_SYLLABLE = r"(?P<syl>(?i:sa|re|ga|ma|pa|dha|ni))(?:[^\s,\d]*(?P<syl_oct>\d+))?[^\s,]*"
+_SWARA = r"(?P<swara>[mM]\#|[SrRgGmMPdDnN])(?P<marks>[_^]*)(?P<sw_oct>[0-9]?)"
+
+def _token_regex(*alternatives):
+    # One alternation per token; anything unrecognised falls through to `junk`
+    body = "|".join(alternatives + (r"(?P<junk>[^\s,]+?)",))
+    return re.compile(rf"(?<![^\s,]){_TOKEN_EDGE}(?:{body}){_TOKEN_EDGE}(?=[\s,]|$)")
+
+# "western": Western letters win (D4 is D, not Dha), as sanitize_notes always did.
+# "sargam": single letters are swaras first (G = Ga, D = Dha), as in RAGA_DB scales.
+_LEXERS = {
+    "western": _token_regex(_WESTERN, _SYLLABLE, _SWARA),
+    "sargam": _token_regex(_SWARA, _SYLLABLE, _WESTERN),
+}
+
+# Whole tokens only one notation can mean: S R M P N, komal letters, M# and
+# octave marks are swaras; A B C E F, flats and G# / D# are Western
+def _whole_token(pattern):
+    return re.compile(rf"(?<![^\s,]){_TOKEN_EDGE}(?:{pattern}){_TOKEN_EDGE}(?=[\s,]|$)")
+
+_SWARA_ONLY = _whole_token(r"(?:[SRPNrgdn]|[mM]\#?|[GD](?=[_^]))[_^]*[0-9]?")
+_WESTERN_ONLY = _whole_token(r"(?:[ABCEF][#\-]?|[GD][#\-])[0-9]?")
+
+def detect_notation(raw_text):
+    """
+    "sargam" if the text is sargam-shaped (some token can only be a swara and
+    none can only be a Western note, e.g. "N_ R G M# D N S"), else "western".
+    """
+    if _SWARA_ONLY.search(raw_text) and not _WESTERN_ONLY.search(raw_text):
+        return "sargam"
+    return "western"
+
+class NoteEvent:
+    """One lexed note: Western name, MIDI number and the raw token it came from."""
+    __slots__ = ("name", "midi", "token")
+
+    def __init__(self, name, midi, token):
+        self.name = name
+        self.midi = midi
+        self.token = token
+
+    def __repr__(self):
+        return f"NoteEvent({self.name!r}, midi={self.midi}, token={self.token!r})"
+
+class NoteSequence:
+    """
+    Compact result of lex_notes: note names plus an array('h') of MIDI numbers.
+    Iterating yields NoteEvent objects on demand.
+    """
+    __slots__ = ("names", "midi", "tokens")
+
+    def __init__(self):
+        self.names = []
+        self.midi = array('h')
+        self.tokens = []
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for name, midi, token in zip(self.names, self.midi, self.tokens):
+            yield NoteEvent(name, midi, token)
+
+    def __getitem__(self, i):
+        return NoteEvent(self.names[i], self.midi[i], self.tokens[i])
+
+    def playable_midi(self):
+        """MIDI numbers inside the 0-127 range, as an array('h')."""
+        return array('h', (m for m in self.midi if 0 <= m <= 127))
+
+def lex_notes(raw_text, notation="auto"):
+    """
+    Single-pass lexer for LLM melody strings.
+    Handles Western notes (C4, D#4, E-4, F), Sargam syllables (Sa4, Dha) and
+    single-letter swaras with komal / tivra / octave marks (r g m# d n, N_ lower, S^ upper).
+    notation is "western", "sargam" or "auto" (detect_notation decides per string).
+    Returns a NoteSequence.
+    """
+    seq = NoteSequence()
+    if not raw_text:
+        return seq
+
+    raw_text = raw_text.replace("’", "")
+    if notation == "auto":
+        notation = detect_notation(raw_text)
+    names, midis, tokens = seq.names, seq.midi, seq.tokens
+    cache = _TOKEN_CACHE[notation]
+    for m in _LEXERS[notation].finditer(raw_text):
+        token = m.group()
+        name = cache.get(token)
+        if name is None:
+            name = _token_name(m)
+            if len(cache) >= _TOKEN_CACHE_SIZE:
+                cache.clear()
+            cache[token] = name
+        if name:
+            names.append(name)
+            midis.append(NOTE_TABLE[name])
+            tokens.append(token)
+    return seq
+
+# Melody strings repeat the same few tokens, so resolved names are memoized
+_TOKEN_CACHE = {notation: {} for notation in _LEXERS}
+_TOKEN_CACHE_SIZE = 4096
+
+def _token_name(m):
+    """Western note name for one lexer match, or '' if the token is not a note."""
+    step = m.group("step")
+    if step:
+        return step + m.group("acc") + m.group("oct")
+    if m.group("syl"):
+        octave = m.group("syl_oct") or "4"
+        if len(octave) > 1:
+            return ""
+        return _SYLLABLES[m.group("syl").lower()] + octave
+    if m.group("swara"):
+        marks = m.group("marks")
+        octave = int(m.group("sw_oct") or 4) + marks.count("^") - marks.count("_")
+        if not 0 <= octave <= 9:
+            return ""
+        return f"{_SEMITONE_NAMES[SWARA_OFFSETS[m.group('swara')]]}{octave}"
+    return ""
+
+def sanitize_notes(raw_llm_output, notation="auto"):
     """
     Parses a messy string from LLM and extracts valid music21 note tokens.
     Handles commas, newlines, and converts Sargam to Western.
     """
-    if not raw_llm_output:
-        return []
+    return lex_notes(raw_llm_output, notation).names
 
-    # 1. Clean basic delimiters
-    clean_text = raw_llm_output.replace(',', ' ').replace('\n', ' ')
-    
-    # 2. Split by whitespace
-    tokens = clean_text.split()
-    
-    valid_notes = []
-    
-    # 3. Regex for valid WESTERN note formats (e.g., C4, D#4, E-4, F)
-    western_pattern = re.compile(r"^[A-G][#\-]?[0-9]?$")
-
-    for token in tokens:
-        clean_token = token.strip(".,;:\"'").replace("’", "")
-        
-        # Try converting Sargam first
-        translated_token = sargam_to_western(clean_token)
-        
-        if western_pattern.match(translated_token):
-            valid_notes.append(translated_token)
-        else:
-            # Only print warning if it's NOT a valid note
-            pass 
-
-    return valid_notes
+def midi_to_note(midi):
+    """MIDI number -> note name in the lexer's spelling (flats for komal swaras), e.g. 61 -> 'D-4'."""
+    return f"{_SEMITONE_NAMES[int(midi) % 12]}{int(midi) // 12 - 1}"
+
+def note_to_midi(note_name):
+    """
+    Converts a sanitized Western note (e.g. 'C4', 'D#4', 'E-4', 'F') to a MIDI number.
+    Notes without an octave default to octave 4, same as music21.
+    Returns None if the token is not a playable MIDI pitch.
+    """
+    midi = NOTE_TABLE.get(note_name)
+    return midi if midi is not None and 0 <= midi <= 127 else None
 
 def validate_stream_compatibility(note_list):
-    """Final check to ensure music21 can actually parse the list."""
-    playable_notes = []
-    for n in note_list:
-        try:
-            # Test instantiation
-            _ = music21.note.Note(n)
-            playable_notes.append(n)
-        except:
-            continue
-    return playable_notes
\ No newline at end of file
+    """Final check to ensure every note maps to a playable MIDI pitch (table lookup, no music21)."""
+    return [n for n in note_list if note_to_midi(n) is not None]
@@ -0,0 +1,109 @@
+# pitch_monitor.py
+"""
+Live pitch feedback: audio chunks go into a ring buffer and every hop emits
+the current pitch, the nearest swara of the selected raga and the cent error.
+Works with plain iterables of chunks (run) or asyncio streams (arun).
+"""
+import time
+import numpy as np
+from pitch_tracking import FMIN, FMAX, yin_lags, yin_frames
+from raga_index import get_raga_index, voice_root_midi, SWARA_NAMES
+
+def live_frame_length(sr, fmin=FMIN):
+    """Shortest power-of-two frame that still resolves `fmin` (1024 at 22.05 kHz, 2048 at 48 kHz)."""
+    return 1 << int(np.ceil(np.log2(2 * np.ceil(sr / fmin) + 2)))
+
+class PitchReading:
+    """One hop of live feedback. f0 / midi / cents are None while the singer is silent."""
+    __slots__ = ("time", "f0", "midi", "swara", "cents", "confidence", "latency_ms")
+
+    def __init__(self, time, f0, midi, swara, cents, confidence, latency_ms):
+        self.time = time
+        self.f0 = f0
+        self.midi = midi
+        self.swara = swara
+        self.cents = cents
+        self.confidence = confidence
+        self.latency_ms = latency_ms
+
+    def __repr__(self):
+        if self.f0 is None:
+            return f"PitchReading(t={self.time:.3f}, unvoiced)"
+        return f"PitchReading(t={self.time:.3f}, {self.f0:.1f} Hz, {self.swara} {self.cents:+.0f}c)"
+
+class PitchMonitor:
+    """
+    Incremental pitch tracker for live singing.
+    Keeps the last `frame_length` samples in a ring buffer and runs one YIN frame
+    per hop on the newest samples (causal: a reading describes the last frame,
+    so it trails the audio by frame_length / 2).
+    """
+    def __init__(self, raga_name, voice_type="Male", sr=22050, hop_length=256, frame_length=None,
+                 threshold=0.1, fmin=FMIN, fmax=FMAX):
+        self.sr = sr
+        self.hop_length = hop_length
+        self.frame_length = frame_length or live_frame_length(sr, fmin)
+        self.threshold = threshold
+        self.win, self.tau_min, self.tau_max, _ = yin_lags(sr, fmin, fmax, self.frame_length)
+        self.raga = get_raga_index(raga_name)
+        self.root_midi = voice_root_midi(voice_type)
+
+        self._ring = np.zeros(self.frame_length, dtype=np.float32)
+        self._pos = 0 # Next write index in the ring
+        self._pending = 0 # Samples received since the last hop
+        self._samples = 0
+
+    def reset(self):
+        self._ring[:] = 0.0
+        self._pos = self._pending = self._samples = 0
+
+    def _write(self, samples):
+        n = len(samples)
+        end = self._pos + n
+        if end <= self.frame_length:
+            self._ring[self._pos:end] = samples
+        else:
+            split = self.frame_length - self._pos
+            self._ring[self._pos:] = samples[:split]
+            self._ring[:n - split] = samples[split:]
+        self._pos = end % self.frame_length
+
+    def _reading(self, started):
+        frame = np.concatenate([self._ring[self._pos:], self._ring[:self._pos]])[None, :]
+        f0, prob = yin_frames(frame, self.sr, self.win, self.tau_min, self.tau_max, self.threshold)
+        f0, prob = float(f0[0]), float(prob[0])
+        t = (self._samples - self.frame_length / 2) / self.sr
+        if np.isnan(f0):
+            return PitchReading(t, None, None, None, None, prob, 1000 * (time.perf_counter() - started))
+        midi = 69.0 + 12.0 * np.log2(f0 / 440.0)
+        snapped, cents = self.raga.quantize_midi(midi, self.root_midi)
+        swara = SWARA_NAMES[int(round(float(snapped) - self.root_midi)) % 12]
+        return PitchReading(t, f0, midi, swara, float(cents), prob, 1000 * (time.perf_counter() - started))
+
+    def push(self, samples):
+        """Feeds one chunk of mono samples (any length); returns the readings for the hops it completed."""
+        started = time.perf_counter()
+        samples = np.asarray(samples, dtype=np.float32)
+        readings = []
+        while len(samples):
+            take = min(len(samples), self.hop_length - self._pending, self.frame_length)
+            self._write(samples[:take])
+            samples = samples[take:]
+            self._pending += take
+            self._samples += take
+            if self._pending == self.hop_length:
+                self._pending = 0
+                readings.append(self._reading(started))
+                started = time.perf_counter()
+        return readings
+
+    def run(self, chunks):
+        """Generator: yields a PitchReading per hop for an iterable of sample chunks."""
+        for chunk in chunks:
+            yield from self.push(chunk)
+
+    async def arun(self, chunks):
+        """Async generator over an async iterable of sample chunks (e.g. a websocket or mic queue)."""
+        async for chunk in chunks:
+            for reading in self.push(chunk):
+                yield reading
@@ -0,0 +1,147 @@
+# pitch_tracking.py
+import numpy as np
+
+# Same default search range as the pyin call in AudioAnalyzer (C2 - C6)
+FMIN = 65.406
+FMAX = 1046.502
+
+def frame_signal(y, frame_length, hop_length, center=True):
+    """(n_frames, frame_length) strided view of y; center=True zero-pads half a frame each side."""
+    y = np.asarray(y, dtype=np.float32)
+    if center:
+        y = np.pad(y, frame_length // 2)
+    if len(y) < frame_length:
+        y = np.pad(y, (0, frame_length - len(y)))
+    n_frames = 1 + (len(y) - frame_length) // hop_length
+    return np.lib.stride_tricks.as_strided(
+        y, shape=(n_frames, frame_length), strides=(y.strides[0] * hop_length, y.strides[0]), writeable=False
+    )
+
+def _cmnd(frames, win, tau_max):
+    """
+    Cumulative mean normalized difference (YIN step 3) for a batch of frames.
+    The difference function d(tau) = E(0) + E(tau) - 2 r(tau) is built from an
+    FFT cross-correlation, so each frame costs O(N log N) instead of O(N * tau).
+    """
+    n_fft = 1 << int(np.ceil(np.log2(frames.shape[1] + win)))
+    spec = np.fft.rfft(frames, n=n_fft, axis=1)
+    head = np.fft.rfft(frames[:, :win], n=n_fft, axis=1)
+    r = np.fft.irfft(spec * np.conj(head), n=n_fft, axis=1)[:, :tau_max + 1]
+
+    power = np.cumsum(np.square(frames, dtype=np.float64), axis=1)
+    power = np.concatenate([np.zeros((len(frames), 1)), power], axis=1)
+    taus = np.arange(tau_max + 1)
+    energy = power[:, taus + win] - power[:, taus] # E(tau) = sum x[tau : tau + win]^2
+
+    diff = energy[:, :1] + energy - 2.0 * r
+    np.maximum(diff, 0.0, out=diff)
+    cumulative = np.cumsum(diff[:, 1:], axis=1)
+    cmnd = np.ones_like(diff)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmnd[:, 1:] = diff[:, 1:] * taus[1:] / cumulative
+    cmnd[~np.isfinite(cmnd)] = 1.0
+    return cmnd
+
+def yin_lags(sr, fmin=FMIN, fmax=FMAX, frame_length=2048):
+    """
+    Lag search range for YIN: (win, tau_min, tau_max, lead).
+    `lead` is the padding that centres the compared samples (win + tau_max) on t = i * hop.
+    """
+    win = frame_length // 2
+    tau_min = max(2, int(np.floor(sr / fmax)))
+    tau_max = min(int(np.ceil(sr / fmin)), frame_length - win - 1)
+    if tau_max <= tau_min + 1:
+        raise ValueError("frame_length is too short for the requested fmin")
+    return win, tau_min, tau_max, (win + tau_max) // 2
+
+def yin_frames(frames, sr, win, tau_min, tau_max, threshold=0.1, batch_frames=256):
+    """YIN over an (n_frames, frame_length) array; returns (f0, voiced_prob)."""
+    n_frames = len(frames)
+    f0 = np.full(n_frames, np.nan)
+    voiced_prob = np.zeros(n_frames)
+    rows = np.arange(min(batch_frames, n_frames))
+
+    for start in range(0, n_frames, batch_frames):
+        batch = frames[start:start + batch_frames]
+        cmnd = _cmnd(batch, win, tau_max)
+        d = cmnd[:, tau_min:tau_max + 1]
+        idx = rows[:len(batch)]
+
+        # First local minimum under the threshold; otherwise the global minimum, unvoiced
+        trough = np.zeros_like(d, dtype=bool)
+        trough[:, 1:-1] = (d[:, 1:-1] <= d[:, :-2]) & (d[:, 1:-1] < d[:, 2:])
+        candidates = trough & (d < threshold)
+        voiced = candidates.any(axis=1)
+        best = np.where(voiced, np.argmax(candidates, axis=1), np.argmin(d, axis=1))
+
+        # Parabolic interpolation around the chosen lag
+        left = d[idx, np.maximum(best - 1, 0)]
+        centre = d[idx, best]
+        right = d[idx, np.minimum(best + 1, d.shape[1] - 1)]
+        denom = left - 2.0 * centre + right
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shift = np.where(np.abs(denom) > 1e-12, 0.5 * (left - right) / denom, 0.0)
+        shift = np.clip(shift, -1.0, 1.0)
+
+        period = tau_min + best + shift
+        out = slice(start, start + len(batch))
+        f0[out] = np.where(voiced, sr / period, np.nan)
+        voiced_prob[out] = np.clip(1.0 - centre, 0.0, 1.0)
+    return f0, voiced_prob
+
+def yin(y, sr, fmin=FMIN, fmax=FMAX, frame_length=2048, hop_length=512,
+        threshold=0.1, center=True, batch_frames=256):
+    """
+    Vectorized YIN f0 estimator, batched over frames.
+
+    Returns (f0, voiced_flag, voiced_prob) like librosa.pyin: f0 is NaN on unvoiced
+    frames, voiced_prob is 1 - the normalized difference at the chosen lag.
+    `threshold` is the YIN aperiodicity threshold; lower is stricter voicing.
+    """
+    win, tau_min, tau_max, lead = yin_lags(sr, fmin, fmax, frame_length)
+    if center:
+        y = np.pad(np.asarray(y, dtype=np.float32), (lead, frame_length - lead))
+    frames = frame_signal(y, frame_length, hop_length, center=False)
+    f0, voiced_prob = yin_frames(frames, sr, win, tau_min, tau_max, threshold, batch_frames)
+    return f0, ~np.isnan(f0), voiced_prob
+
+class StreamingYin:
+    """
+    Incremental YIN for audio that arrives in blocks.
+    Carries the unfinished tail between calls, so the concatenated output of
+    process(...) + flush() equals yin() on the whole signal, in constant memory.
+    """
+    def __init__(self, sr, fmin=FMIN, fmax=FMAX, frame_length=2048, hop_length=512, threshold=0.1):
+        self.sr = sr
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.threshold = threshold
+        self.win, self.tau_min, self.tau_max, self.lead = yin_lags(sr, fmin, fmax, frame_length)
+        self._tail = np.zeros(self.lead, dtype=np.float32)
+        self._samples = 0 # Real samples seen so far
+        self._frames = 0 # Frames emitted so far
+
+    def _run(self, buf, limit=None):
+        n_frames = 0 if len(buf) < self.frame_length else 1 + (len(buf) - self.frame_length) // self.hop_length
+        if limit is not None:
+            n_frames = max(0, min(n_frames, limit - self._frames))
+        if n_frames == 0:
+            self._tail = buf
+            return np.empty(0), np.empty(0, dtype=bool), np.empty(0)
+        used = (n_frames - 1) * self.hop_length + self.frame_length
+        frames = frame_signal(buf[:used], self.frame_length, self.hop_length, center=False)
+        f0, prob = yin_frames(frames, self.sr, self.win, self.tau_min, self.tau_max, self.threshold)
+        self._tail = buf[n_frames * self.hop_length:].copy()
+        self._frames += n_frames
+        return f0, ~np.isnan(f0), prob
+
+    def process(self, samples):
+        """Feeds a block of mono samples; returns (f0, voiced_flag, voiced_prob) for completed frames."""
+        samples = np.asarray(samples, dtype=np.float32)
+        self._samples += len(samples)
+        return self._run(np.concatenate([self._tail, samples]))
+
+    def flush(self):
+        """Pads the end of the stream and returns the remaining frames (same count as center=True)."""
+        pad = np.zeros(self.frame_length - self.lead, dtype=np.float32)
+        return self._run(np.concatenate([self._tail, pad]), limit=1 + self._samples // self.hop_length)
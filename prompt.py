@@ -25,6 +25,8 @@ Voice Type: {voice_type}
 🔍 AUDIO ANALYSIS (If Input is Audio):
 Detected Notes: {detected_notes}
 Pitch Accuracy: {pitch_accuracy}
+Reference Melody: {reference_notes}
+Weakest Notes (note, cents off, timing): {note_feedback}
 
 OUTPUT FORMAT (JSON STRICT):
 If analyzing performance, use this structure:
@@ -65,8 +67,8 @@ OUTPUT FORMAT (JSON ONLY, NO MARKDOWN):
   "raga": "{raga_name}",
   "root_note": "{voice['root']}",
   "alaap": ["Line 1 notes...", "Line 2..."],
-  "lyrics": ["Verse Line 1", "Verse Line 2", "Chorus Line 1", "Chorus Line 2"],
   "melody_main": ["Notes Line 1", "Notes Line 2", "Notes Line 3", "Notes Line 4"],
+  "lyrics": ["Verse Line 1", "Verse Line 2", "Chorus Line 1", "Chorus Line 2"],
   "meta_emotion": "{mood}"
 }}}}
 """
\ No newline at end of file
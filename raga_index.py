@@ -0,0 +1,153 @@
+# raga_index.py
+import re
+import numpy as np
+from note_utils import lex_notes, detect_notation, note_to_midi, NOTE_TABLE
+from raga_knowledge import RAGA_DB, VOICE_RANGES
+
+VADI_WEIGHT = 2.0
+SAMVADI_WEIGHT = 1.5
+
+# Swara name per semitone above Sa (komal swaras lowercase, tivra Ma as "Ma#")
+SWARA_NAMES = ("Sa", "re", "Re", "ga", "Ga", "ma", "Ma#", "Pa", "dha", "Dha", "ni", "Ni")
+
+def _pitch_classes(scale_text):
+    """RAGA_DB scale string ("N_ R G M# D N S") -> pitch classes above Sa, in order."""
+    return [m % 12 for m in lex_notes(scale_text, notation="sargam").midi]
+
+def _moves(sequence):
+    """
+    12x12 transition table for one direction of movement, by pitch class.
+    The aroha/avaroha repeats in every octave, so a move a -> b in that
+    direction is allowed whenever b is one of its swaras (Sa -> Re and
+    Ni -> Sa^ included, whichever end of the written scale they sit at);
+    repeating a note is always allowed.
+    """
+    table = np.eye(12, dtype=bool)
+    table[:, sorted(set(sequence))] = True
+    return table
+
+def _western_pc(label):
+    """Pitch class of the Western note in brackets, e.g. 'Dha (Ab)' -> 8."""
+    match = re.search(r"\(([A-G])([b#]?)\)", label or "")
+    if not match:
+        return None
+    step, accidental = match.groups()
+    return NOTE_TABLE[step + {"b": "-", "#": "#", "": ""}[accidental] + "4"] % 12
+
+class RagaIndex:
+    """
+    Compiled form of one RAGA_DB entry, built once at import.
+    mask    : 12-bit int, bit k set if the swara k semitones above Sa is allowed
+    allowed : sorted np.array of allowed semitone offsets
+    aroha_moves / avaroha_moves : 12x12 bool transition tables (ascending / descending)
+    weights : per pitch class weight (0 = not in raga, vadi / samvadi emphasized), used by intonation_score
+    """
+    __slots__ = ("name", "mask", "allowed", "aroha_moves", "avaroha_moves", "weights", "_snap_grid")
+
+    def __init__(self, name, entry):
+        aroha = _pitch_classes(entry["aroha"])
+        avaroha = _pitch_classes(entry["avaroha"])
+        pcs = sorted(set(aroha) | set(avaroha) | set(_pitch_classes(entry.get("pakad", ""))))
+
+        self.name = name
+        self.mask = sum(1 << pc for pc in pcs)
+        self.allowed = np.array(pcs, dtype=np.float64)
+        self.aroha_moves = _moves(aroha)
+        self.avaroha_moves = _moves(avaroha)
+
+        self.weights = np.zeros(12)
+        self.weights[pcs] = 1.0
+        samvadi, vadi = _western_pc(entry.get("samvadi")), _western_pc(entry.get("vadi"))
+        if samvadi is not None: self.weights[samvadi] = SAMVADI_WEIGHT
+        if vadi is not None: self.weights[vadi] = VADI_WEIGHT
+
+        # Allowed offsets plus their neighbours an octave down / up, for nearest-swara search
+        self._snap_grid = np.concatenate([self.allowed[-1:] - 12, self.allowed, self.allowed[:1] + 12])
+
+    def contains(self, pitch_class):
+        return bool(self.mask >> (int(pitch_class) % 12) & 1)
+
+    def quantize_midi(self, midi, root_midi):
+        """
+        Snaps (fractional) MIDI values to the nearest allowed swara above `root_midi` (Sa).
+        Works on whole arrays in one call; NaN (unvoiced) stays NaN.
+        Returns (snapped_midi, cents_error).
+        """
+        midi = np.asarray(midi, dtype=np.float64)
+        rel = midi - root_midi
+        octave = np.floor(rel / 12.0)
+        within = rel - 12.0 * octave
+        grid = self._snap_grid
+        hi = np.clip(np.searchsorted(grid, within), 1, len(grid) - 1)
+        lo = hi - 1
+        nearest = np.where(within - grid[lo] <= grid[hi] - within, grid[lo], grid[hi])
+        snapped = root_midi + 12.0 * octave + nearest
+        return snapped, (midi - snapped) * 100.0
+
+    def quantize_hz(self, f0, root_midi):
+        """Same as quantize_midi for f0 arrays in Hz. Returns (snapped_hz, cents_error)."""
+        f0 = np.asarray(f0, dtype=np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            midi = 69.0 + 12.0 * np.log2(f0 / 440.0)
+        midi[~(f0 > 0)] = np.nan
+        snapped, cents = self.quantize_midi(midi, root_midi)
+        return 440.0 * 2.0 ** ((snapped - 69.0) / 12.0), cents
+
+    def conformance(self, midi, root_midi, tolerance_cents=50.0):
+        """
+        Vectorized raga check for a pitch sequence.
+        in_scale    : share of (voiced) pitches within tolerance of an allowed swara
+        transitions : share of note-to-note moves that follow aroha / avaroha
+        """
+        midi = np.asarray(midi, dtype=np.float64)
+        midi = midi[~np.isnan(midi)]
+        if not len(midi):
+            return {"in_scale": 0.0, "transitions": 0.0}
+
+        snapped, cents = self.quantize_midi(midi, root_midi)
+        in_scale = float(np.mean(np.abs(cents) <= tolerance_cents))
+
+        pcs = np.mod(np.rint(snapped - root_midi), 12).astype(np.int64)
+        steps = np.diff(np.rint(snapped))
+        a, b = pcs[:-1], pcs[1:]
+        ok = np.where(steps > 0, self.aroha_moves[a, b], np.where(steps < 0, self.avaroha_moves[a, b], True))
+        transitions = float(np.mean(ok)) if len(ok) else 1.0
+        return {"in_scale": in_scale, "transitions": transitions}
+
+    def weighted_cents(self, midi, root_midi):
+        """
+        (sum of weighted |cents| to the nearest swara, sum of weights) over voiced
+        MIDI values; frames on the vadi / samvadi count more. Sums, so blocks add up.
+        """
+        midi = np.asarray(midi, dtype=np.float64)
+        midi = midi[~np.isnan(midi)]
+        snapped, cents = self.quantize_midi(midi, root_midi)
+        weights = self.weights[np.mod(np.rint(snapped - root_midi), 12).astype(np.int64)]
+        return float(np.dot(weights, np.abs(cents))), float(weights.sum())
+
+RAGA_INDEX = {name: RagaIndex(name, entry) for name, entry in RAGA_DB.items()}
+
+def intonation_points(mean_cents):
+    """0 cents mean error to the nearest swara -> 100, a quarter tone (50 cents) or worse -> 0."""
+    return int(round(max(0.0, 100.0 - 2.0 * mean_cents)))
+
+def get_raga_index(raga_name):
+    """Compiled index for a raga, falling back to Yaman like the prompt builder does."""
+    return RAGA_INDEX.get(raga_name, RAGA_INDEX["Yaman"])
+
+def voice_root_midi(voice_type):
+    """MIDI number of Sa for a VOICE_RANGES entry (Male: C3, Female: G3)."""
+    voice = VOICE_RANGES.get(voice_type, VOICE_RANGES["Male"])
+    return note_to_midi(voice["root"])
+
+def melody_midi(raw_text, root_midi):
+    """
+    Playable MIDI numbers of a melody string, read relative to `root_midi` (Sa):
+    swaras are placed above the root's pitch class (S = G4 for a G3 root),
+    Western notes are kept as written.
+    """
+    notation = detect_notation(raw_text or "")
+    midi = np.array(lex_notes(raw_text or "", notation).playable_midi(), dtype=np.int64)
+    if notation == "sargam":
+        midi += int(root_midi) % 12
+    return midi
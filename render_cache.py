@@ -0,0 +1,151 @@
+# render_cache.py
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bump when the bytes rendered for the same MIDI notes change, so stale renders are ignored
+# (2: "midi" entries are smf.py bytes, not music21 exports). Lexer changes need no bump:
+# keys hash the lexed MIDI numbers, so a string that now lexes differently gets a new key.
+CACHE_VERSION = 2
+
+def render_key(kind, notes, **params):
+    """
+    Content address for a render: hash of the normalized note sequence
+    (MIDI numbers, so 'Sa4' and 'C4' share an entry) plus the render parameters.
+    """
+    payload = json.dumps(
+        {"v": CACHE_VERSION, "kind": kind, "notes": [int(n) for n in notes], "params": params},
+        sort_keys=True, separators=(",", ":")
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """
+    Two-tier cache for rendered WAV/MIDI bytes.
+    Tier 1 is an in-memory LRU, tier 2 is a directory of files evicted oldest-first.
+    Both tiers are capped by total bytes.
+    """
+    def __init__(self, cache_dir, max_memory_bytes=64 * 2**20, max_disk_bytes=512 * 2**20):
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+        self._disk_bytes = sum(size for _, _, size in self._disk_entries())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def _disk_entries(self):
+        """(mtime, path, size) for every cached file."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+                entries.append((st.st_mtime, path, st.st_size))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def get(self, key):
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return data
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path) # Refresh recency for disk eviction
+        except FileNotFoundError:
+            with self._lock:
+                self.counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self.counters["disk_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        if not data:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        existed = os.path.exists(path)
+        os.replace(tmp, path) # Atomic, so concurrent sessions never read half a file
+
+        with self._lock:
+            self._remember(key, data)
+            if not existed:
+                self._disk_bytes += len(data)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict_disk()
+
+    def _remember(self, key, data):
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.counters["evictions"] += 1
+
+    def _evict_disk(self):
+        entries = sorted(self._disk_entries())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.counters["evictions"] += 1
+        self._disk_bytes = total
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, memory_bytes=self._memory_bytes,
+                        memory_entries=len(self._memory), disk_bytes=self._disk_bytes)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+            for _, path, _ in self._disk_entries():
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._disk_bytes = 0
+
+_CACHES = {}
+_CACHES_LOCK = threading.Lock()
+
+def get_render_cache(output_dir="generated_music"):
+    """Process-wide cache per output directory, shared by every MusicEngine."""
+    cache_dir = os.path.join(output_dir, "render_cache")
+    with _CACHES_LOCK:
+        cache = _CACHES.get(cache_dir)
+        if cache is None:
+            cache = _CACHES[cache_dir] = RenderCache(cache_dir)
+        return cache
@@ -0,0 +1,90 @@
+# rerun_profile.py
+"""
+Per-section timing of Streamlit script reruns. Every rerun of app.py times
+its sections and adds them to a process-wide rolling history, so the
+per-interaction server cost can be read off (and bounded) while using the app:
+
+    run = get_rerun_profile().start()
+    with run.section("composer"):
+        ...
+    run.finish()
+    get_rerun_profile().summary()  # {"composer": {"p50_ms": ..., "p95_ms": ...}, "total": {...}}
+
+Open the app with ?profile=1 (or APP_PROFILE=1) to show the table in the page.
+RERUN_BUDGET_MS (default 100) flags reruns whose total exceeds it.
+"""
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+RERUN_BUDGET_MS = float(os.getenv("RERUN_BUDGET_MS", "100"))
+
+class RerunTimer:
+    """Timings of one rerun; sections may nest (a parent's time includes its children)."""
+    def __init__(self, profile):
+        self.profile = profile
+        self.timings = {}
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def section(self, name):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + 1000 * (time.perf_counter() - t0)
+
+    def finish(self):
+        """Records this rerun; returns its total in milliseconds."""
+        self.timings["total"] = 1000 * (time.perf_counter() - self.start)
+        self.profile.record(self.timings)
+        return self.timings["total"]
+
+class RerunProfile:
+    """Rolling history of the last `history` reruns per section."""
+    def __init__(self, history=200, budget_ms=RERUN_BUDGET_MS):
+        self.budget_ms = budget_ms
+        self.runs = 0
+        self.over_budget = 0
+        self._history = {}
+        self._size = history
+        self._lock = threading.Lock()
+
+    def start(self):
+        return RerunTimer(self)
+
+    def record(self, timings):
+        with self._lock:
+            self.runs += 1
+            self.over_budget += timings["total"] > self.budget_ms
+            for name, ms in timings.items():
+                self._history.setdefault(name, deque(maxlen=self._size)).append(ms)
+
+    def summary(self):
+        """{section: {"n", "last_ms", "p50_ms", "p95_ms", "max_ms"}}, slowest p95 first."""
+        with self._lock:
+            history = {name: list(values) for name, values in self._history.items()}
+        rows = {}
+        for name, values in history.items():
+            ordered = sorted(values)
+            rows[name] = {
+                "n": len(values),
+                "last_ms": round(values[-1], 2),
+                "p50_ms": round(ordered[len(ordered) // 2], 2),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))], 2),
+                "max_ms": round(ordered[-1], 2),
+            }
+        return dict(sorted(rows.items(), key=lambda item: -item[1]["p95_ms"]))
+
+_PROFILE = {}
+_PROFILE_LOCK = threading.Lock()
+
+def get_rerun_profile():
+    """Process-wide profile shared by every session."""
+    with _PROFILE_LOCK:
+        profile = _PROFILE.get("default")
+        if profile is None:
+            profile = _PROFILE["default"] = RerunProfile()
+        return profile
@@ -0,0 +1,66 @@
+# smf.py
+import struct
+
+TICKS_PER_BEAT = 480
+
+def encode_vlq(value):
+    """Standard MIDI File variable-length quantity (7 bits per byte, MSB = continue)."""
+    if value < 0:
+        raise ValueError("Delta time cannot be negative")
+    out = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    out.reverse()
+    return bytes(out)
+
+class MidiTrack:
+    """
+    One MTrk chunk: a named instrument on a single channel.
+    Events are collected with absolute tick times and delta-encoded on write.
+    """
+    def __init__(self, name="", program=0, channel=0):
+        self.name = name
+        self.program = program
+        self.channel = channel
+        self._events = [] # (tick, order, raw bytes); note-offs sort before note-ons
+
+    def add_note(self, pitch, start_tick, duration_ticks, velocity=90):
+        status = self.channel & 0x0F
+        self._events.append((start_tick, 1, bytes([0x90 | status, pitch & 0x7F, velocity & 0x7F])))
+        self._events.append((start_tick + duration_ticks, 0, bytes([0x80 | status, pitch & 0x7F, 0])))
+
+    def add_notes(self, pitches, durations_beats, start_beat=0.0, velocity=90, ticks_per_beat=TICKS_PER_BEAT):
+        """Appends a monophonic line; durations are in beats (quarter notes)."""
+        tick = int(round(start_beat * ticks_per_beat))
+        for pitch, beats in zip(pitches, durations_beats):
+            length = int(round(float(beats) * ticks_per_beat))
+            self.add_note(int(pitch), tick, length, velocity)
+            tick += length
+
+    def encode(self):
+        data = bytearray()
+        if self.name:
+            name = self.name.encode("latin-1", "replace")
+            data += b"\x00\xFF\x03" + encode_vlq(len(name)) + name
+        data += bytes([0x00, 0xC0 | (self.channel & 0x0F), self.program & 0x7F])
+        last = 0
+        for tick, _, raw in sorted(self._events, key=lambda e: (e[0], e[1])):
+            data += encode_vlq(tick - last) + raw
+            last = tick
+        data += b"\x00\xFF\x2F\x00"
+        return b"MTrk" + struct.pack(">I", len(data)) + bytes(data)
+
+def tempo_track(bpm):
+    """Conductor track carrying the tempo (microseconds per quarter) and 4/4 meter."""
+    usec = int(round(60_000_000 / bpm))
+    data = (b"\x00\xFF\x58\x04\x04\x02\x18\x08"
+            + b"\x00\xFF\x51\x03" + usec.to_bytes(3, "big")
+            + b"\x00\xFF\x2F\x00")
+    return b"MTrk" + struct.pack(">I", len(data)) + data
+
+def write_smf(tracks, bpm=60, ticks_per_beat=TICKS_PER_BEAT):
+    """Encodes a format-1 Standard MIDI File (tempo track + one track per part) to bytes."""
+    header = b"MThd" + struct.pack(">IHHH", 6, 1, len(tracks) + 1, ticks_per_beat)
+    return header + tempo_track(bpm) + b"".join(t.encode() for t in tracks)
@@ -0,0 +1,357 @@
+# song_catalog.py
+"""
+Bulk song generation: composes a catalog of songs (every raga x mood x voice
+by default) with BollywoodComposer and renders each one with MusicEngine.
+
+    python song_catalog.py -o catalog/                          # full RAGA_DB x moods x voices
+    python song_catalog.py -o catalog/ --ragas Yaman Bhairav --variants 3 --rpm 30 --tpm 6000
+    python song_catalog.py -o catalog/ --fake                   # offline dry run (fake_llm)
+
+LLM calls run on a thread pool behind a token-bucket limiter sized to the
+provider's requests-per-minute and tokens-per-minute quotas, with retry and
+exponential backoff. Finished songs go straight to a process pool for
+rendering, so CPU synthesis overlaps the network waits of later songs.
+Every finished job is appended to out_dir/manifest.jsonl; rerunning the same
+command skips jobs that are already done.
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from raga_knowledge import RAGA_DB, VOICE_RANGES
+from prompt import get_composer_prompt
+
+MOODS = ("Mechanical", "Dark", "Ethereal", "Aggressive") # Same choices as the composer tab
+PROMPT_TEMPLATE = "Bollywood song in Raag {raga} with a {mood} mood, {angle} (take {variant})"
+# Story angle per variant, so the variants of one raga / mood / voice ask for different songs
+ANGLES = ("a song of first love", "a song of separation", "a monsoon song", "a wedding song",
+          "a lullaby", "a song of devotion", "a journey song", "a song of homecoming")
+REPLY_TOKENS = 700 # Budgeted completion size for one song reply (prompt tokens are estimated)
+
+# 1. Rate limiting
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` units per second up to `burst` (default: one minute's worth).
+    reserve() debits immediately and returns how long the caller must wait before
+    using the units, so concurrent callers queue up in arrival order.
+    """
+    def __init__(self, per_minute, burst=None, clock=time.monotonic):
+        self.rate = per_minute / 60.0
+        self.capacity = float(burst or per_minute)
+        self.level = self.capacity
+        self.clock = clock
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount=1.0):
+        with self._lock:
+            self._refill()
+            self.level -= amount
+            return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount):
+        """Gives back units that were reserved but not used (negative amount debits more)."""
+        with self._lock:
+            self._refill()
+            self.level = min(self.capacity, self.level + amount)
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute buckets; None disables a limit."""
+    def __init__(self, rpm=30, tpm=6000, burst_requests=None):
+        self.requests = TokenBucket(rpm, burst_requests) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, tokens):
+        """Blocks until one request of about `tokens` tokens fits both quotas; returns the wait."""
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.reserve(tokens))
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    def settle(self, estimated, actual):
+        """Corrects the token bucket once the real size of a reply is known."""
+        if self.tokens is not None:
+            self.tokens.refund(estimated - actual)
+
+def estimate_tokens(text):
+    """Rough token count (~4 characters per token for English / Hinglish)."""
+    return max(1, len(text) // 4)
+
+# 2. Jobs and manifest
+def catalog_jobs(ragas=None, moods=MOODS, voices=None, variants=1, template=PROMPT_TEMPLATE):
+    """
+    One {"id", "raga", "mood", "voice", "prompt"} job per raga x mood x voice x variant.
+    Each variant gets its own angle (ANGLES, cycled) and take number in the prompt.
+    """
+    jobs = []
+    for raga in ragas or list(RAGA_DB):
+        for mood in moods:
+            for voice in voices or list(VOICE_RANGES):
+                for variant in range(variants):
+                    jobs.append({
+                        "id": f"{raga}-{mood}-{voice}-{variant}".lower(),
+                        "raga": raga, "mood": mood, "voice": voice,
+                        "prompt": template.format(raga=raga, mood=mood.lower(), voice=voice, variant=variant + 1,
+                                                  angle=ANGLES[variant % len(ANGLES)]),
+                    })
+    return jobs
+
+class Manifest:
+    """
+    Append-only JSONL record of finished jobs (one line per job, last line wins).
+    A line cut short by a crash is ignored on load, so that job simply runs again.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.entries[entry["id"]] = entry
+
+    def done(self):
+        return {job_id for job_id, entry in self.entries.items() if entry["status"] == "done"}
+
+    def record(self, entry):
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            self.entries[entry["id"]] = entry
+
+def _write_atomic(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+# 3. LLM stage (threads)
+_RETRY_AFTER = re.compile(r"try again in (?:(\d+)m)?([\d.]+)s", re.IGNORECASE)
+
+def _retry_delay(error, attempt, base_delay, max_delay):
+    """Provider hint ("Please try again in 1.5s") if present, else exponential backoff with jitter."""
+    m = _RETRY_AFTER.search(error)
+    if m:
+        return float(m.group(1) or 0) * 60 + float(m.group(2))
+    return min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+def compose_job(composer, limiter, job, max_attempts=4, base_delay=2.0, max_delay=60.0):
+    """
+    Generates one song, retrying failed calls and unparseable replies (with a fresh
+    sample) up to `max_attempts` times. Returns (song, stats).
+    """
+    estimate = estimate_tokens(get_composer_prompt(job["prompt"], job["mood"], job["raga"], job["voice"])) \
+        + REPLY_TOKENS
+    stats = {"attempts": 0, "rate_wait_s": 0.0, "backoff_s": 0.0, "llm_s": 0.0}
+    song = {"error": "not attempted"}
+    for attempt in range(max_attempts):
+        stats["attempts"] += 1
+        stats["rate_wait_s"] += limiter.acquire(estimate)
+        start = time.perf_counter()
+        song = composer.generate_full_song(job["prompt"], job["mood"], job["raga"], job["voice"],
+                                           fresh=attempt > 0)
+        stats["llm_s"] += time.perf_counter() - start
+        if "error" not in song:
+            limiter.settle(estimate, estimate - REPLY_TOKENS + estimate_tokens(json.dumps(song)))
+            break
+        # A failed call produced no reply, so only the prompt is charged; an unparseable reply
+        # was generated in full and keeps its reservation
+        if song["error"].startswith("Critical Failure"):
+            limiter.settle(estimate, estimate - REPLY_TOKENS)
+        if attempt + 1 < max_attempts:
+            delay = _retry_delay(song["error"], attempt, base_delay, max_delay)
+            stats["backoff_s"] += delay
+            time.sleep(delay)
+    stats = {k: round(v, 3) if isinstance(v, float) else v for k, v in stats.items()}
+    return song, stats
+
+# 4. Render stage (processes)
+_engine = None
+
+def render_song(song, wav_path, midi_path, timbre="saw"):
+    """Renders the preview WAV and melody MIDI for one song in a worker process."""
+    global _engine
+    from music_engine import MusicEngine
+    if _engine is None or _engine.timbre != timbre:
+        _engine = MusicEngine(timbre=timbre, use_cache=False) # One-off songs stay out of the app's render cache
+    start = time.perf_counter()
+    wav = _engine.generate_preview_wav(song)
+    if not wav:
+        return {"error": "Empty melody", "render_s": round(time.perf_counter() - start, 3)}
+    _write_atomic(wav_path, wav)
+    _write_atomic(midi_path, _engine.midi_bytes(song))
+    return {"render_s": round(time.perf_counter() - start, 3), "wav_bytes": len(wav)}
+
+# 5. Driver
+def run_catalog(jobs, out_dir, composer=None, concurrency=4, render_workers=None, rpm=30, tpm=6000,
+                max_attempts=4, base_delay=2.0, timbre="saw", log=print):
+    """
+    Composes and renders `jobs`, skipping ids already done in out_dir/manifest.jsonl.
+    At most `concurrency` LLM calls are in flight; renders queue on their own pool.
+    A render worker that dies (e.g. OOM-killed) fails only the songs it had in flight,
+    which are recorded as failed (and retried on the next run); the pool is replaced.
+    Returns a report dict with throughput, rate-limit waits and stage times.
+    """
+    if composer is None:
+        from composer import BollywoodComposer
+        composer = BollywoodComposer(use_cache=False)
+    for sub in ("songs", "audio", "midi"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    manifest = Manifest(os.path.join(out_dir, "manifest.jsonl"))
+    done = manifest.done()
+    pending = [job for job in jobs if job["id"] not in done]
+    limiter = RateLimiter(rpm, tpm, burst_requests=concurrency)
+    render_workers = render_workers or max(1, (os.cpu_count() or 2) - 1)
+    log(f"{len(jobs)} songs, {len(jobs) - len(pending)} already done, {len(pending)} to compose "
+        f"({concurrency} concurrent calls, {rpm or 'unlimited'} rpm, {tpm or 'unlimited'} tpm, "
+        f"{render_workers} render workers)")
+
+    totals = {"composed": 0, "rendered": 0, "failed": 0, "retries": 0, "llm_s": 0.0, "render_s": 0.0,
+              "backoff_s": 0.0, "rate_wait_s": 0.0}
+    start = time.perf_counter()
+    queue = iter(pending)
+    pools = {"render": ProcessPoolExecutor(max_workers=render_workers)}
+
+    def replace_render_pool(broken):
+        if broken is pools["render"]: # Futures of an already replaced pool fail later; replace once
+            log("  render worker died, restarting the render pool")
+            broken.shutdown(wait=False, cancel_futures=True)
+            pools["render"] = ProcessPoolExecutor(max_workers=render_workers)
+
+    def submit_render(entry, song):
+        args = (render_song, song, entry["wav_path"], entry["midi_path"], timbre)
+        pool = pools["render"]
+        try:
+            future = pool.submit(*args)
+        except BrokenProcessPool:
+            replace_render_pool(pool)
+            pool = pools["render"]
+            future = pool.submit(*args)
+        rendering[future] = (entry, pool)
+
+    composing, rendering = {}, {}
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as llm_pool:
+            while True:
+                while len(composing) < concurrency:
+                    job = next(queue, None)
+                    if job is None:
+                        break
+                    future = llm_pool.submit(compose_job, composer, limiter, job, max_attempts, base_delay)
+                    composing[future] = job
+                if not composing and not rendering:
+                    break
+
+                finished, _ = wait(list(composing) + list(rendering), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    if future in composing:
+                        job = composing.pop(future)
+                        song, stats = future.result()
+                        totals["retries"] += stats["attempts"] - 1
+                        totals["llm_s"] += stats["llm_s"]
+                        totals["backoff_s"] += stats["backoff_s"]
+                        totals["rate_wait_s"] += stats["rate_wait_s"]
+                        entry = dict(job, **stats)
+                        if "error" in song:
+                            totals["failed"] += 1
+                            manifest.record(dict(entry, status="failed", error=song["error"]))
+                            log(f"  FAILED {job['id']}: {song['error']}")
+                            continue
+                        totals["composed"] += 1
+                        song_path = os.path.join(out_dir, "songs", job["id"] + ".json")
+                        _write_atomic(song_path, json.dumps(song, ensure_ascii=False, indent=2).encode("utf-8"))
+                        entry["song_path"] = song_path
+                        entry["wav_path"] = os.path.join(out_dir, "audio", job["id"] + ".wav")
+                        entry["midi_path"] = os.path.join(out_dir, "midi", job["id"] + ".mid")
+                        submit_render(entry, song)
+                    else:
+                        entry, pool = rendering.pop(future)
+                        try:
+                            result = future.result()
+                        except BrokenProcessPool as e: # A worker was killed (OOM, signal)
+                            result = {"error": f"Render worker crashed: {e}"}
+                            replace_render_pool(pool)
+                        except Exception as e:
+                            result = {"error": str(e)}
+                        entry.update(result)
+                        totals["render_s"] += result.get("render_s", 0.0)
+                        if "error" in result:
+                            totals["failed"] += 1
+                            manifest.record(dict(entry, status="failed"))
+                        else:
+                            totals["rendered"] += 1
+                            manifest.record(dict(entry, status="done"))
+                            if totals["rendered"] % 10 == 0:
+                                rate = totals["rendered"] / (time.perf_counter() - start) * 60
+                                log(f"  {totals['rendered']}/{len(pending)} songs ({rate:.1f} songs/min)")
+    finally:
+        pools["render"].shutdown()
+
+    elapsed = time.perf_counter() - start
+    report = {k: round(v, 3) if isinstance(v, float) else v for k, v in totals.items()}
+    report.update({
+        "skipped": len(jobs) - len(pending),
+        "elapsed_s": round(elapsed, 3),
+        "songs_per_min": round(totals["rendered"] / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        # > 1 means LLM calls and renders overlapped instead of running back to back
+        "overlap": round((totals["llm_s"] + totals["render_s"]) / elapsed, 2) if elapsed > 0 else 0.0,
+    })
+    return report
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk song catalog generation.")
+    parser.add_argument("-o", "--out", default="song_catalog", help="Output directory")
+    parser.add_argument("--ragas", nargs="+", choices=sorted(RAGA_DB), help="Ragas (default: all)")
+    parser.add_argument("--moods", nargs="+", default=list(MOODS), help="Moods")
+    parser.add_argument("--voices", nargs="+", choices=sorted(VOICE_RANGES), help="Voices (default: all)")
+    parser.add_argument("--variants", type=int, default=1, help="Songs per raga / mood / voice")
+    parser.add_argument("--rpm", type=int, default=30, help="Requests per minute quota (0 = unlimited)")
+    parser.add_argument("--tpm", type=int, default=6000, help="Tokens per minute quota (0 = unlimited)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--render-workers", type=int, help="Render processes (default: CPU count - 1)")
+    parser.add_argument("--max-attempts", type=int, default=4, help="Tries per song")
+    parser.add_argument("--timbre", default="saw", choices=["saw", "square", "vocal"])
+    parser.add_argument("--fake", action="store_true", help="Use the offline fake model (no API calls)")
+    args = parser.parse_args(argv)
+
+    composer = None
+    if args.fake:
+        from composer import BollywoodComposer
+        from fake_llm import FakeChatModel
+        composer = BollywoodComposer(use_cache=False, llm=FakeChatModel(tokens_per_second=200))
+
+    jobs = catalog_jobs(args.ragas, args.moods, args.voices, args.variants)
+    report = run_catalog(jobs, args.out, composer, concurrency=args.concurrency,
+                         render_workers=args.render_workers, rpm=args.rpm, tpm=args.tpm,
+                         max_attempts=args.max_attempts, timbre=args.timbre)
+
+    print(f"\n{report['rendered']} songs in {report['elapsed_s']:.1f} s ({report['songs_per_min']:.1f} songs/min), "
+          f"{report['failed']} failed, {report['skipped']} skipped, {report['retries']} retries")
+    print(f"LLM {report['llm_s']:.1f} s, render {report['render_s']:.1f} s, rate-limit wait "
+          f"{report['rate_wait_s']:.1f} s, backoff {report['backoff_s']:.1f} s, overlap x{report['overlap']}")
+    return 1 if report["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+# startup_profile.py
+"""
+Cold-start profiler: imports each module in a fresh interpreter with
+`python -X importtime` and reports the cumulative import cost per module.
+
+    python startup_profile.py                 # default app modules
+    python startup_profile.py music_engine -v # one module, with its slowest imports
+    python startup_profile.py --budget-ms 300 # fail (exit 1) if any module exceeds 300 ms
+
+Run it from the repository root so the app modules are importable.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+# Modules app.py pulls in at startup, with their cold-import budget in milliseconds
+DEFAULT_BUDGETS_MS = {
+    "composer": 150,
+    "coach": 150,
+    "music_engine": 300,
+    "audio_analyzer": 200,
+    "voice_cloning": 50,
+    "raga_knowledge": 50,
+    "note_utils": 50,
+    "llm_clients": 50,
+    "app_jobs": 50,
+    "job_queue": 50,
+    "rerun_profile": 50,
+}
+
+def profile_import(module, python=sys.executable):
+    """
+    Imports `module` in a clean subprocess.
+    Returns (total_ms, rows) where rows are (cumulative_ms, self_ms, imported_name).
+    """
+    result = subprocess.run(
+        [python, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd()
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name.rstrip()))
+
+    total_ms = next((cum for cum, _, name in reversed(rows) if name.strip() == module), None)
+    if total_ms is None:
+        total_ms = sum(self_ms for _, self_ms, _ in rows)
+    return total_ms, rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report cold import time per module.")
+    parser.add_argument("modules", nargs="*", help="Modules to profile (default: app modules)")
+    parser.add_argument("--budget-ms", type=float, help="Budget applied to every module")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the slowest nested imports")
+    parser.add_argument("--top", type=int, default=8, help="Nested imports shown with -v")
+    args = parser.parse_args(argv)
+
+    modules = args.modules or list(DEFAULT_BUDGETS_MS)
+    over_budget = []
+    print(f"{'MODULE':<20} {'IMPORT_MS':>10} {'BUDGET_MS':>10}")
+    for module in modules:
+        budget = args.budget_ms or DEFAULT_BUDGETS_MS.get(module)
+        try:
+            total_ms, rows = profile_import(module)
+        except RuntimeError as e:
+            print(f"{module:<20} {'ERROR':>10}  {e}")
+            over_budget.append(module)
+            continue
+
+        flag = ""
+        if budget is not None and total_ms > budget:
+            flag = "  << OVER BUDGET"
+            over_budget.append(module)
+        print(f"{module:<20} {total_ms:>10.1f} {budget if budget is not None else '-':>10}{flag}")
+
+        if args.verbose:
+            nested = [r for r in rows if r[2].strip() != module]
+            for cum, self_ms, name in sorted(nested, reverse=True)[:args.top]:
+                print(f"    {cum:>9.1f} ms  (self {self_ms:.1f})  {name.strip()}")
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+# synth.py
+import struct
+import numpy as np
+from collections import OrderedDict, deque
+from functools import lru_cache
+
+SAMPLE_RATE = 24000 # Standard for TTS compatibility
+
+# Equal temperament, A4 = 440 Hz (same tuning music21 uses for .pitch.frequency)
+MIDI_FREQS = 440.0 * 2.0 ** ((np.arange(128) - 69) / 12.0)
+
+# Distinct pitches synthesized per batch, keeps the temporary phase arrays small
+_BATCH_NOTES = 64
+
+@lru_cache(maxsize=64)
+def adsr_template(n_samples):
+    """
+    Shared Attack/Decay/Sustain/Release envelope for a note of n_samples.
+    Same 10% / 10% / 60% / 20% shape as the original per-note envelope.
+    """
+    env = np.zeros(n_samples, dtype=np.float32)
+    a, d, s = int(n_samples * 0.1), int(n_samples * 0.1), int(n_samples * 0.6)
+    r = int(n_samples * 0.2)
+    env[:a + d + s + r] = np.concatenate([
+        np.linspace(0, 1, a), # Attack
+        np.linspace(1, 0.8, d), # Decay
+        np.linspace(0.8, 0.8, s), # Sustain
+        np.linspace(0.8, 0, r) # Release
+    ])
+    env.flags.writeable = False
+    return env
+
+@lru_cache(maxsize=64)
+def _time_axis(n_samples, sample_rate):
+    t = np.arange(n_samples) / sample_rate
+    t.flags.writeable = False
+    return t
+
+def sawtooth(freqs, t, out):
+    """
+    Writes a bank of sawtooth notes into `out` (shape: notes x samples).
+    Formula: 0.5 * 2 * (t * f - floor(t * f + 0.5))
+    Phase is computed in float64 so the wrap points match the per-note version.
+    """
+    phase = freqs[:, None] * t[None, :]
+    phase -= np.floor(phase + 0.5)
+    out[:] = phase
+    return out
+
+def note_layout(durations, sample_rate=SAMPLE_RATE):
+    """Turns note durations (seconds) into sample lengths and onsets."""
+    lengths = (np.asarray(durations, dtype=np.float64) * sample_rate).astype(np.int64)
+    onsets = np.zeros_like(lengths)
+    if len(lengths) > 1:
+        np.cumsum(lengths[:-1], out=onsets[1:])
+    return onsets, lengths
+
+def render_melody(midi, durations, sample_rate=SAMPLE_RATE, oscillator=sawtooth, out=None):
+    """
+    Renders a monophonic melody into one preallocated float32 buffer.
+
+    midi      : array of MIDI note numbers (0-127)
+    durations : array of note durations in seconds
+    out       : optional float32 buffer to render into (e.g. shared memory),
+                at least as long as the melody
+    Notes of the same length are synthesized together and share one envelope;
+    `oscillator(freqs, t, out)` fills one row of `out` per frequency.
+    """
+    midi = np.asarray(midi, dtype=np.int64)
+    onsets, lengths = note_layout(durations, sample_rate)
+    total = int(lengths.sum()) if len(lengths) else 0
+    if out is None:
+        out = np.zeros(total, dtype=np.float32)
+    else:
+        out[:] = 0
+    if total == 0:
+        return out
+
+    for n in np.unique(lengths):
+        n = int(n)
+        if n == 0:
+            continue
+        env = adsr_template(n)
+        t = _time_axis(n, sample_rate)
+        idx = np.flatnonzero(lengths == n)
+        # A (pitch, length) pair always sounds the same: render each one once
+        pitches, which = np.unique(midi[idx], return_inverse=True)
+        voices = np.empty((len(pitches), n), dtype=np.float32)
+        for start in range(0, len(pitches), _BATCH_NOTES):
+            rows = slice(start, start + _BATCH_NOTES)
+            oscillator(MIDI_FREQS[pitches[rows]], t, voices[rows])
+        voices *= env
+        # Consecutive notes of equal length map onto a plain view of the buffer
+        if idx[-1] - idx[0] == len(idx) - 1:
+            first = onsets[idx[0]]
+            np.take(voices, which, axis=0, out=out[first:first + len(idx) * n].reshape(len(idx), n))
+        else:
+            for i, v in zip(idx, which):
+                out[onsets[i]:onsets[i] + n] = voices[v]
+    return out
+
+def to_pcm16(audio):
+    """Peak-normalizes a float buffer in place and converts it to int16 PCM."""
+    peak = np.max(np.abs(audio)) if len(audio) else 0
+    if peak > 0:
+        audio *= 32767 / peak
+    return audio.astype(np.int16)
+
+def wav_header(num_frames, sample_rate=SAMPLE_RATE, channels=1, bits=16):
+    """44-byte RIFF/WAVE header for PCM data of a known length."""
+    block_align = channels * bits // 8
+    data_size = num_frames * block_align
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, sample_rate * block_align, block_align, bits,
+        b"data", data_size
+    )
+
+def iter_melody_chunks(midi, durations, chunk_size=8192, sample_rate=SAMPLE_RATE,
+                       oscillator=sawtooth, max_voices=32):
+    """
+    Streaming counterpart of render_melody: yields float32 chunks of `chunk_size` samples
+    (the last one may be shorter). Rendered (pitch, length) voices are kept in a small
+    LRU, so memory stays constant however long the melody is.
+    """
+    midi = np.asarray(midi, dtype=np.int64)
+    onsets, lengths = note_layout(durations, sample_rate)
+    total = int(lengths.sum()) if len(lengths) else 0
+    voices = OrderedDict()
+
+    def voice(i):
+        key = (int(midi[i]), int(lengths[i]))
+        v = voices.get(key)
+        if v is None:
+            n = key[1]
+            v = np.empty((1, n), dtype=np.float32)
+            oscillator(MIDI_FREQS[[key[0]]], _time_axis(n, sample_rate), v)
+            v = v[0]
+            v *= adsr_template(n)
+            voices[key] = v
+            if len(voices) > max_voices:
+                voices.popitem(last=False)
+        else:
+            voices.move_to_end(key)
+        return v
+
+    note = 0
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        chunk = np.zeros(stop - start, dtype=np.float32)
+        # Skip notes that ended before this chunk
+        while note < len(lengths) and onsets[note] + lengths[note] <= start:
+            note += 1
+        i = note
+        while i < len(lengths) and onsets[i] < stop:
+            lo = max(start, onsets[i])
+            hi = min(stop, onsets[i] + lengths[i])
+            if hi > lo:
+                chunk[lo - start:hi - start] = voice(i)[lo - onsets[i]:hi - onsets[i]]
+            i += 1
+        yield chunk
+
+def limit_chunks(chunks, ceiling=1.0, lookahead=1, floor=1e-4):
+    """
+    Running-peak lookahead limiter, replacing the global np.max normalization for streams.
+    Each chunk is scaled so the loudest sample seen so far (including `lookahead` upcoming
+    chunks) hits `ceiling`. The gain only moves down, ramped across a chunk so it never clicks.
+    """
+    pending = deque()
+    running_peak = floor
+    gain = None
+
+    def emit(chunk):
+        nonlocal running_peak, gain
+        for c in (chunk, *pending):
+            if len(c):
+                running_peak = max(running_peak, float(np.max(np.abs(c))))
+        target = ceiling / running_peak
+        if gain is None or gain == target:
+            chunk *= target
+        else:
+            chunk *= np.linspace(gain, target, len(chunk), dtype=np.float32)
+        gain = target
+        np.clip(chunk, -ceiling, ceiling, out=chunk)
+        return chunk
+
+    for chunk in chunks:
+        pending.append(chunk)
+        if len(pending) > lookahead:
+            yield emit(pending.popleft())
+    while pending:
+        yield emit(pending.popleft())
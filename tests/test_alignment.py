@@ -0,0 +1,33 @@
+# tests/test_alignment.py
+import numpy as np
+
+from alignment import banded_dtw
+
+def brute_force_dtw(cost):
+    n, m = cost.shape
+    D = np.full((n + 1, m + 1), np.inf)
+    D[0, 0] = 0.0
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            D[i, j] = cost[i - 1, j - 1] + min(D[i - 1, j - 1], D[i - 1, j], D[i, j - 1])
+    return D[n, m]
+
+def test_wide_band_matches_brute_force():
+    rng = np.random.default_rng(7)
+    for n, m in [(1, 1), (1, 6), (5, 1), (6, 9), (12, 7), (10, 10)]:
+        cost = rng.random((n, m))
+        total, path = banded_dtw(lambda i, cols: cost[i, cols], n, m, band=max(n, m))
+        assert np.isclose(total, brute_force_dtw(cost)), (n, m)
+
+        # The path runs corner to corner in unit steps and its cost is the total
+        assert tuple(path[0]) == (0, 0) and tuple(path[-1]) == (n - 1, m - 1)
+        steps = np.diff(path, axis=0)
+        assert ((steps >= 0) & (steps <= 1)).all() and (steps.sum(axis=1) >= 1).all()
+        assert np.isclose(cost[path[:, 0], path[:, 1]].sum(), total)
+
+def test_narrow_band_never_beats_the_full_grid():
+    rng = np.random.default_rng(11)
+    cost = rng.random((30, 40))
+    full = brute_force_dtw(cost)
+    total, _ = banded_dtw(lambda i, cols: cost[i, cols], 30, 40, band=3)
+    assert total >= full - 1e-9
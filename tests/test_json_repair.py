@@ -0,0 +1,58 @@
+# tests/test_json_repair.py
+import json
+import os
+
+from fake_llm import SAMPLE_FEEDBACK
+from json_repair import parse_llm_json, repair_json
+
+CORPUS = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "json_corpus.jsonl")
+
+SONG = {
+    "raga": "Yaman",
+    "root_note": "C3",
+    "alaap": ["N_ R G M# D N S^"],
+    "melody_main": ["C4 D4 E4 F#4 G4 A4", "B4 C5 B4 A4 G4 F#4", "E4 F#4 G4 A4 B4 A4", "G4 F#4 E4 D4 C4 C4"],
+    "lyrics": ["Chaand ki roshni mein", "Tera chehra dikhe", "Dil ki har dhadkan", "Tujhko hi pukaare"],
+    "meta_emotion": "Romantic",
+}
+
+# Per-case differences from the clean reply; ABSENT marks a field the parse drops
+ABSENT = object()
+
+DELTAS = {
+    "song_url_in_string": {"reference": "https://en.wikipedia.org/wiki/Yaman"},
+    "song_python_literals": {"has_chorus": True, "tempo": None},
+    "song_truncated_in_lyrics": {"lyrics": ["Chaand ki roshni mein", "Tera chehra dikhe", ""], "meta_emotion": ABSENT},
+    "song_truncated_in_string": {"lyrics": ["Chaand ki roshni mein", "Tera chehr"], "meta_emotion": ABSENT},
+    "song_truncated_after_melody": {"lyrics": ABSENT, "meta_emotion": ABSENT},
+    "song_escaped_quotes": {"lyrics": ["Chaand ki roshni mein", 'Tera "chehra" dikhe', "Dil ki har dhadkan", "Tujhko hi pukaare"]},
+    "song_devanagari": {"lyrics": ["चाँद की रोशनी में", "तेरा चेहरा दिखे"]},
+    "song_fence_truncated": {"melody_main": ["C4 D4 E4 F#4 G4 A4"], "lyrics": ABSENT, "meta_emotion": ABSENT},
+    "coach_truncated_in_comment": {"guru_comment": "Bahut accha beta, bas Ga pe "},
+    "coach_truncated_in_exercise": {"practice_exercise": {"drill": "Sa Re Ga Re Sa slowly"}, "guru_comment": ABSENT},
+    "coach_percent_unquoted": {"performance_score": dict(SAMPLE_FEEDBACK["performance_score"],
+                                                         pitch_accuracy=72, rhythm_accuracy=80)},
+}
+
+def expected(case):
+    out = dict(SONG if case["kind"] == "song" else SAMPLE_FEEDBACK)
+    for k, v in DELTAS.get(case["name"], {}).items():
+        if v is ABSENT:
+            out.pop(k)
+        else:
+            out[k] = v
+    return out
+
+def test_corpus_parses_to_expected_dicts():
+    with open(CORPUS, encoding="utf-8") as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    assert cases
+    for case in cases:
+        assert parse_llm_json(case["text"]) == expected(case), case["name"]
+
+def test_valid_json_needs_no_repairs():
+    assert repair_json('{"a": [1, 2.5, "x"]}') == ({"a": [1, 2.5, "x"]}, 0)
+
+def test_no_structure_is_an_error_dict():
+    assert "error" in parse_llm_json("Sorry, I can't help with that.")
+    assert "error" in parse_llm_json("[1, 2, 3]")
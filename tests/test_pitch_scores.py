@@ -0,0 +1,29 @@
+# tests/test_pitch_scores.py
+import io
+import numpy as np
+import pytest
+
+pytest.importorskip("librosa")
+sf = pytest.importorskip("soundfile")
+
+from audio_analyzer import AudioAnalyzer
+
+def synthetic_take(sr=22050, note_seconds=0.4):
+    """Yaman phrase above C3, a little sharp on Ga (the vadi) and flat on Pa."""
+    cents = {52: 20.0, 55: -15.0}
+    t = np.arange(int(sr * note_seconds)) / sr
+    notes = [48, 50, 52, 54, 55, 57, 59, 60, 59, 57, 55, 52]
+    audio = np.concatenate([0.3 * np.sin(2 * np.pi * 440.0 * 2 ** ((m + cents.get(m, 0.0) / 100 - 69) / 12) * t)
+                            for m in notes]).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, sr, format="WAV")
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("raga", ["Yaman", "Kafi"])
+def test_stream_and_one_shot_scores_match(raga):
+    take = synthetic_take()
+    analyzer = AudioAnalyzer("yin", use_cache=False)
+    one_shot = analyzer.analyze_singing(take, raga, "Male")
+    streamed = analyzer.analyze_stream(take, raga, "Male")
+    assert 0 < one_shot["pitch_score"] < 100
+    assert streamed["pitch_score"] == one_shot["pitch_score"]
@@ -0,0 +1,25 @@
+# tests/test_raga_check.py
+from composer import BollywoodComposer
+from fake_llm import FakeChatModel
+from raga_index import get_raga_index
+
+def raga_check(melody, voice, root_note=None):
+    song = {"melody_main": melody}
+    if root_note:
+        song["root_note"] = root_note
+    return BollywoodComposer(use_cache=False, llm=FakeChatModel())._raga_check(song, "Yaman", voice)
+
+def test_yaman_ascent_wraps_the_octave():
+    assert get_raga_index("Yaman").conformance([60, 62, 64, 66, 69, 71, 72], 60) == {"in_scale": 1.0, "transitions": 1.0}
+
+def test_female_yaman_sargam_scores_full():
+    check = raga_check(["N_ R G M# D N S^", "S^ N D P M# G R S"], "Female", "G3")
+    assert check == {"in_scale": 1.0, "transitions": 1.0}
+
+def test_female_yaman_western_scores_full():
+    # Yaman with Sa = G3: G A B C# D E F#
+    check = raga_check(["F#3 A3 B3 C#4 E4 F#4 G4", "G4 F#4 E4 D4 C#4 B3 A3 G3"], "Female")
+    assert check == {"in_scale": 1.0, "transitions": 1.0}
+
+def test_male_yaman_sargam_scores_full():
+    assert raga_check(["N_ R G M# D N S^"], "Male", "C3") == {"in_scale": 1.0, "transitions": 1.0}
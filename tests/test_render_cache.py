@@ -0,0 +1,43 @@
+# tests/test_render_cache.py
+import os
+
+from render_cache import RenderCache, render_key
+
+def test_key_is_content_addressed():
+    assert render_key("wav", [60, 62], bpm=90) == render_key("wav", (60.0, 62), bpm=90)
+    assert render_key("wav", [60, 62], bpm=90) != render_key("wav", [60, 62], bpm=100)
+    assert render_key("wav", [60, 62], bpm=90) != render_key("midi", [60, 62], bpm=90)
+
+def test_hit_and_miss(tmp_path):
+    cache = RenderCache(str(tmp_path))
+    assert cache.get("a") is None
+    cache.put("a", b"wav bytes")
+    assert cache.get("a") == b"wav bytes"
+    assert cache.counters == {"memory_hits": 1, "disk_hits": 0, "misses": 1, "evictions": 0}
+
+    # A fresh cache over the same directory serves from disk, then from memory
+    reopened = RenderCache(str(tmp_path))
+    assert reopened.get("a") == b"wav bytes"
+    assert reopened.get("a") == b"wav bytes"
+    assert (reopened.counters["disk_hits"], reopened.counters["memory_hits"]) == (1, 1)
+
+def test_memory_lru_eviction_falls_back_to_disk(tmp_path):
+    cache = RenderCache(str(tmp_path), max_memory_bytes=20)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"y" * 10)
+    cache.get("a") # "b" is now least recently used
+    cache.put("c", b"z" * 10)
+    assert cache.counters["evictions"] == 1
+    assert cache.stats()["memory_entries"] == 2
+    assert cache.get("b") == b"y" * 10
+    assert cache.counters["disk_hits"] == 1
+
+def test_disk_eviction_removes_oldest_files(tmp_path):
+    cache = RenderCache(str(tmp_path), max_disk_bytes=25)
+    for age, key in enumerate(["old", "mid"]):
+        cache.put(key, b"x" * 10)
+        os.utime(os.path.join(str(tmp_path), key + ".bin"), (1000 + age, 1000 + age))
+    cache.put("new", b"x" * 10)
+    assert cache.counters["evictions"] == 1
+    assert sorted(os.listdir(str(tmp_path))) == ["mid.bin", "new.bin"]
+    assert cache.stats()["disk_bytes"] == 20
@@ -0,0 +1,33 @@
+# tests/test_smf.py
+import pytest
+
+from smf import MidiTrack, encode_vlq, write_smf
+
+def test_vlq_matches_the_spec_examples():
+    assert encode_vlq(0) == b"\x00"
+    assert encode_vlq(0x7F) == b"\x7F"
+    assert encode_vlq(0x80) == b"\x81\x00"
+    assert encode_vlq(0x0FFFFFFF) == b"\xFF\xFF\xFF\x7F"
+
+def test_round_trip_through_music21():
+    midi = pytest.importorskip("music21.midi")
+    from music21.midi.translate import midiFileToStream
+    pitches, beats = [60, 62, 64, 66, 67], [1.0, 0.5, 0.5, 2.0, 1.0]
+    melody = MidiTrack("Melody", program=40, channel=0)
+    melody.add_notes(pitches, beats)
+    drone = MidiTrack("Tanpura", program=104, channel=1)
+    drone.add_notes([48], [5.0])
+
+    mf = midi.MidiFile()
+    mf.readstr(write_smf([melody, drone], bpm=90))
+    assert mf.ticksPerQuarterNote == 480
+    assert [t.getProgramChanges() for t in mf.tracks[1:]] == [[40], [104]]
+
+    score = midiFileToStream(mf)
+    assert score.metronomeMarkBoundaries()[0][2].number == 90
+    line = list(score.parts[0].recurse().notes)
+    assert [n.pitch.midi for n in line] == pitches
+    assert [float(n.quarterLength) for n in line] == beats
+    assert [float(n.getOffsetInHierarchy(score.parts[0])) for n in line] == [0.0, 1.0, 1.5, 2.0, 4.0]
+    drone_notes = list(score.parts[1].stripTies().recurse().notes) # 5 beats tie across the bar line
+    assert [(n.pitch.midi, float(n.quarterLength)) for n in drone_notes] == [(48, 5.0)]
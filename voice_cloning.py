@@ -2,6 +2,8 @@
 import time
 import os
 
+TRAINING_STEPS = ("Extract Timbre", "Pitch Characteristics", "Build Model Index")
+
 class VoiceCloningEngine:
     def __init__(self):
         self.active_models = {}
@@ -24,15 +26,17 @@ class VoiceCloningEngine:
         # Check file duration (Simulation)
         return True, "✅ Consent Verified. Audio quality looks good."
 
-    def train_user_model(self, user_id, files):
+    def train_user_model(self, user_id, files, progress=None):
         """
         Simulates the RVC/So-VITS training pipeline.
         In production, this would kick off a GPU job.
+        progress(step, total, name) is called as each step starts (background jobs).
         """
         # Simulation of pipeline steps
-        time.sleep(1) # Step 1: Extract Timbre
-        time.sleep(1) # Step 2: Pitch Characteristics
-        time.sleep(1) # Step 3: Build Model Index
+        for step, name in enumerate(TRAINING_STEPS):
+            if progress:
+                progress(step, len(TRAINING_STEPS), name)
+            time.sleep(1)
         
         model_id = f"model_{user_id}_{int(time.time())}"
         self.active_models[user_id] = model_id
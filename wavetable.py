@@ -0,0 +1,129 @@
+# wavetable.py
+import threading
+import numpy as np
+from collections import OrderedDict
+from synth import SAMPLE_RATE
+
+TABLE_BITS = 11
+TABLE_SIZE = 1 << TABLE_BITS # 2048 samples per cycle
+BAND_SEMITONES = 3 # One band-limited table per minor third
+WAVEFORMS = ("saw", "square", "vocal")
+
+# "Aa" vowel formants (centre Hz, bandwidth Hz, gain) for the vocal timbre
+VOCAL_FORMANTS = ((700, 110, 1.0), (1220, 120, 0.5), (2600, 160, 0.25))
+
+_FRAC_SHIFT = 32 - TABLE_BITS
+_FRAC_SCALE = np.float32(1.0 / (1 << _FRAC_SHIFT))
+
+def _harmonic_amplitudes(waveform, n_harmonics, f0):
+    """Sine amplitudes for harmonics 1..n_harmonics of a single cycle."""
+    k = np.arange(1, n_harmonics + 1)
+    if waveform == "saw":
+        # x - round(x) = (1/pi) * sum (-1)^(k+1) sin(2 pi k x) / k
+        amps = ((-1.0) ** (k + 1)) / (np.pi * k)
+    elif waveform == "square":
+        amps = np.where(k % 2 == 1, 2.0 / (np.pi * k), 0.0)
+    elif waveform == "vocal":
+        # Glottal-like 1/k source shaped by fixed vowel resonances
+        freqs = k * f0
+        shape = np.zeros(n_harmonics)
+        for centre, width, gain in VOCAL_FORMANTS:
+            shape += gain / (1.0 + ((freqs - centre) / width) ** 2)
+        amps = (0.2 + shape) / k
+    else:
+        raise ValueError(f"Unknown waveform '{waveform}'. Choose from {WAVEFORMS}.")
+    # Lanczos sigma factors tame the Gibbs ripple of the truncated series
+    return amps * np.sinc(k / (n_harmonics + 1))
+
+def build_table(waveform, n_harmonics, f0=261.63):
+    """
+    Builds one band-limited single-cycle table via inverse FFT.
+    Peak amplitude is 0.5 to match the naive sawtooth's range.
+    The table carries one guard sample so interpolation never wraps.
+    """
+    n_harmonics = max(1, min(n_harmonics, TABLE_SIZE // 2 - 1))
+    spectrum = np.zeros(TABLE_SIZE // 2 + 1, dtype=np.complex128)
+    spectrum[1:n_harmonics + 1] = -0.5j * TABLE_SIZE * _harmonic_amplitudes(waveform, n_harmonics, f0)
+    cycle = np.fft.irfft(spectrum, n=TABLE_SIZE)
+    peak = np.max(np.abs(cycle))
+    if peak > 0:
+        cycle *= 0.5 / peak
+    table = np.empty(TABLE_SIZE + 1, dtype=np.float32)
+    table[:-1] = cycle
+    table[-1] = cycle[0]
+    table.flags.writeable = False
+    return table
+
+class WavetableBank:
+    """
+    Band-limited oscillator bank.
+    Tables are built lazily per (waveform, pitch band) and kept in a bounded LRU cache.
+    Safe to share between threads: the LRU is locked, table building is not.
+    """
+    def __init__(self, sample_rate=SAMPLE_RATE, max_tables=128):
+        self.sample_rate = sample_rate
+        self.max_tables = max_tables
+        self._tables = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _band(self, freq):
+        midi = 69 + 12 * np.log2(max(freq, 1e-3) / 440.0)
+        return int(np.floor(midi / BAND_SEMITONES))
+
+    def table(self, waveform, freq):
+        """Returns the table for `freq`, built for the top of its band so no partial aliases."""
+        band = self._band(freq)
+        key = (waveform, band)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        top_freq = 440.0 * 2 ** (((band + 1) * BAND_SEMITONES - 69) / 12)
+        mid_freq = 440.0 * 2 ** (((band + 0.5) * BAND_SEMITONES - 69) / 12)
+        n_harmonics = int((self.sample_rate / 2) // top_freq)
+        table = build_table(waveform, n_harmonics, f0=mid_freq)
+        with self._lock: # Two threads may build the same table; both are identical
+            self._tables[key] = table
+            self._tables.move_to_end(key)
+            if len(self._tables) > self.max_tables:
+                self._tables.popitem(last=False)
+        return table
+
+    def render(self, waveform, freqs, t, out):
+        """
+        Renders a bank of notes (shape: notes x samples) by table lookup.
+        Each row runs a 32-bit fixed point phase accumulator starting at phase 0.
+        """
+        n = len(t)
+        steps = np.arange(n, dtype=np.uint32)
+        for row, freq in enumerate(freqs):
+            table = self.table(waveform, float(freq))
+            increment = np.uint32(int(round(freq / self.sample_rate * 2 ** 32)) & 0xFFFFFFFF)
+            phase = steps * increment # wraps modulo 2^32
+            idx = phase >> _FRAC_SHIFT
+            frac = (phase & ((1 << _FRAC_SHIFT) - 1)).astype(np.float32)
+            frac *= _FRAC_SCALE
+            lo = table[idx]
+            np.subtract(table[idx + 1], lo, out=out[row])
+            out[row] *= frac
+            out[row] += lo
+        return out
+
+    def oscillator(self, waveform="saw"):
+        """Adapts the bank to the `oscillator(freqs, t, out)` hook used by synth.render_melody."""
+        if waveform not in WAVEFORMS:
+            raise ValueError(f"Unknown waveform '{waveform}'. Choose from {WAVEFORMS}.")
+        return lambda freqs, t, out: self.render(waveform, freqs, t, out)
+
+_BANKS = {}
+_BANKS_LOCK = threading.Lock()
+
+def get_bank(sample_rate=SAMPLE_RATE):
+    """Process-wide bank per sample rate, so the table cache outlives each MusicEngine."""
+    with _BANKS_LOCK:
+        bank = _BANKS.get(sample_rate)
+        if bank is None:
+            bank = _BANKS[sample_rate] = WavetableBank(sample_rate)
+        return bank